@@ -138,6 +138,16 @@ export default function StudentsPage() {
                 onClick={() => setSelectedStudent(student)}
               >
                 <div className="flex items-start justify-between">
+                  {(student.photo_path || student.original_image_path) && (
+                    <img
+                      src={api.getStudentFileUrl(student, student.photo_path || student.original_image_path, 'thumb') || ''}
+                      alt={student.full_name}
+                      loading="lazy"
+                      width={64}
+                      height={64}
+                      className="w-16 h-16 object-cover rounded mr-4 flex-shrink-0 bg-gray-700"
+                    />
+                  )}
                   <div className="flex-1">
                     <div className="flex items-center space-x-3 mb-2">
                       <h3 className="text-base md:text-lg font-semibold text-white">
@@ -220,6 +230,32 @@ export default function StudentsPage() {
               </div>
 
               <div className="space-y-4">
+                {(selectedStudent.photo_path || selectedStudent.original_image_path) && (
+                  <div className="grid grid-cols-1 sm:grid-cols-2 gap-4">
+                    {selectedStudent.photo_path && (
+                      <img
+                        src={api.getStudentFileUrl(selectedStudent, selectedStudent.photo_path, 'preview') || ''}
+                        alt="Photo"
+                        className="max-h-64 w-auto mx-auto rounded"
+                      />
+                    )}
+                    {selectedStudent.original_image_path && (
+                      <a
+                        href={api.getStudentFileUrl(selectedStudent, selectedStudent.original_image_path) || ''}
+                        target="_blank"
+                        rel="noopener noreferrer"
+                        title="Open the original document"
+                      >
+                        <img
+                          src={api.getStudentFileUrl(selectedStudent, selectedStudent.original_image_path, 'preview') || ''}
+                          alt="Document"
+                          className="max-h-64 w-auto mx-auto rounded"
+                        />
+                      </a>
+                    )}
+                  </div>
+                )}
+
                 <div className="grid grid-cols-2 gap-4">
                   <div>
                     <label className="text-xs md:text-sm font-semibold text-gray-400">Student ID</label>
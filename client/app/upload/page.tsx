@@ -1,15 +1,32 @@
 'use client';
 
 import { useState, useRef } from 'react';
-import { api, UploadResponse } from '@/lib/api';
+import { api, UploadResponse, UploadStage } from '@/lib/api';
 import { useTheme } from '@/contexts/ThemeContext';
 
+// What the upload button shows once a stage has finished
+const STAGE_LABELS: Record<string, string> = {
+  received: 'Uploaded, checking for duplicates...',
+  fingerprinted: 'Waiting for an OCR slot...',
+  admitted: 'Reading image...',
+  claimed: 'Picked up by an OCR worker...',
+  decoded: 'Locating the card...',
+  card_detected: 'Cleaning up the image...',
+  preprocessed: 'Running OCR...',
+  ocr_done: 'Extracting fields...',
+  fields_extracted: 'Extracting photo...',
+  photo_extracted: 'Saving...',
+  committed: 'Saved',
+  duplicate: 'Already uploaded',
+};
+
 export default function UploadPage() {
   const { theme } = useTheme();
   const [selectedFile, setSelectedFile] = useState<File | null>(null);
   const [previewUrl, setPreviewUrl] = useState<string | null>(null);
   const [uploading, setUploading] = useState(false);
   const [result, setResult] = useState<UploadResponse | null>(null);
+  const [stages, setStages] = useState<UploadStage[]>([]);
   const [error, setError] = useState<string | null>(null);
   const [useCamera, setUseCamera] = useState(false);
   const [stream, setStream] = useState<MediaStream | null>(null);
@@ -88,9 +105,12 @@ export default function UploadPage() {
     setUploading(true);
     setError(null);
     setResult(null);
+    setStages([]);
 
     try {
-      const response = await api.uploadDocument(selectedFile);
+      const response = await api.uploadDocumentWithProgress(selectedFile, (stage) => {
+        setStages((previous) => [...previous, stage]);
+      });
       setResult(response);
       
       // Clear form after successful upload
@@ -213,7 +233,7 @@ export default function UploadPage() {
                     <circle className="opacity-25" cx="12" cy="12" r="10" stroke="currentColor" strokeWidth="4"></circle>
                     <path className="opacity-75" fill="currentColor" d="M4 12a8 8 0 018-8V0C5.373 0 0 5.373 0 12h4zm2 5.291A7.962 7.962 0 014 12H0c0 3.042 1.135 5.824 3 7.938l3-2.647z"></path>
                   </svg>
-                  Processing...
+                  {stages.length ? STAGE_LABELS[stages[stages.length - 1].stage] || 'Processing...' : 'Uploading...'}
                 </span>
               ) : (
                 '📤 Upload & Process'
@@ -231,6 +251,25 @@ export default function UploadPage() {
         )}
       </div>
 
+      {/* Processing Stages */}
+      {stages.length > 0 && (
+        <div className={`rounded-lg border p-4 mb-6 text-sm ${
+          theme === 'dark' ? 'bg-gray-800 border-gray-700 text-gray-300' : 'bg-white border-gray-200 text-gray-700'
+        }`}>
+          <h3 className="font-semibold mb-2">Processing</h3>
+          <ul className="space-y-1">
+            {stages.map((stage, index) => (
+              <li key={index} className="flex justify-between">
+                <span>✓ {STAGE_LABELS[stage.stage] || stage.stage}</span>
+                {stage.duration_ms !== undefined && (
+                  <span className="font-mono">{(stage.duration_ms / 1000).toFixed(2)}s</span>
+                )}
+              </li>
+            ))}
+          </ul>
+        </div>
+      )}
+
       {/* Error Message */}
       {error && (
         <div className="bg-red-50 border-l-4 border-red-500 p-4 mb-6 rounded">
@@ -39,6 +39,7 @@ export interface UploadResponse {
   success: boolean;
   message: string;
   student?: Student;
+  job_id?: number;
   ocr_result?: {
     success: boolean;
     extracted_text?: string;
@@ -48,12 +49,196 @@ export interface UploadResponse {
   };
 }
 
+// Stage event streamed while an upload (or queued job) is processed
+export interface UploadStage {
+  stage: string;
+  elapsed_ms: number;
+  duration_ms?: number;
+  status?: string;
+  [key: string]: any;
+}
+
+export interface Job {
+  id: number;
+  status: string;
+  stage?: string;
+  attempts: number;
+  error?: string;
+  student?: Student;
+  created_at: string;
+  updated_at: string;
+}
+
+// Read a text/event-stream response body, calling onEvent for every event.
+// fetch is used instead of EventSource because EventSource cannot send the auth header or a body.
+async function readEventStream(response: Response, onEvent: (event: string, data: string) => void) {
+  if (!response.body) {
+    throw new Error('Streaming is not supported by this browser');
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = 'message';
+      const data: string[] = [];
+      for (const line of block.split('\n')) {
+        if (line.startsWith('event:')) event = line.slice(6).trim();
+        else if (line.startsWith('data:')) data.push(line.slice(5).trim());
+      }
+      if (data.length) onEvent(event, data.join('\n'));
+    }
+  }
+}
+
+// Consume a progress stream until its "result" event; "error" events are thrown
+async function followProgress<T>(response: Response, onStage: (stage: UploadStage) => void): Promise<T> {
+  let result: T | undefined;
+  let failure: string | undefined;
+
+  await readEventStream(response, (event, data) => {
+    if (event === 'stage') onStage(JSON.parse(data));
+    else if (event === 'result') result = JSON.parse(data);
+    else if (event === 'error') failure = JSON.parse(data).detail;
+  });
+
+  if (failure) throw new Error(failure);
+  if (result === undefined) throw new Error('Connection closed before processing finished');
+  return result;
+}
+
+// Turn an upload response into the processed document: stage events are
+// followed to the result, queued uploads (OCR_MODE=queue) through the job's event stream
+async function followUpload(response: Response, onStage: (stage: UploadStage) => void): Promise<UploadResponse> {
+  if (!response.headers.get('content-type')?.includes('text/event-stream')) {
+    const queued: UploadResponse = await response.json();
+    if (!queued.job_id) return queued;
+
+    onStage({ stage: 'received', elapsed_ms: 0 });
+    const job = await api.watchJob(queued.job_id, onStage);
+    if (job.status === 'failed') {
+      throw new Error(job.error || 'Processing failed');
+    }
+    return { success: true, message: 'Document processed successfully', student: job.student, job_id: job.id };
+  }
+
+  return followProgress<UploadResponse>(response, onStage);
+}
+
+export interface ResumableUpload {
+  upload_id: string;
+  filename: string;
+  size: number;
+  offset: number;
+  chunk_size: number;
+  expires_at: string;
+}
+
+const RESUMABLE_MAX_ATTEMPTS = 5;
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+async function sha256Hex(data: ArrayBuffer): Promise<string> {
+  const digest = await crypto.subtle.digest('SHA-256', data);
+  return Array.from(new Uint8Array(digest), (byte) => byte.toString(16).padStart(2, '0')).join('');
+}
+
+// The same file picked again (e.g. after a reload) resumes its upload
+const resumableUploadKey = (file: File) => `resumable-upload:${file.name}:${file.size}:${file.lastModified}`;
+
+async function getResumableUpload(uploadId: string): Promise<ResumableUpload | null> {
+  const response = await fetch(`${API_URL}/api/uploads/${uploadId}`, {
+    headers: getAuthHeaders(),
+  });
+
+  if (response.status === 404) return null;
+  if (!response.ok) {
+    throw new Error('Failed to read upload state');
+  }
+
+  return response.json();
+}
+
+async function createResumableUpload(file: File): Promise<ResumableUpload> {
+  const response = await fetch(`${API_URL}/api/uploads`, {
+    method: 'POST',
+    headers: { ...getAuthHeaders(), 'Content-Type': 'application/json' },
+    body: JSON.stringify({ filename: file.name, size: file.size }),
+  });
+
+  if (!response.ok) {
+    const error = await response.json();
+    throw new Error(error.detail || 'Upload failed');
+  }
+
+  const upload: ResumableUpload = await response.json();
+  localStorage.setItem(resumableUploadKey(file), upload.upload_id);
+  return upload;
+}
+
+// Send one chunk and return the upload's new offset. Network errors and 5xx
+// are retried with backoff; 409 means the server has a different offset
+// (e.g. a lost response), which is returned so sending continues from there.
+async function putChunk(uploadId: string, offset: number, chunk: Blob): Promise<number> {
+  const data = await chunk.arrayBuffer();
+  const checksum = await sha256Hex(data);
+
+  for (let attempt = 1; ; attempt++) {
+    let response: Response | undefined;
+    try {
+      response = await fetch(`${API_URL}/api/uploads/${uploadId}?offset=${offset}`, {
+        method: 'PUT',
+        headers: { ...getAuthHeaders(), 'Content-Type': 'application/octet-stream', 'X-Chunk-SHA256': checksum },
+        body: data,
+      });
+    } catch (e) {
+      if (attempt >= RESUMABLE_MAX_ATTEMPTS) throw e;
+    }
+
+    if (response?.ok) {
+      const upload: ResumableUpload = await response.json();
+      return upload.offset;
+    }
+    if (response?.status === 409) {
+      return Number(response.headers.get('Upload-Offset'));
+    }
+    if (response && response.status < 500 && response.status !== 429) {
+      const error = await response.json();
+      throw new Error(error.detail || 'Upload failed');
+    }
+    if (attempt >= RESUMABLE_MAX_ATTEMPTS) {
+      throw new Error('Upload failed, try again to resume');
+    }
+    await sleep(1000 * 2 ** (attempt - 1));
+  }
+}
+
 export interface Statistics {
   total_students: number;
   recent_uploads: number;
   departments: Array<{ name: string; count: number }>;
 }
 
+export interface StatisticsTimeseries {
+  interval: 'day' | 'week' | 'month';
+  group_by: 'none' | 'department' | 'program';
+  start: string;
+  end: string;
+  buckets: string[];
+  series: Array<{ name: string; counts: number[]; total: number }>;
+  total: number;
+}
+
 export const api = {
   async uploadDocument(file: File): Promise<UploadResponse> {
     const formData = new FormData();
@@ -73,6 +258,94 @@ export const api = {
     return response.json();
   },
 
+  // Upload with live stage events (received, decoded, preprocessed, ocr_done, ...).
+  // Queued uploads (OCR_MODE=queue) are followed through the job's event stream.
+  async uploadDocumentWithProgress(
+    file: File,
+    onStage: (stage: UploadStage) => void
+  ): Promise<UploadResponse> {
+    const formData = new FormData();
+    formData.append('file', file);
+
+    const response = await fetch(`${API_URL}/api/upload?progress=true`, {
+      method: 'POST',
+      headers: getAuthHeaders(),
+      body: formData,
+    });
+
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.detail || 'Upload failed');
+    }
+
+    return followUpload(response, onStage);
+  },
+
+  // Upload a large document in checksummed chunks. An interrupted upload
+  // (network loss, reload) resumes where it stopped when the same file is
+  // uploaded again, until the server expires it. onProgress reports bytes sent.
+  async uploadDocumentResumable(
+    file: File,
+    onProgress: (sent: number, total: number) => void,
+    onStage: (stage: UploadStage) => void = () => {}
+  ): Promise<UploadResponse> {
+    const storedId = localStorage.getItem(resumableUploadKey(file));
+    let upload = storedId ? await getResumableUpload(storedId) : null;
+    if (!upload) upload = await createResumableUpload(file);
+
+    let offset = upload.offset;
+    onProgress(offset, file.size);
+    while (offset < file.size) {
+      offset = await putChunk(upload.upload_id, offset, file.slice(offset, offset + upload.chunk_size));
+      onProgress(offset, file.size);
+    }
+
+    let response: Response;
+    for (let attempt = 1; ; attempt++) {
+      response = await fetch(`${API_URL}/api/uploads/${upload.upload_id}/finalize?progress=true`, {
+        method: 'POST',
+        headers: getAuthHeaders(),
+      });
+      // OCR is saturated: the upload is kept, finalize again after Retry-After
+      if (response.status !== 429 || attempt >= RESUMABLE_MAX_ATTEMPTS) break;
+      await sleep(Number(response.headers.get('Retry-After') || 5) * 1000);
+    }
+
+    if (!response.ok) {
+      const error = await response.json();
+      if (response.status === 404 || response.status === 400) {
+        localStorage.removeItem(resumableUploadKey(file));
+      }
+      throw new Error(error.detail || 'Upload failed');
+    }
+
+    localStorage.removeItem(resumableUploadKey(file));
+    return followUpload(response, onStage);
+  },
+
+  async cancelResumableUpload(file: File): Promise<void> {
+    const uploadId = localStorage.getItem(resumableUploadKey(file));
+    if (!uploadId) return;
+
+    await fetch(`${API_URL}/api/uploads/${uploadId}`, {
+      method: 'DELETE',
+      headers: getAuthHeaders(),
+    });
+    localStorage.removeItem(resumableUploadKey(file));
+  },
+
+  async watchJob(jobId: number, onStage: (stage: UploadStage) => void): Promise<Job> {
+    const response = await fetch(`${API_URL}/api/jobs/${jobId}/events`, {
+      headers: getAuthHeaders(),
+    });
+
+    if (!response.ok) {
+      throw new Error('Failed to follow job');
+    }
+
+    return followProgress<Job>(response, onStage);
+  },
+
   async searchStudents(query?: string, page = 1, pageSize = 50): Promise<SearchResponse> {
     const params = new URLSearchParams({
       page: page.toString(),
@@ -200,7 +473,39 @@ export const api = {
     }
   },
 
-  getFileUrl(studentId: string, filename: string): string {
-    return `${API_URL}/api/files/${studentId}/${filename}`;
+  async getStatisticsTimeseries(options: {
+    start?: string;
+    end?: string;
+    interval?: 'day' | 'week' | 'month';
+    groupBy?: 'none' | 'department' | 'program';
+  } = {}): Promise<StatisticsTimeseries> {
+    const params = new URLSearchParams();
+    if (options.start) params.append('start', options.start);
+    if (options.end) params.append('end', options.end);
+    if (options.interval) params.append('interval', options.interval);
+    if (options.groupBy) params.append('group_by', options.groupBy);
+
+    const response = await fetch(`${API_URL}/api/stats/timeseries?${params}`, {
+      headers: getAuthHeaders(),
+    });
+
+    if (!response.ok) {
+      throw new Error('Failed to fetch statistics');
+    }
+
+    return response.json();
+  },
+
+  getFileUrl(studentId: string, filename: string, size?: 'thumb' | 'preview'): string {
+    const url = `${API_URL}/api/files/${studentId}/${filename}`;
+    return size ? `${url}?size=${size}` : url;
+  },
+
+  // URL of a student's stored file (original_image_path or photo_path).
+  // Storage keys are served by key; legacy paths by their file name.
+  getStudentFileUrl(student: Student, path?: string, size?: 'thumb' | 'preview'): string | null {
+    if (!path) return null;
+    const filename = path.split(/[\\/]/).pop();
+    return filename ? api.getFileUrl(student.student_id, filename, size) : null;
   },
 };
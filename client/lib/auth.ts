@@ -64,6 +64,16 @@ export const authService = {
 
   logout() {
     if (typeof window !== 'undefined') {
+      const token = localStorage.getItem('access_token');
+      if (token) {
+        // Revoke the token server-side; local logout doesn't wait for it
+        fetch(`${API_URL}/api/auth/logout`, {
+          method: 'POST',
+          headers: {
+            'Authorization': `Bearer ${token}`,
+          },
+        }).catch(() => {});
+      }
       localStorage.removeItem('access_token');
       localStorage.removeItem('token_expiry');
     }
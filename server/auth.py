@@ -1,5 +1,9 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
@@ -15,6 +19,81 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
 
+class TokenCache:
+    """
+    Bounded LRU cache of verified token claims.
+
+    Entries expire at the token's own "exp" claim, so a cached token is never
+    accepted for longer than jwt.decode would accept it. Revoked token IDs
+    ("jti") are remembered until their tokens expire.
+    """
+    
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # token -> (claims, expires_at)
+        self._revoked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, token: str) -> Optional[dict]:
+        """Get the cached claims of a token, or None if it is not cached or has expired."""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            claims, expires_at = entry
+            if expires_at <= time.time() or self._is_revoked(claims):
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return dict(claims)
+    
+    def put(self, token: str, claims: dict) -> bool:
+        """
+        Cache the claims of a verified token, unless it has been revoked.
+        The revocation check and the insert happen under one lock, so a
+        concurrent logout cannot leave the token cached.
+
+        Returns:
+            False if the token has been revoked
+        """
+        with self._lock:
+            if self._is_revoked(claims):
+                return False
+            if self.maxsize > 0 and "exp" in claims:
+                self._entries[token] = (dict(claims), float(claims["exp"]))
+                self._entries.move_to_end(token)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+            return True
+    
+    def revoke(self, token: str, claims: dict):
+        """Reject a token from now on, whether or not it is cached."""
+        with self._lock:
+            self._entries.pop(token, None)
+            jti = claims.get("jti")
+            if jti:
+                self._revoked[jti] = float(claims.get("exp", time.time()))
+            # Forget revocations of tokens that have expired anyway
+            now = time.time()
+            for expired in [j for j, expires_at in self._revoked.items() if expires_at <= now]:
+                del self._revoked[expired]
+    
+    def is_revoked(self, claims: dict) -> bool:
+        with self._lock:
+            return self._is_revoked(claims)
+    
+    def _is_revoked(self, claims: dict) -> bool:
+        jti = claims.get("jti")
+        return bool(jti) and jti in self._revoked
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(settings.token_cache_size)
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
     return pwd_context.verify(plain_password, hashed_password)
@@ -34,7 +113,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
     
-    to_encode.update({"exp": expire})
+    # jti identifies the token for revocation
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(
         to_encode,
         settings.jwt_secret_key,
@@ -45,7 +125,14 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 
 def verify_token(token: str) -> dict:
-    """Verify and decode a JWT token."""
+    """
+    Verify and decode a JWT token.
+    Verified claims are served from token_cache until the token expires.
+    """
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached
+    
     try:
         payload = jwt.decode(
             token,
@@ -61,6 +148,13 @@ def verify_token(token: str) -> dict:
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
+        if not token_cache.put(token, payload):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has been revoked",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        
         return payload
     
     except JWTError:
@@ -71,6 +165,19 @@ def verify_token(token: str) -> dict:
         )
 
 
+def revoke_token(token: str):
+    """Revoke a token (e.g. on logout)."""
+    try:
+        claims = jwt.decode(
+            token,
+            settings.jwt_secret_key,
+            algorithms=[settings.jwt_algorithm]
+        )
+    except JWTError:
+        return
+    token_cache.revoke(token, claims)
+
+
 def authenticate_admin(username: str, password: str) -> bool:
     """Authenticate admin credentials."""
     # In production, use hashed passwords from database
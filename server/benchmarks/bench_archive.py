@@ -0,0 +1,139 @@
+"""
+Document archive benchmark
+Builds the /api/export/archive ZIP for a throwaway SQLite database and local
+storage of random files the way a naive export would (read every file in
+turn into an in-memory ZIP, then send it) and the way ArchiveService streams
+it, with and without parallel read-ahead. Storage latency per request can be
+added to emulate S3. Reports time to first byte, throughput and peak Python
+memory (tracemalloc) of each
+
+Usage: python benchmarks/bench_archive.py [--files 400] [--file-kb 512] [--latency-ms 20] [--read-ahead 4]
+"""
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from typing import Iterator
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Must be set before the app (and its settings) are imported
+WORK_DIR = tempfile.mkdtemp(prefix="bench_archive_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORK_DIR, 'bench.db')}"
+
+from database import Base, SessionLocal, engine
+from models import Student
+from services.archive_service import ArchiveService
+from services.storage import LocalStorage
+
+
+class SlowStorage:
+    """Storage wrapper that waits before every stat and read, like a remote object store."""
+
+    def __init__(self, storage: LocalStorage, latency_seconds: float):
+        self.storage = storage
+        self.latency_seconds = latency_seconds
+
+    def stat(self, key):
+        time.sleep(self.latency_seconds)
+        return self.storage.stat(key)
+
+    def iter_range(self, key, start=0, end=None):
+        time.sleep(self.latency_seconds)
+        yield from self.storage.iter_range(key, start, end)
+
+
+def seed(storage: LocalStorage, files: int, file_kb: int):
+    db = SessionLocal()
+    try:
+        for i in range(files):
+            key = storage.put(io.BytesIO(os.urandom(file_kb * 1024)), ".jpg")
+            db.add(Student(student_id=f"CS{i:06d}", full_name=f"Student {i}", department="Computer Science", original_image_path=key))
+        db.commit()
+    finally:
+        db.close()
+
+
+def select_all(query):
+    return query
+
+
+def buffered_archive(storage) -> Iterator[bytes]:
+    """Baseline: the whole ZIP is built in memory before the first byte is sent."""
+    buffer = io.BytesIO()
+    db = SessionLocal()
+    try:
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+            for student in db.query(Student).order_by(Student.id):
+                stored = storage.stat(student.original_image_path)
+                if stored is None:
+                    continue
+                data = b"".join(storage.iter_range(student.original_image_path))
+                archive.writestr(f"{student.student_id}/document.jpg", data)
+    finally:
+        db.close()
+    yield buffer.getvalue()
+
+
+def measure(stream) -> dict:
+    tracemalloc.start()
+    started = time.perf_counter()
+    first_byte = None
+    total = 0
+    for chunk in stream:
+        if first_byte is None:
+            first_byte = time.perf_counter() - started
+        total += len(chunk)
+    elapsed = time.perf_counter() - started
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "first_byte_ms": (first_byte or 0) * 1000,
+        "seconds": elapsed,
+        "mb_per_second": total / 1024 / 1024 / elapsed,
+        "traced_peak_mb": traced_peak / 1024 / 1024,
+        "archive_mb": total / 1024 / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming of the document archive export")
+    parser.add_argument("--files", type=int, default=400, help="Documents in the archive")
+    parser.add_argument("--file-kb", type=int, default=512, help="Size of each document")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Added storage latency per request")
+    parser.add_argument("--read-ahead", type=int, default=4, help="Parallel reads of the streamed run")
+    args = parser.parse_args()
+
+    try:
+        Base.metadata.create_all(bind=engine)
+        local = LocalStorage(os.path.join(WORK_DIR, "objects"))
+        seed(local, args.files, args.file_kb)
+        storage = SlowStorage(local, args.latency_ms / 1000) if args.latency_ms else local
+
+        runs = [
+            ("buffered", lambda: buffered_archive(storage)),
+            ("streamed", lambda: ArchiveService.stream(SessionLocal, select_all, storage, read_ahead=1)),
+            (f"streamed x{args.read_ahead}", lambda: ArchiveService.stream(SessionLocal, select_all, storage, read_ahead=args.read_ahead)),
+        ]
+
+        print(f"{args.files} documents of {args.file_kb} KB, {args.latency_ms:g} ms storage latency")
+        header = f"{'mode':14} {'first byte ms':>14} {'seconds':>8} {'MB/s':>8} {'traced MB':>10} {'archive MB':>11}"
+        print(header)
+        print("-" * len(header))
+        for name, run in runs:
+            result = measure(run())
+            print(
+                f"{name:14} {result['first_byte_ms']:14.1f} {result['seconds']:8.2f} {result['mb_per_second']:8.1f} "
+                f"{result['traced_peak_mb']:10.1f} {result['archive_mb']:11.1f}"
+            )
+    finally:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
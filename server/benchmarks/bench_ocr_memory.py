@@ -0,0 +1,159 @@
+"""
+OCR memory benchmark
+Decodes and preprocesses documents of increasing size the way the pipeline
+did before (full-resolution imread and a copy per filter) and the way it does
+now (memory-budgeted reduced decoding and in-place, strip-wise filters), and
+reports peak memory of each: numpy allocations traced with tracemalloc, and
+the peak RSS growth (decoder and OpenCV buffers included) of a fresh process
+per run
+
+Without image arguments synthetic documents are generated: an ID card photo
+(12MP JPEG) and A4 pages at 300 and 600 dpi (TIFF and JPEG). Tesseract is not
+run; decoding and the filter chain are where the memory goes.
+
+Usage: python benchmarks/bench_ocr_memory.py [document.tiff ...]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# (name, width, height, extension)
+SYNTHETIC_DOCUMENTS = [
+    ("card photo 12MP", 4000, 3000, ".jpg"),
+    ("A4 300dpi", 2480, 3508, ".tiff"),
+    ("A4 600dpi", 4960, 7016, ".tiff"),
+    ("A4 600dpi", 4960, 7016, ".jpg"),
+]
+
+
+def synthetic_document(path: str, width: int, height: int):
+    """Write a page of text lines at roughly the given resolution."""
+    page = np.full((height, width, 3), 245, dtype=np.uint8)
+    scale = width / 1200
+    for i, y in enumerate(range(int(120 * scale), height - int(60 * scale), int(45 * scale))):
+        cv2.putText(
+            page, f"Line {i}: Student ID CS-21{i:05d} Department of Computer Science",
+            (int(60 * scale), y), cv2.FONT_HERSHEY_SIMPLEX, 0.9 * scale, (25, 25, 25), max(1, int(2 * scale))
+        )
+    cv2.imwrite(path, page, [cv2.IMWRITE_JPEG_QUALITY, 90] if path.endswith(".jpg") else [])
+    del page
+
+
+def baseline_pipeline(path: str) -> tuple:
+    """Decode and filter chain as they were: full resolution, a new buffer per step."""
+    img = cv2.imread(path)
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    denoised = cv2.fastNlMeansDenoising(thresh, None, 10, 7, 21)
+    processed = cv2.dilate(denoised, np.ones((1, 1), np.uint8), iterations=1)
+    return img.shape, processed.shape
+
+
+def bounded_pipeline(path: str) -> tuple:
+    from services.ocr_service import OCRService
+
+    img = OCRService.load_document(path)
+    processed = OCRService.preprocess_image(img)
+    return img.shape, processed.shape
+
+
+def rss_kb(field: str) -> int:
+    """Read VmRSS (current) or VmHWM (peak) of this process in KB."""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1])
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def reset_peak_rss():
+    """Reset VmHWM to the current RSS so import-time peaks do not hide the pipeline's (Linux)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def run_child(mode: str, path: str):
+    """Measure one pipeline run in this (fresh) process and print the result as JSON."""
+    import tracemalloc
+
+    from services.ocr_service import OCRService  # noqa: F401 (imported before measuring in both modes)
+
+    pipeline = baseline_pipeline if mode == "baseline" else bounded_pipeline
+
+    reset_peak_rss()
+    rss_before = rss_kb("VmRSS")
+    tracemalloc.start()
+    started = time.perf_counter()
+    decoded_shape, _ = pipeline(path)
+    elapsed = time.perf_counter() - started
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_peak = rss_kb("VmHWM")
+
+    print(json.dumps({
+        "traced_peak_mb": traced_peak / 1024 / 1024,
+        "rss_peak_mb": (rss_peak - rss_before) / 1024,
+        "seconds": elapsed,
+        "decoded": f"{decoded_shape[1]}x{decoded_shape[0]}",
+    }))
+
+
+def measure(mode: str, path: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", mode, path],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark peak memory of OCR decoding and preprocessing")
+    parser.add_argument("documents", nargs="*", help="Document images")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    work_dir = tempfile.mkdtemp(prefix="bench_ocr_memory_")
+    documents = [(os.path.basename(path), path) for path in args.documents]
+    if not documents:
+        for name, width, height, extension in SYNTHETIC_DOCUMENTS:
+            path = os.path.join(work_dir, f"{name.replace(' ', '_')}{extension}")
+            synthetic_document(path, width, height)
+            documents.append((f"{name} {extension[1:].upper()}", path))
+
+    header = (
+        f"{'document':22} {'pixels':>8} {'mode':9} {'decoded':>11} "
+        f"{'traced MB':>10} {'RSS MB':>8} {'seconds':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+    for name, path in documents:
+        with Image.open(path) as img:
+            megapixels = f"{img.width * img.height / 1e6:.1f}MP"
+        for mode in ("baseline", "bounded"):
+            result = measure(mode, path)
+            print(
+                f"{name:22} {megapixels:>8} {mode:9} {result['decoded']:>11} "
+                f"{result['traced_peak_mb']:10.1f} {result['rss_peak_mb']:8.1f} {result['seconds']:8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
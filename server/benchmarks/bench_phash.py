@@ -0,0 +1,71 @@
+"""
+Near-duplicate lookup benchmark
+Builds the in-memory Hamming index with random 64-bit hashes and measures
+lookup latency for near-duplicate queries and misses at several distances
+
+Usage: python benchmarks/bench_phash.py [--documents 1000000] [--queries 2000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.phash_service import HammingIndex
+
+
+def flip_bits(value: int, count: int, rng: random.Random) -> int:
+    for bit in rng.sample(range(64), count):
+        value ^= 1 << bit
+    return value
+
+
+def percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark perceptual-hash near-duplicate lookups")
+    parser.add_argument("--documents", type=int, default=1000000, help="Hashes in the index")
+    parser.add_argument("--queries", type=int, default=2000, help="Lookups per distance")
+    parser.add_argument("--distances", type=int, nargs="+", default=[4, 6, 8, 10])
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    hashes = [rng.getrandbits(64) for _ in range(args.documents)]
+
+    index = HammingIndex()
+    started = time.perf_counter()
+    for doc_id, value in enumerate(hashes):
+        index.add(doc_id, value)
+    print(f"Indexed {len(index)} hashes in {time.perf_counter() - started:.1f}s")
+    print()
+
+    print(f"{'distance':>8} {'query':>10} {'p50 ms':>8} {'p99 ms':>8} {'found':>7}")
+    for distance in args.distances:
+        for label in ("duplicate", "miss"):
+            timings = []
+            found = 0
+            for _ in range(args.queries):
+                if label == "duplicate":
+                    query = flip_bits(rng.choice(hashes), rng.randint(0, distance), rng)
+                else:
+                    query = rng.getrandbits(64)
+                start = time.perf_counter()
+                matches = index.search(query, distance)
+                timings.append((time.perf_counter() - start) * 1000)
+                found += bool(matches)
+
+            print(
+                f"{distance:8} {label:>10} {statistics.median(timings):8.3f} "
+                f"{percentile(timings, 0.99):8.3f} {found * 100 // args.queries:6}%"
+            )
+
+
+if __name__ == "__main__":
+    main()
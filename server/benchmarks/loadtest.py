@@ -0,0 +1,392 @@
+"""
+End-to-end load test
+Drives a running API (or one it spawns with uvicorn) with concurrent virtual
+users mixing login, search, paginated listing, student detail, stats, export
+and upload requests, then reports per route: requests, error rate,
+throughput and p50/p90/p99/max latency
+
+Seed a realistic dataset first with seed_students.py. Spawned servers use
+loadtest_app.py, which stubs OCR unless --ocr real is given. Save a run with
+--json and pass it to a later run with --compare to print the deltas.
+
+Requires httpx (pip install httpx)
+Usage: python benchmarks/loadtest.py --spawn --users 50 --duration 60 [--json run.json] [--compare baseline.json]
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from config import get_settings
+from seed_students import DEPARTMENTS, FIRST_NAMES, LAST_NAMES
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVER_DIR = os.path.dirname(BENCHMARK_DIR)
+
+DEFAULT_MIX = "search=30,list=30,detail=15,stats=10,login=5,upload=8,export=2"
+ROUTES = ("search", "list", "detail", "stats", "login", "upload", "export")
+
+
+class Recorder:
+    """Latencies and errors per route."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {route: [] for route in ROUTES}
+        self.errors: Dict[str, int] = {route: 0 for route in ROUTES}
+        self.statuses: Dict[str, Dict[str, int]] = {route: {} for route in ROUTES}
+
+    def add(self, route: str, seconds: float, status: str, ok: bool):
+        self.latencies[route].append(seconds)
+        self.statuses[route][status] = self.statuses[route].get(status, 0) + 1
+        if not ok:
+            self.errors[route] += 1
+
+    def report(self, duration: float) -> Dict:
+        routes = {}
+        for route in ROUTES:
+            samples = sorted(self.latencies[route])
+            if not samples:
+                continue
+            routes[route] = {
+                "requests": len(samples),
+                "errors": self.errors[route],
+                "error_rate": self.errors[route] / len(samples),
+                "rps": len(samples) / duration,
+                "p50_ms": percentile(samples, 50) * 1000,
+                "p90_ms": percentile(samples, 90) * 1000,
+                "p99_ms": percentile(samples, 99) * 1000,
+                "max_ms": samples[-1] * 1000,
+                "statuses": self.statuses[route],
+            }
+        total = sum(route["requests"] for route in routes.values())
+        errors = sum(route["errors"] for route in routes.values())
+        return {
+            "duration_seconds": duration,
+            "requests": total,
+            "errors": errors,
+            "error_rate": errors / total if total else 0.0,
+            "rps": total / duration,
+            "routes": routes,
+        }
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of sorted samples."""
+    index = max(0, min(len(samples) - 1, int(round(pct / 100 * len(samples) + 0.5)) - 1))
+    return samples[index]
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        route, _, weight = part.partition("=")
+        route = route.strip()
+        if route not in ROUTES:
+            raise argparse.ArgumentTypeError(f"Unknown route '{route}', expected one of {', '.join(ROUTES)}")
+        mix[route] = int(weight or 1)
+    return mix
+
+
+def make_documents(count: int, seed: int) -> List[bytes]:
+    """Distinct ID-card-sized JPEGs; random noise keeps them apart for near-duplicate detection."""
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    documents = []
+    for index in range(count):
+        image = Image.effect_noise((1012, 638), rng.randint(40, 90)).convert("RGB")
+        draw = ImageDraw.Draw(image)
+        for _ in range(12):
+            x, y = rng.randint(0, 900), rng.randint(0, 560)
+            draw.rectangle((x, y, x + rng.randint(20, 110), y + rng.randint(10, 70)), fill=tuple(rng.randint(0, 255) for _ in range(3)))
+        draw.text((40, 40), f"Load test document {seed}-{index}", fill=(0, 0, 0))
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=85)
+        documents.append(buffer.getvalue())
+    return documents
+
+
+def student_id_prefix(rng: random.Random, total: int, digits: int) -> str:
+    """Leading part of a seeded student ID ("CS-21" + the first digits of the row number)."""
+    _, _, prefix = rng.choice(DEPARTMENTS)
+    number = f"{rng.randint(0, max(total - 1, 0)):07d}"
+    return f"{prefix}-{rng.randint(18, 24)}{number[:digits]}"
+
+
+def search_term(rng: random.Random, total: int) -> str:
+    kind = rng.random()
+    if kind < 0.4:
+        return rng.choice(FIRST_NAMES)
+    if kind < 0.7:
+        return rng.choice(LAST_NAMES)
+    if kind < 0.9:
+        return student_id_prefix(rng, total, 5)
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+class VirtualUser:
+    """One client session: logs in, then issues requests from the route mix until the deadline."""
+
+    def __init__(self, index: int, client: httpx.AsyncClient, args, recorder: Recorder, shared: Dict):
+        self.client = client
+        self.args = args
+        self.recorder = recorder
+        self.shared = shared
+        self.rng = random.Random(args.seed * 1000 + index)
+        self.headers: Dict[str, str] = {}
+
+    async def request(self, route: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=self.headers, **kwargs)
+            if route == "export":
+                await response.aread()
+        except httpx.HTTPError as e:
+            self.recorder.add(route, time.perf_counter() - started, type(e).__name__, False)
+            return None
+        elapsed = time.perf_counter() - started
+        # 404 is an expected answer for a detail lookup of a deleted student or an empty export
+        ok = response.status_code < 400 or (response.status_code == 404 and route in ("detail", "export"))
+        self.recorder.add(route, elapsed, str(response.status_code), ok)
+        return response
+
+    async def login(self):
+        response = await self.request("login", "POST", "/api/auth/login", json={
+            "username": self.args.username,
+            "password": self.args.password,
+        })
+        if response is not None and response.status_code == 200:
+            self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def run(self, mix: Dict[str, int], deadline: float):
+        await self.login()
+        routes, weights = list(mix), list(mix.values())
+        while time.monotonic() < deadline:
+            route = self.rng.choices(routes, weights)[0]
+            await getattr(self, f"do_{route}")()
+            if self.args.think_ms:
+                await asyncio.sleep(self.rng.uniform(0, 2 * self.args.think_ms) / 1000)
+
+    async def do_login(self):
+        await self.login()
+
+    async def do_search(self):
+        await self.request("search", "GET", "/api/students", params={
+            "query": search_term(self.rng, self.shared["total"]),
+            "page": 1 if self.rng.random() < 0.8 else self.rng.randint(2, 5),
+            "page_size": 50,
+        })
+
+    async def do_list(self):
+        # Mostly the first pages, with an occasional deep page
+        total_pages = max(1, self.shared["total"] // 50)
+        page = self.rng.randint(1, min(10, total_pages)) if self.rng.random() < 0.9 else self.rng.randint(1, total_pages)
+        response = await self.request("list", "GET", "/api/students", params={"page": page, "page_size": 50})
+        if response is not None and response.status_code == 200:
+            body = response.json()
+            self.shared["total"] = body["total"]
+            ids = self.shared["ids"]
+            for student in body["students"]:
+                if len(ids) < 10000:
+                    ids.append(student["id"])
+
+    async def do_detail(self):
+        if not self.shared["ids"]:
+            return await self.do_list()
+        await self.request("detail", "GET", f"/api/students/{self.rng.choice(self.shared['ids'])}")
+
+    async def do_stats(self):
+        await self.request("stats", "GET", "/api/stats")
+
+    async def do_export(self):
+        # Narrow filters, like a registrar exporting one intake of one department
+        query = student_id_prefix(self.rng, self.shared["total"], 4)
+        await self.request("export", "GET", "/api/export/excel", params={"query": query})
+
+    async def do_upload(self):
+        documents = self.shared["documents"]
+        index = self.shared["next_document"] % len(documents)
+        self.shared["next_document"] += 1
+        await self.request("upload", "POST", "/api/upload", files={
+            "file": (f"loadtest_{index}.jpg", documents[index], "image/jpeg"),
+        })
+
+
+async def run_load(args, base_url: str) -> Dict:
+    mix = args.mix
+    shared = {
+        "ids": [],
+        "total": 0,
+        "documents": make_documents(args.documents, args.seed) if mix.get("upload") else [],
+        "next_document": 0,
+    }
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    timeout = httpx.Timeout(args.timeout)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        # Learn the table size (and a first set of ids) before the clock starts
+        warmup = VirtualUser(-1, client, args, Recorder(), shared)
+        await warmup.login()
+        await warmup.do_list()
+        if not warmup.headers:
+            raise RuntimeError("Login failed; check --username/--password")
+
+        print(f"Running {args.users} users for {args.duration}s against {base_url} ({shared['total']} students)")
+        started = time.monotonic()
+        deadline = started + args.duration
+        users = [VirtualUser(index, client, args, recorder, shared) for index in range(args.users)]
+        await asyncio.gather(*(user.run(mix, deadline) for user in users))
+        duration = time.monotonic() - started
+
+    report = recorder.report(duration)
+    report["config"] = {
+        "base_url": base_url,
+        "users": args.users,
+        "duration": args.duration,
+        "mix": mix,
+        "ocr": args.ocr if args.spawn else None,
+        "workers": args.workers if args.spawn else None,
+        "students": shared["total"],
+    }
+    return report
+
+
+def print_report(report: Dict, baseline: Optional[Dict] = None):
+    header = f"{'route':<8} {'requests':>9} {'err %':>7} {'req/s':>8} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}"
+    if baseline:
+        header += f"  {'Δ p50':>8} {'Δ p99':>8} {'Δ req/s':>8}"
+    print()
+    print(header)
+    print("-" * len(header))
+
+    def delta(current: float, previous: Optional[float]) -> str:
+        if not previous:
+            return f"{'-':>8}"
+        return f"{(current - previous) / previous * 100:>+7.0f}%"
+
+    for route, stats in report["routes"].items():
+        line = (
+            f"{route:<8} {stats['requests']:>9} {stats['error_rate'] * 100:>7.2f} {stats['rps']:>8.1f} "
+            f"{stats['p50_ms']:>9.1f} {stats['p90_ms']:>9.1f} {stats['p99_ms']:>9.1f} {stats['max_ms']:>9.1f}"
+        )
+        if baseline:
+            previous = baseline["routes"].get(route, {})
+            line += (
+                f"  {delta(stats['p50_ms'], previous.get('p50_ms'))} {delta(stats['p99_ms'], previous.get('p99_ms'))}"
+                f" {delta(stats['rps'], previous.get('rps'))}"
+            )
+        print(line)
+
+    print("-" * len(header))
+    print(
+        f"{'total':<8} {report['requests']:>9} {report['error_rate'] * 100:>7.2f} {report['rps']:>8.1f}"
+        + (f"  {'':>38}  {'':>8} {'':>8} {delta(report['rps'], baseline.get('rps'))}" if baseline else "")
+    )
+    for route, stats in report["routes"].items():
+        failures = {status: count for status, count in stats["statuses"].items() if not status.startswith(("2", "3"))}
+        if failures:
+            print(f"  {route} failures: {failures}")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def spawn_server(args) -> Tuple[subprocess.Popen, str]:
+    port = free_port()
+    env = dict(os.environ, LOADTEST_OCR=args.ocr, LOADTEST_OCR_DELAY_MS=str(args.ocr_delay_ms))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [SERVER_DIR, env.get("PYTHONPATH")]))
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "loadtest_app:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(args.workers), "--log-level", "warning", "--no-access-log",
+        ],
+        cwd=BENCHMARK_DIR,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    process.terminate()
+    raise RuntimeError("Server did not become healthy within 120s")
+
+
+def main():
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="End-to-end API load test")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="API to test (ignored with --spawn)")
+    parser.add_argument("--spawn", action="store_true", help="Start the API with uvicorn for the duration of the run")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers of a spawned server")
+    parser.add_argument("--ocr", choices=["stub", "real"], default="stub", help="OCR of a spawned server")
+    parser.add_argument("--ocr-delay-ms", type=int, default=0, help="Simulated OCR time per document with --ocr stub")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run")
+    parser.add_argument("--think-ms", type=float, default=0, help="Mean pause between a user's requests")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"Route weights (default {DEFAULT_MIX})")
+    parser.add_argument("--documents", type=int, default=200, help="Distinct upload documents to generate")
+    parser.add_argument("--timeout", type=float, default=60, help="Per-request timeout in seconds")
+    parser.add_argument("--username", default=settings.admin_username)
+    parser.add_argument("--password", default=settings.admin_password)
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--json", dest="json_path", help="Write the report to this file")
+    parser.add_argument("--compare", help="Report deltas against an earlier --json report")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    print("=" * 60)
+    print("API Load Test")
+    print("=" * 60)
+
+    process = None
+    base_url = args.base_url
+    try:
+        if args.spawn:
+            process, base_url = spawn_server(args)
+            print(f"✓ Started {args.workers} uvicorn worker(s) with {args.ocr} OCR on {base_url}")
+        report = asyncio.run(run_load(args, base_url))
+    except RuntimeError as e:
+        print(f"❌ {str(e)}")
+        sys.exit(1)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    print_report(report, baseline)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Report written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
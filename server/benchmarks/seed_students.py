@@ -0,0 +1,134 @@
+"""
+Synthetic dataset seeder for load tests
+Bulk-inserts realistic student rows (names, NED departments and programs,
+student IDs, contact details, OCR text, storage keys, two years of
+created_at) into the configured database
+
+Statistics rollups are rebuilt at the end. Restart the API afterwards:
+statistics counters and response caches of a running server do not see rows
+inserted behind its back.
+
+Usage: python benchmarks/seed_students.py --rows 100000 [--batch 10000] [--truncate]
+"""
+import argparse
+import hashlib
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, insert
+
+from database import Base, SessionLocal, engine
+from models import Student
+from services.rollup_service import RollupService
+from text_codec import compress_text
+
+FIRST_NAMES = [
+    "Ayesha", "Muhammad", "Fatima", "Ali", "Zainab", "Hassan", "Maryam", "Usman", "Hira", "Bilal",
+    "Sana", "Hamza", "Mahnoor", "Ahmed", "Areeba", "Saad", "Iqra", "Fahad", "Noor", "Taha",
+]
+LAST_NAMES = [
+    "Khan", "Ahmed", "Siddiqui", "Qureshi", "Shaikh", "Malik", "Hussain", "Raza", "Farooqui", "Baig",
+    "Ansari", "Memon", "Javed", "Iqbal", "Mirza", "Abbasi", "Zaidi", "Rizvi", "Chaudhry", "Naqvi",
+]
+# (department, program, student ID prefix)
+DEPARTMENTS = [
+    ("Computer Science", "BS Computer Science", "CS"),
+    ("Computer Science", "BS Software Engineering", "SE"),
+    ("Electrical Engineering", "BE Electrical Engineering", "EE"),
+    ("Mechanical Engineering", "BE Mechanical Engineering", "ME"),
+    ("Civil Engineering", "BE Civil Engineering", "CE"),
+    ("Chemical Engineering", "BE Chemical Engineering", "CH"),
+    ("Electronic Engineering", "BE Electronic Engineering", "EL"),
+    ("Industrial Engineering", "BE Industrial Engineering", "IM"),
+    ("Textile Engineering", "BE Textile Engineering", "TE"),
+    ("Architecture", "B.Arch Architecture", "AR"),
+]
+YEARS = ["1st Year", "2nd Year", "3rd Year", "4th Year"]
+
+
+def make_row(index: int, rng: random.Random, now: datetime, span_days: int) -> dict:
+    department, program, prefix = rng.choice(DEPARTMENTS)
+    full_name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    intake = rng.randint(18, 24)
+    student_id = f"{prefix}-{intake}{index:07d}"
+    # A few percent of rows are OCR placeholders, as in production
+    if rng.random() < 0.03:
+        student_id, full_name = f"UNKNOWN_{index:09d}", "Unknown Student"
+
+    created_at = now - timedelta(seconds=rng.randint(0, span_days * 86400))
+    digest = hashlib.sha256(f"document-{index}".encode()).hexdigest()
+    photo_digest = hashlib.sha256(f"photo-{index}".encode()).hexdigest()
+    email = f"{full_name.split()[0].lower()}.{index}@cloud.neduet.edu.pk"
+    phone = f"03{rng.randint(0, 49):02d}-{rng.randint(1000000, 9999999)}"
+
+    return {
+        "student_id": student_id,
+        "full_name": full_name,
+        "email": email,
+        "phone": phone,
+        "department": department,
+        "program": program,
+        "year_of_study": rng.choice(YEARS),
+        "document_type": "ID Card",
+        "extracted_text_compressed": compress_text(
+            f"NED University of Engineering & Technology\nStudent ID: {student_id}\n"
+            f"Name: {full_name}\nDepartment: {department}\nProgram: {program}\n"
+            f"Email: {email}\nPhone: {phone}"
+        ),
+        "original_image_path": f"{digest}.jpg",
+        "photo_path": f"{photo_digest}.jpg" if rng.random() < 0.8 else None,
+        "created_at": created_at,
+        "updated_at": created_at,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed the students table with synthetic rows")
+    parser.add_argument("--rows", type=int, default=10000, help="Rows to insert (10k - 1M)")
+    parser.add_argument("--batch", type=int, default=10000, help="Rows per INSERT batch")
+    parser.add_argument("--truncate", action="store_true", help="Delete existing students first")
+    parser.add_argument("--span-days", type=int, default=730, help="Spread created_at over this many days")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(args.seed)
+    now = datetime.now(timezone.utc)
+
+    db = SessionLocal()
+    try:
+        if args.truncate:
+            db.execute(delete(Student))
+            db.commit()
+            start_index = 0
+        else:
+            # Continue numbering after earlier seeds so student IDs stay unique
+            start_index = (db.query(Student.id).order_by(Student.id.desc()).limit(1).scalar() or 0) + 1
+
+        started = time.perf_counter()
+        inserted = 0
+        while inserted < args.rows:
+            count = min(args.batch, args.rows - inserted)
+            rows = [make_row(start_index + inserted + i, rng, now, args.span_days) for i in range(count)]
+            # executemany: batched multi-row INSERTs ("insertmanyvalues") on PostgreSQL
+            db.execute(insert(Student), rows)
+            db.commit()
+            inserted += count
+            rate = inserted / (time.perf_counter() - started)
+            print(f"\r  {inserted}/{args.rows} rows ({rate:,.0f} rows/s)", end="", flush=True)
+
+        # Bulk inserts bypass the per-write rollup maintenance
+        RollupService.rebuild(db)
+    finally:
+        db.close()
+
+    print(f"\n✓ Seeded {inserted} students in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Startup time measurement
+Reports how long `import main` takes broken down by import, and how long the
+background warm-up (database init, OCR import and model loading) takes before
+/ready turns green
+
+Usage: python benchmarks/startup_time.py [--top 15]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WARM_UP_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+main.warm_up()
+warmed = time.perf_counter()
+print(json.dumps({
+    "import_main": imported - start,
+    "warm_up": warmed - imported,
+    "ocr": main.OCRLoader.timings,
+    "ocr_status": main.OCRLoader.status(),
+}))
+"""
+
+
+def parse_importtime(stderr: str):
+    """
+    Parse `python -X importtime` output.
+
+    Returns:
+        (direct imports of main with cumulative seconds, self seconds per top-level package)
+    """
+    direct = []
+    per_package = defaultdict(float)
+
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, self_us, cumulative_us, name = (part for part in line.replace("import time:", "|", 1).split("|"))
+        depth = (len(name) - len(name.lstrip())) // 2
+        module = name.strip()
+        per_package[module.split(".")[0]] += int(self_us) / 1e6
+        if depth == 1:
+            direct.append((module, int(cumulative_us) / 1e6))
+
+    return direct, per_package
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API cold start time")
+    parser.add_argument("--top", type=int, default=15, help="Rows to show per table")
+    args = parser.parse_args()
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=SERVER_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        print(result.stderr)
+        sys.exit(1)
+
+    direct, per_package = parse_importtime(result.stderr)
+
+    print("Direct imports of main (cumulative)")
+    for module, seconds in sorted(direct, key=lambda item: -item[1])[:args.top]:
+        print(f"  {module:40} {seconds * 1000:9.1f} ms")
+
+    print("\nSelf time by top-level package")
+    for package, seconds in sorted(per_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {package:40} {seconds * 1000:9.1f} ms")
+
+    result = subprocess.run(
+        [sys.executable, "-c", WARM_UP_SCRIPT],
+        cwd=SERVER_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        print(result.stderr)
+        sys.exit(1)
+
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    print("\nStartup phases")
+    print(f"  {'import main (until /health answers)':40} {timings['import_main'] * 1000:9.1f} ms")
+    print(f"  {'background warm-up (until /ready)':40} {timings['warm_up'] * 1000:9.1f} ms")
+    for name, seconds in timings["ocr"].items():
+        print(f"    {'ocr ' + name:38} {seconds * 1000:9.1f} ms")
+    print(f"  OCR status: {timings['ocr_status']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -23,14 +23,99 @@ class Settings(BaseSettings):
     jwt_secret_key: str = "your-secret-key-change-this-in-production"
     jwt_algorithm: str = "HS256"
     access_token_expire_minutes: int = 480
+    token_cache_size: int = 1024  # verified tokens kept in memory, 0 disables
     
     # File Storage
     upload_dir: str = "./uploads"
     max_file_size: int = 10485760  # 10MB
     
+    # Object storage ("local" or "s3"); local defaults to <upload_dir>/objects
+    storage_backend: str = "local"
+    storage_local_dir: str = ""
+    s3_bucket: str = ""
+    s3_prefix: str = ""
+    s3_endpoint_url: str = ""  # e.g. http://localhost:9000 for MinIO
+    s3_region: str = ""
+    s3_access_key: str = ""
+    s3_secret_key: str = ""
+    
+    # Lossless re-encoding of uploaded originals ("off", "png" or "webp")
+    original_reencode: str = "off"
+    original_reencode_extensions: str = ".bmp,.tif,.tiff"
+    
+    # Export cache (defaults to <upload_dir>/.exports)
+    export_cache_dir: str = ""
+    export_cache_max_bytes: int = 524288000  # 500MB
+    export_cache_max_age_seconds: int = 86400  # 1 day
+    
+    # Document archive export (/api/export/archive)
+    archive_read_ahead: int = 4  # files fetched from storage in parallel ahead of the one being written
+    archive_buffer_chunks: int = 4  # 1MB chunks buffered per file being fetched
+    
+    # Statistics ("query" = cached aggregate query, "counters" = incremental counters)
+    stats_backend: str = "query"
+    stats_cache_ttl_seconds: int = 30
+    stats_counter_resync_seconds: int = 3600
+    stats_timeseries_max_days: int = 1096  # longest range /api/stats/timeseries answers
+    
+    # Response cache for the student routes ("memory", "redis" or "off")
+    response_cache_backend: str = "memory"
+    response_cache_url: str = ""  # e.g. redis://localhost:6379/0
+    response_cache_max_entries: int = 2048
+    response_cache_ttl_seconds: int = 300
+    
     # CORS
     allowed_origins: str = "http://localhost:3000,http://localhost:3001,https://document-reader-chi.vercel.app"
     
+    # OCR processing ("inline" = in the API process, "queue" = via worker.py)
+    ocr_mode: str = "inline"
+    worker_poll_seconds: float = 2.0
+    worker_heartbeat_seconds: int = 15
+    worker_stale_seconds: int = 120  # running jobs without a heartbeat this long are reclaimed
+    worker_max_attempts: int = 3
+    job_events_poll_seconds: float = 0.5  # how often /api/jobs/{id}/events checks a job's stage
+    
+    # Orphaned upload sweeper
+    sweeper_enabled: bool = True
+    sweeper_interval_seconds: int = 3600
+    sweeper_grace_seconds: int = 21600  # only files older than this are removed
+    sweeper_ops_per_second: float = 100  # file checks/deletes per second
+    
+    # Resumable uploads (partial files under <upload_dir>/.partial)
+    resumable_upload_max_bytes: int = 104857600  # 100MB
+    resumable_chunk_bytes: int = 4194304  # chunk size suggested to clients
+    resumable_chunk_max_bytes: int = 16777216  # larger chunks are rejected with 413
+    resumable_upload_expiry_seconds: int = 86400  # uploads without a chunk this long are removed
+    
+    # Near-duplicate detection ("off", "flag" = report the match, "skip" = return the match without OCR)
+    phash_duplicate_action: str = "flag"
+    phash_max_distance: int = 6  # differing bits out of 64
+    phash_sync_seconds: int = 5  # how often to pick up fingerprints written by other processes
+    phash_sync_overlap_rows: int = 1000  # ids below the last one seen that are re-read (late commits)
+    phash_full_sync_seconds: int = 600  # how often every fingerprint is re-read, 0 = never
+    
+    # Crop photos to the detected ID card before OCR
+    card_detection: bool = True
+    card_min_area_ratio: float = 0.2  # smallest card outline, as a fraction of the frame
+    
+    # OCR decoding limits per document
+    ocr_max_pixels: int = 150000000  # larger images are rejected before decoding
+    ocr_max_side: int = 3508  # long side documents are decoded or scaled down to (A4 at 300 dpi)
+    ocr_memory_budget_mb: int = 192  # working memory for one decoded document
+    
+    # OCR admission control per API process (lanes: interactive > batch > background)
+    ocr_max_in_flight: int = 0  # documents OCR'd at once, 0 = CPU count
+    ocr_threads_per_document: int = 0  # tesseract/OpenCV threads, 0 = CPU count / in-flight documents
+    ocr_max_queued: int = 8  # interactive uploads waiting before 429
+    ocr_max_queued_batch: int = 32  # batch uploads waiting before 429
+    ocr_queue_timeout_seconds: float = 60  # longest wait for a slot before 429 (uploads only)
+    
+    # SQL instrumentation
+    sql_echo: bool = False  # log every statement (SQLAlchemy echo)
+    sql_slow_query_ms: int = 200  # log statements slower than this, 0 disables
+    sql_query_count_warning: int = 25  # warn when a request runs more queries, 0 disables
+    server_timing: bool = True  # Server-Timing header with db, ocr and serialization time
+    
     # Tesseract
     tesseract_cmd: str = "/usr/bin/tesseract"
     
@@ -11,7 +11,7 @@ engine = create_engine(
     settings.database_url,
     pool_pre_ping=True,
     pool_recycle=300,
-    echo=settings.debug
+    echo=settings.sql_echo
 )
 
 # Create SessionLocal class
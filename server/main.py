@@ -1,46 +1,89 @@
-from fastapi import FastAPI, File, UploadFile, Depends, HTTPException, Query
+from fastapi import FastAPI, File, UploadFile, Depends, Header, HTTPException, Query, Request, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.security import HTTPAuthorizationCredentials
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from typing import List, Optional
+from typing import Callable, List, Optional
+import asyncio
+import json
 import os
 import shutil
-from datetime import datetime, timedelta
+import threading
+import time
+from datetime import date, datetime, timedelta
 
 from config import get_settings
-from database import get_db, init_db, engine, Base
-from models import Student
+from database import get_db, init_db, engine, Base, SessionLocal
+from models import Student, OCRJob
+from text_codec import decompress_text
 from schemas import (
     StudentCreate,
     StudentUpdate,
     StudentResponse,
     StudentSearchResponse,
     UploadResponse,
-    OCRResult
+    DuplicateMatch,
+    OCRResult,
+    JobResponse,
+    ReextractRequest,
+    BulkStudentRequest,
+    BulkStudentResponse,
+    ResumableUploadCreate,
+    ResumableUploadStatus
 )
 from schemas_auth import LoginRequest, TokenResponse, UserResponse
-from auth import authenticate_admin, create_access_token, require_admin, get_current_user
-
-# Try to import OCR service, but allow server to run without it
-try:
-    from services.ocr_service import OCRService
-    OCR_AVAILABLE = True
-except ImportError as e:
-    print(f"Warning: OCR service not available: {e}")
-    OCR_AVAILABLE = False
-    OCRService = None
+from auth import authenticate_admin, create_access_token, require_admin, get_current_user, revoke_token, security
 
+# The OCR stack (cv2, numpy, PIL, pytesseract) is imported lazily, see OCRLoader
+from services.ocr_loader import OCRLoader
 from services.excel_service import ExcelService
+from services.archive_service import ArchiveService
+from services.export_cache import ExportCache
+from services.stats_service import StatsService
+from services.rollup_service import RollupService, INTERVALS, GROUP_BY
+from services.file_service import FileService
+from services.derivative_service import DerivativeService
+from services.document_encoder import DocumentEncoder
+from services.storage import get_storage, is_storage_key
+from services.ingest_service import IngestService
+from services.phash_service import PHashService
+from services.job_queue import JobQueue
+from services.reextract_service import ReextractService
+from services.bulk_service import BulkService
+from services.upload_sweeper import UploadSweeper
+from services.response_cache import get_response_cache
+from services.request_metrics import RequestMetrics
+from services.conditional_get import ConditionalGet
+from services.ocr_scheduler import OCRBusy, get_ocr_scheduler
+from services.resumable_upload import UploadNotFound, UploadOffsetMismatch, get_resumable_uploads
+from services.progress_stream import ProgressStream, KEEPALIVE_SECONDS, SSE_HEADERS, format_event
 
 # Get settings
 settings = get_settings()
 
+# Count queries and database time per request, log slow queries
+RequestMetrics.install(engine)
+
+
+class TimedORJSONResponse(ORJSONResponse):
+    """ORJSONResponse that reports its rendering time as serialization time."""
+    
+    def render(self, content) -> bytes:
+        with RequestMetrics.timed("ser"):
+            return super().render(content)
+
+
 # Create FastAPI app
+# orjson serializes the plain-dict responses (stats, jobs, health) much faster than json
 app = FastAPI(
     title=settings.app_name,
     version=settings.app_version,
-    debug=settings.debug
+    debug=settings.debug,
+    default_response_class=TimedORJSONResponse
 )
 
 # CORS middleware
@@ -50,20 +93,130 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After", "ETag", "Upload-Offset"],
 )
 
+@app.middleware("http")
+async def request_metrics_middleware(request: Request, call_next):
+    """Collect per-request database/OCR/serialization time and report it in Server-Timing."""
+    token = RequestMetrics.start(request.method, request.url.path)
+    try:
+        response = await call_next(request)
+    finally:
+        metrics = RequestMetrics.finish(token)
+    if settings.server_timing:
+        response.headers["Server-Timing"] = RequestMetrics.server_timing(metrics)
+    return response
+
+
 # Create upload directory
 os.makedirs(settings.upload_dir, exist_ok=True)
 
+# Cache for generated export files
+export_cache = ExportCache(
+    cache_dir=settings.export_cache_dir or os.path.join(settings.upload_dir, ".exports"),
+    max_bytes=settings.export_cache_max_bytes,
+    max_age_seconds=settings.export_cache_max_age_seconds
+)
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database on startup."""
+# Removes files left behind by failed uploads and deleted students
+sweeper = UploadSweeper(
+    session_factory=SessionLocal,
+    upload_dir=settings.upload_dir,
+    storage=get_storage(),
+    grace_seconds=settings.sweeper_grace_seconds,
+    ops_per_second=settings.sweeper_ops_per_second,
+    export_cache=export_cache,
+    skip_dirs=[export_cache.cache_dir, getattr(get_storage(), "root", "")],
+    resumable_uploads=get_resumable_uploads()
+)
+
+EXCEL_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+ALLOWED_UPLOAD_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.pdf', '.tiff', '.bmp'}
+
+
+def json_response(body: bytes, status_code: int = 200, headers: Optional[dict] = None) -> Response:
+    """Send pre-serialized JSON (e.g. from the response cache)."""
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
+
+
+def model_response(model: BaseModel, status_code: int = 200, headers: Optional[dict] = None) -> Response:
+    """
+    Serialize an already validated response model in one pass.
+    Returning a Response skips FastAPI's response_model re-validation and
+    jsonable_encoder; response_model is still declared for the OpenAPI schema.
+    """
+    with RequestMetrics.timed("ser"):
+        body = model.model_dump_json().encode("utf-8")
+    return json_response(body, status_code, headers)
+
+
+# Columns StudentResponse is built from; extracted_text is decompressed in student_row
+STUDENT_RESPONSE_COLUMNS = [
+    getattr(Student, name) for name in StudentResponse.model_fields if name != 'extracted_text'
+] + [Student.extracted_text_compressed, Student.extracted_text_plain]
+
+
+def student_row(row) -> dict:
+    """StudentResponse fields of a STUDENT_RESPONSE_COLUMNS row."""
+    values = row._asdict()
+    values['extracted_text'] = decompress_text(
+        values.pop('extracted_text_compressed'), values.pop('extracted_text_plain')
+    )
+    return values
+
+
+def apply_search_filter(base_query, query: Optional[str]):
+    """Filter a Student query by student ID or name."""
+    if query:
+        search_filter = f"%{query}%"
+        base_query = base_query.filter(
+            (Student.student_id.ilike(search_filter)) |
+            (Student.full_name.ilike(search_filter))
+        )
+    return base_query
+
+
+
+# Readiness of the background startup work, reported by /ready
+readiness = {"database": False, "database_error": None}
+
+
+def warm_up():
+    """Initialize the database and preload the OCR stack off the startup path."""
     try:
         Base.metadata.create_all(bind=engine)
+        readiness["database"] = True
         print("Database initialized successfully")
     except Exception as e:
+        readiness["database_error"] = str(e)
         print(f"Error initializing database: {str(e)}")
+    
+    OCRLoader.warm_up()
+    
+    if readiness["database"] and settings.phash_duplicate_action != "off":
+        db = SessionLocal()
+        try:
+            PHashService.sync(db, force=True)
+        except Exception as e:
+            print(f"Error loading document fingerprints: {str(e)}")
+        finally:
+            db.close()
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Start background warm-up so the server can answer /health immediately."""
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    if settings.sweeper_enabled:
+        sweeper.start(settings.sweeper_interval_seconds)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the background sweeper between files."""
+    sweeper.stop()
 
 
 @app.get("/")
@@ -82,6 +235,25 @@ async def health_check():
     return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
 
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness endpoint.
+    Returns 503 until the database is initialized and the OCR stack is warmed up.
+    """
+    ocr_status = OCRLoader.status()
+    ready = readiness["database"] and ocr_status != "loading"
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "starting",
+            "database": "ready" if readiness["database"] else (readiness["database_error"] or "loading"),
+            "ocr": ocr_status,
+            "ocr_timings": OCRLoader.timings,
+        }
+    )
+
+
 @app.post("/api/auth/login", response_model=TokenResponse)
 async def login(login_data: LoginRequest):
     """
@@ -109,6 +281,13 @@ async def login(login_data: LoginRequest):
     )
 
 
+@app.post("/api/auth/logout")
+async def logout(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Revoke the current token."""
+    revoke_token(credentials.credentials)
+    return {"message": "Logged out successfully"}
+
+
 @app.get("/api/auth/me", response_model=UserResponse)
 async def get_current_user_info(current_user: dict = Depends(get_current_user)):
     """Get current authenticated user information."""
@@ -118,120 +297,335 @@ async def get_current_user_info(current_user: dict = Depends(get_current_user)):
     )
 
 
+def upload_extension(filename: str) -> str:
+    """Lower-cased extension of an uploaded file name; 400 for types OCR cannot read."""
+    file_ext = os.path.splitext(filename)[1].lower()
+    if file_ext not in ALLOWED_UPLOAD_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid file type. Allowed types: {', '.join(ALLOWED_UPLOAD_EXTENSIONS)}"
+        )
+    return file_ext
+
+
+def temp_upload_path(filename: str) -> str:
+    """Where an upload is written before OCR (swept if it is left behind)."""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(settings.upload_dir, f"temp_{timestamp}_{filename}")
+
+
+def ocr_busy_error(e: OCRBusy) -> HTTPException:
+    """429 for a full OCR queue, telling the client when to retry."""
+    return HTTPException(
+        status_code=429,
+        detail=f"Too many documents are being processed, please retry in {e.retry_after} seconds",
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+
+def process_upload(
+    db: Session,
+    temp_path: str,
+    file_ext: str,
+    background_tasks: BackgroundTasks,
+    progress: Optional[ProgressStream] = None,
+    lane: str = "interactive",
+    on_busy: Optional[Callable[[str], None]] = None
+) -> UploadResponse:
+    """
+    Fingerprint, OCR and save a document written to temp_path.
+    Blocking; runs in a worker thread so OCR never stalls the event loop.
+    OCR waits for a slot in the given scheduler lane. If none frees up in time
+    the document is handed to on_busy (removed by default) and 429 is raised.
+    Each finished stage is reported to progress, if given.
+    """
+    report = progress.emit if progress else (lambda stage, **data: None)
+    
+    # Near-duplicates of a stored document are flagged, or answered without OCR
+    phash, duplicate = IngestService.check_duplicate(db, temp_path)
+    duplicate_of = DuplicateMatch(student_id=duplicate[0].id, distance=duplicate[1]) if duplicate else None
+    report("fingerprinted", duplicate_of=duplicate_of.model_dump() if duplicate_of else None)
+    
+    if duplicate and settings.phash_duplicate_action == "skip":
+        os.remove(temp_path)
+        return UploadResponse(
+            success=True,
+            message=f"Near-duplicate of an existing document for {duplicate[0].student_id}; OCR skipped",
+            student=StudentResponse.model_validate(duplicate[0]),
+            duplicate_of=duplicate_of
+        )
+    
+    # Process document with OCR
+    OCRService = OCRLoader.get()
+    if OCRService is None:
+        raise HTTPException(
+            status_code=503,
+            detail="OCR service is not available. Please install required dependencies (opencv-python-headless, pytesseract)"
+        )
+    
+    try:
+        with get_ocr_scheduler().slot(lane):
+            report("admitted")
+            with RequestMetrics.timed("ocr"):
+                ocr_result = OCRService.process_document(temp_path, settings.upload_dir, progress=report)
+    except OCRBusy as e:
+        (on_busy or os.remove)(temp_path)
+        raise ocr_busy_error(e)
+    
+    if not ocr_result['success']:
+        raise HTTPException(
+            status_code=500,
+            detail=f"OCR processing failed: {ocr_result.get('error', 'Unknown error')}"
+        )
+    
+    # Store uncompressed scans losslessly re-encoded (ORIGINAL_REENCODE)
+    encoded = DocumentEncoder.reencode(temp_path, file_ext, settings.upload_dir)
+    if encoded:
+        os.remove(temp_path)
+        temp_path, file_ext = encoded
+    
+    # Move the document into content-addressed storage and save the student
+    original_key = get_storage().put_file(temp_path, file_ext, move=True)
+    student, message = IngestService.save_result(db, ocr_result, original_key, phash=phash)
+    report("committed", student_id=student.id)
+    
+    background_tasks.add_task(DerivativeService.generate_all, [original_key, student.photo_path])
+    
+    return UploadResponse(
+        success=True,
+        message=message,
+        student=StudentResponse.model_validate(student),
+        ocr_result=OCRResult(**ocr_result),
+        duplicate_of=duplicate_of
+    )
+
+
+def stream_upload(
+    temp_path: str,
+    file_ext: str,
+    background_tasks: BackgroundTasks,
+    lane: str,
+    on_busy: Optional[Callable[[str], None]] = None
+) -> StreamingResponse:
+    """Process an upload while streaming its stage events, ending with the UploadResponse."""
+    progress = ProgressStream()
+    progress.emit("received")
+    
+    def run():
+        # Dependency sessions are closed before a streamed body is sent, so use our own
+        db = SessionLocal()
+        try:
+            result = process_upload(db, temp_path, file_ext, background_tasks, progress, lane, on_busy)
+            progress.result(result.model_dump_json())
+        except HTTPException as e:
+            retry_after = (e.headers or {}).get("Retry-After")
+            progress.error(e.status_code, e.detail, **({"retry_after": int(retry_after)} if retry_after else {}))
+        except Exception as e:
+            progress.error(500, f"Error processing upload: {str(e)}")
+        finally:
+            db.close()
+            progress.close()
+    
+    async def events():
+        task = asyncio.ensure_future(run_in_threadpool(run))
+        async for chunk in progress.events():
+            yield chunk
+        await task
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @app.post("/api/upload", response_model=UploadResponse)
 async def upload_document(
+    background_tasks: BackgroundTasks,
+    response: Response,
     file: UploadFile = File(...),
+    progress: bool = Query(False, description="Stream stage events as Server-Sent Events"),
+    priority: str = Query("interactive", pattern="^(interactive|batch)$", description="OCR scheduling lane"),
     db: Session = Depends(get_db),
     current_user: dict = Depends(require_admin)
 ):
     """
     Upload and process a student document.
     Extracts text and photo using OCR, stores data in database.
+    Thumbnails and previews are generated in the background afterwards.
+    With OCR_MODE=queue the document is queued for an OCR worker and 202 is returned.
+    With progress=true the response is a text/event-stream of stage events
+    (received, decoded, ..., committed) ending with a "result" event carrying
+    the UploadResponse, or an "error" event.
+    Inline OCR is admission controlled: when the lane's queue is full the
+    upload is rejected with 429 and Retry-After. Bulk uploads should pass
+    priority=batch so single uploads from the UI go first.
     """
     try:
-        # Validate file type
-        allowed_extensions = {'.jpg', '.jpeg', '.png', '.pdf', '.tiff', '.bmp'}
-        file_ext = os.path.splitext(file.filename)[1].lower()
+        file_ext = upload_extension(file.filename)
         
-        if file_ext not in allowed_extensions:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid file type. Allowed types: {', '.join(allowed_extensions)}"
-            )
+        if settings.ocr_mode == "queue":
+            # Stream the upload into shared storage and let a worker pick it up
+            file_key = get_storage().put(file.file, file_ext)
+            return queued_response(db, response, file_key, file.filename)
         
-        # Create temporary file
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        temp_filename = f"temp_{timestamp}_{file.filename}"
-        temp_path = os.path.join(settings.upload_dir, temp_filename)
+        # Reject before storing anything if OCR is already saturated
+        try:
+            get_ocr_scheduler().check(priority)
+        except OCRBusy as e:
+            raise ocr_busy_error(e)
         
         # Save uploaded file
+        temp_path = temp_upload_path(file.filename)
         with open(temp_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
         
-        # Process document with OCR
-        if not OCR_AVAILABLE:
-            raise HTTPException(
-                status_code=503,
-                detail="OCR service is not available. Please install required dependencies (opencv-python-headless, pytesseract)"
-            )
-        
-        ocr_result = OCRService.process_document(temp_path, settings.upload_dir)
-        
-        if not ocr_result['success']:
-            raise HTTPException(
-                status_code=500,
-                detail=f"OCR processing failed: {ocr_result.get('error', 'Unknown error')}"
-            )
-        
-        # Extract student data
-        student_data = ocr_result.get('student_data', {})
+        if progress:
+            return stream_upload(temp_path, file_ext, background_tasks, priority)
         
-        # Validate required fields
-        if not student_data.get('student_id') or not student_data.get('full_name'):
-            # If OCR couldn't extract required fields, generate placeholder
-            student_data['student_id'] = student_data.get('student_id') or f"UNKNOWN_{timestamp}"
-            student_data['full_name'] = student_data.get('full_name') or "Unknown Student"
+        return await run_in_threadpool(process_upload, db, temp_path, file_ext, background_tasks, None, priority)
         
-        # Create organized file structure
-        student_dir = os.path.join(settings.upload_dir, student_data['student_id'])
-        os.makedirs(student_dir, exist_ok=True)
-        
-        # Move files to student directory
-        final_image_path = os.path.join(student_dir, f"document_{timestamp}{file_ext}")
-        shutil.move(temp_path, final_image_path)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing upload: {str(e)}")
+
+
+def queued_response(db: Session, response: Response, file_key: str, filename: str) -> UploadResponse:
+    """Queue a stored document for an OCR worker (OCR_MODE=queue) and answer 202."""
+    job = JobQueue.enqueue(db, file_key, filename)
+    response.status_code = 202
+    return UploadResponse(
+        success=True,
+        message="Document queued for processing",
+        job_id=job.id
+    )
+
+
+def resumable_upload_error(e: Exception) -> HTTPException:
+    """Map resumable upload errors to responses; 409 tells the client the offset to resume from."""
+    if isinstance(e, UploadNotFound):
+        return HTTPException(status_code=404, detail="Upload not found or expired")
+    if isinstance(e, UploadOffsetMismatch):
+        return HTTPException(status_code=409, detail=str(e), headers={"Upload-Offset": str(e.offset)})
+    return HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/uploads", response_model=ResumableUploadStatus, status_code=201)
+async def create_resumable_upload(
+    upload: ResumableUploadCreate,
+    current_user: dict = Depends(require_admin)
+):
+    """
+    Start a resumable upload of a large document.
+    Send the file in chunks with PUT /api/uploads/{upload_id}, then
+    POST /api/uploads/{upload_id}/finalize to process it as /api/upload would.
+    Uploads without a chunk for RESUMABLE_UPLOAD_EXPIRY_SECONDS are discarded.
+    """
+    filename = os.path.basename(upload.filename)
+    file_ext = upload_extension(filename)
+    try:
+        return await run_in_threadpool(get_resumable_uploads().create, filename, file_ext, upload.size, upload.sha256)
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
+@app.get("/api/uploads/{upload_id}", response_model=ResumableUploadStatus)
+async def get_resumable_upload(upload_id: str, current_user: dict = Depends(require_admin)):
+    """State of a resumable upload; offset is where the next chunk starts."""
+    try:
+        return get_resumable_uploads().status(upload_id)
+    except UploadNotFound as e:
+        raise resumable_upload_error(e)
+
+
+@app.put("/api/uploads/{upload_id}", response_model=ResumableUploadStatus)
+async def put_resumable_upload_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0, description="Byte offset the chunk starts at"),
+    chunk_sha256: str = Header(..., alias="X-Chunk-SHA256", pattern="^[0-9a-fA-F]{64}$"),
+    current_user: dict = Depends(require_admin)
+):
+    """
+    Append one chunk (the raw request body) to a resumable upload.
+    The chunk is only stored if its SHA-256 matches X-Chunk-SHA256 (else 400)
+    and offset is the upload's current offset. Otherwise 409 is returned with
+    the current offset in the Upload-Offset header, so a client that lost a
+    response can resume without resending what already arrived.
+    """
+    store = get_resumable_uploads()
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > store.chunk_max_bytes:
+        raise HTTPException(status_code=413, detail=f"Chunks are limited to {store.chunk_max_bytes} bytes")
+    
+    data = bytearray()
+    async for part in request.stream():
+        data += part
+        if len(data) > store.chunk_max_bytes:
+            raise HTTPException(status_code=413, detail=f"Chunks are limited to {store.chunk_max_bytes} bytes")
+    
+    try:
+        return await run_in_threadpool(store.append, upload_id, offset, bytes(data), chunk_sha256)
+    except (UploadNotFound, UploadOffsetMismatch, ValueError) as e:
+        raise resumable_upload_error(e)
+
+
+@app.delete("/api/uploads/{upload_id}")
+async def delete_resumable_upload(upload_id: str, current_user: dict = Depends(require_admin)):
+    """Abort a resumable upload and discard the bytes received so far."""
+    try:
+        get_resumable_uploads().status(upload_id)
+        await run_in_threadpool(get_resumable_uploads().abort, upload_id)
+    except UploadNotFound as e:
+        raise resumable_upload_error(e)
+    return {"message": "Upload discarded"}
+
+
+@app.post("/api/uploads/{upload_id}/finalize", response_model=UploadResponse)
+async def finalize_resumable_upload(
+    upload_id: str,
+    background_tasks: BackgroundTasks,
+    response: Response,
+    progress: bool = Query(False, description="Stream stage events as Server-Sent Events"),
+    priority: str = Query("interactive", pattern="^(interactive|batch)$", description="OCR scheduling lane"),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(require_admin)
+):
+    """
+    Process a completely received resumable upload like /api/upload.
+    409 with Upload-Offset if bytes are still missing. A whole-file SHA-256
+    given at start is checked here; on a mismatch the upload is discarded.
+    On 429 (OCR saturated) the upload is kept, so finalize can be retried.
+    """
+    store = get_resumable_uploads()
+    try:
+        upload = store.status(upload_id)
+        if upload["offset"] != upload["size"]:
+            raise UploadOffsetMismatch(upload["offset"])
         
-        photo_path = None
-        if ocr_result.get('photo_path'):
-            photo_filename = f"photo_{timestamp}.jpg"
-            photo_path = os.path.join(student_dir, photo_filename)
-            shutil.move(ocr_result['photo_path'], photo_path)
+        if settings.ocr_mode != "queue":
+            # Keep the upload resumable until OCR has room for it
+            try:
+                get_ocr_scheduler().check(priority)
+            except OCRBusy as e:
+                raise ocr_busy_error(e)
         
-        # Check if student already exists
-        existing_student = db.query(Student).filter(
-            Student.student_id == student_data['student_id']
-        ).first()
+        temp_path = temp_upload_path(upload["filename"])
+        upload = await run_in_threadpool(store.complete, upload_id, temp_path)
+    except (UploadNotFound, UploadOffsetMismatch, ValueError) as e:
+        raise resumable_upload_error(e)
+    
+    # A document that still finds OCR saturated goes back into the store
+    def keep_upload(path: str):
+        store.restore(upload, path)
+    
+    try:
+        if settings.ocr_mode == "queue":
+            file_key = await run_in_threadpool(get_storage().put_file, temp_path, upload["extension"], True)
+            return queued_response(db, response, file_key, upload["filename"])
         
-        if existing_student:
-            # Update existing student
-            for key, value in student_data.items():
-                if value:
-                    setattr(existing_student, key, value)
-            
-            existing_student.original_image_path = final_image_path
-            if photo_path:
-                existing_student.photo_path = photo_path
-            existing_student.extracted_text = ocr_result.get('extracted_text')
-            
-            db.commit()
-            db.refresh(existing_student)
-            student = existing_student
-            message = "Student data updated successfully"
-        else:
-            # Create new student
-            student = Student(
-                student_id=student_data['student_id'],
-                full_name=student_data['full_name'],
-                email=student_data.get('email'),
-                phone=student_data.get('phone'),
-                department=student_data.get('department'),
-                program=student_data.get('program'),
-                year_of_study=student_data.get('year_of_study'),
-                document_type="ID Card",
-                extracted_text=ocr_result.get('extracted_text'),
-                original_image_path=final_image_path,
-                photo_path=photo_path
-            )
-            
-            db.add(student)
-            db.commit()
-            db.refresh(student)
-            message = "Document uploaded and processed successfully"
+        if progress:
+            return stream_upload(temp_path, upload["extension"], background_tasks, priority, keep_upload)
         
-        return UploadResponse(
-            success=True,
-            message=message,
-            student=StudentResponse.from_orm(student),
-            ocr_result=OCRResult(**ocr_result)
+        return await run_in_threadpool(
+            process_upload, db, temp_path, upload["extension"], background_tasks, None, priority, keep_upload
         )
         
     except HTTPException:
@@ -240,8 +634,95 @@ async def upload_document(
         raise HTTPException(status_code=500, detail=f"Error processing upload: {str(e)}")
 
 
+def load_job(db: Session, job_id: int) -> Optional[JobResponse]:
+    """Load a queued OCR job with its student, or None if it does not exist."""
+    job = db.query(OCRJob).filter(OCRJob.id == job_id).first()
+    if job is None:
+        return None
+    
+    student = db.query(Student).filter(Student.id == job.student_id).first() if job.student_id else None
+    
+    return JobResponse(
+        id=job.id,
+        status=job.status,
+        stage=job.stage,
+        attempts=job.attempts,
+        error=job.error,
+        student=StudentResponse.model_validate(student) if student else None,
+        created_at=job.created_at,
+        updated_at=job.updated_at
+    )
+
+
+@app.get("/api/jobs/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(require_admin)
+):
+    """Get the status of a queued OCR job."""
+    job = load_job(db, job_id)
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return model_response(job)
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def get_job_events(
+    job_id: int,
+    current_user: dict = Depends(require_admin)
+):
+    """
+    Stream a queued OCR job's stage changes as Server-Sent Events.
+    Ends with a "result" event carrying the JobResponse once the job is done or failed.
+    """
+    def poll():
+        # Each poll uses its own short session; the stream outlives the request's dependencies
+        db = SessionLocal()
+        try:
+            return load_job(db, job_id)
+        finally:
+            db.close()
+    
+    job = await run_in_threadpool(poll)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def events():
+        nonlocal job
+        started = time.perf_counter()
+        last_seen, last_sent = None, time.monotonic()
+        while True:
+            if (job.status, job.stage, job.attempts) != last_seen:
+                last_seen = (job.status, job.stage, job.attempts)
+                last_sent = time.monotonic()
+                yield format_event("stage", json.dumps({
+                    "stage": job.stage,
+                    "status": job.status,
+                    "attempts": job.attempts,
+                    "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+                }))
+            if job.status in ("done", "failed"):
+                yield format_event("result", job.model_dump_json())
+                return
+            if time.monotonic() - last_sent >= KEEPALIVE_SECONDS:
+                last_sent = time.monotonic()
+                yield ": keep-alive\n\n"
+            
+            await asyncio.sleep(settings.job_events_poll_seconds)
+            job = await run_in_threadpool(poll)
+            if job is None:
+                yield format_event("error", json.dumps({"status_code": 404, "detail": "Job not found"}))
+                return
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @app.get("/api/students", response_model=StudentSearchResponse)
 async def search_students(
+    request: Request,
     query: Optional[str] = Query(None, description="Search by student ID or name"),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(50, ge=1, le=100, description="Items per page"),
@@ -251,50 +732,128 @@ async def search_students(
     """
     Search and list students with pagination.
     Supports filtering by student ID or name.
+    Pages are served from the response cache until a student is written.
+    Responses carry a weak ETag; If-None-Match revalidation is answered with 304.
     """
     try:
-        # Base query
-        base_query = db.query(Student)
-        
-        # Apply search filter
-        if query:
-            search_filter = f"%{query}%"
-            base_query = base_query.filter(
-                (Student.student_id.ilike(search_filter)) |
-                (Student.full_name.ilike(search_filter))
-            )
+        response_cache = get_response_cache()
+        cache_key = response_cache.search_key(query, page, page_size)
+        cached = response_cache.get("search", cache_key)
+        etag, body = ConditionalGet.unpack(cached) if cached is not None else (None, None)
+        if etag is not None:
+            if ConditionalGet.matches(request, etag):
+                return ConditionalGet.not_modified(etag)
+            return json_response(body, headers={"X-Cache": "HIT", **ConditionalGet.headers(etag)})
         
-        # Get total count
-        total = base_query.count()
+        # Data version of the matching rows (doubles as the total count):
+        # any insert, update or delete among them changes it
+        latest_update, total = apply_search_filter(
+            db.query(func.max(Student.updated_at), func.count(Student.id)),
+            query
+        ).one()
+        etag = ConditionalGet.make_etag(
+            "search", cache_key, latest_update, total, ExportCache.normalize_query(query), page, page_size
+        )
+        if ConditionalGet.matches(request, etag):
+            return ConditionalGet.not_modified(etag)
         
-        # Apply pagination
+        # Apply pagination; plain column rows skip building ORM instances
         offset = (page - 1) * page_size
-        students = base_query.order_by(Student.created_at.desc()).offset(offset).limit(page_size).all()
+        students = apply_search_filter(db.query(*STUDENT_RESPONSE_COLUMNS), query).order_by(
+            Student.created_at.desc()
+        ).offset(offset).limit(page_size).all()
         
-        return StudentSearchResponse(
-            total=total,
-            page=page,
-            page_size=page_size,
-            students=[StudentResponse.from_orm(s) for s in students]
-        )
+        with RequestMetrics.timed("ser"):
+            body = StudentSearchResponse(
+                total=total,
+                page=page,
+                page_size=page_size,
+                students=[StudentResponse.model_validate(student_row(row)) for row in students]
+            ).model_dump_json().encode("utf-8")
+        response_cache.set(cache_key, ConditionalGet.pack(etag, body))
+        
+        return json_response(body, headers={"X-Cache": "MISS", **ConditionalGet.headers(etag)})
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error searching students: {str(e)}")
 
 
+@app.post("/api/students/bulk", response_model=BulkStudentResponse)
+async def bulk_students(
+    request: BulkStudentRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(require_admin)
+):
+    """
+    Update or delete many students, selected by ids and/or a filter, in one transaction.
+    Files of deleted students are released in the background.
+    """
+    try:
+        report = BulkService.run(
+            db,
+            action=request.action,
+            ids=request.ids,
+            filters=request.filter.model_dump(exclude_none=True) if request.filter else None,
+            updates=request.updates.model_dump(exclude_unset=True) if request.updates else None,
+            dry_run=request.dry_run,
+            chunk_size=request.chunk_size
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error applying bulk {request.action}: {str(e)}")
+    
+    paths = [path for path in report["paths"] if path]
+    if paths:
+        background_tasks.add_task(BulkService.release_files, paths)
+    
+    return model_response(BulkStudentResponse(
+        action=report["action"],
+        dry_run=report["dry_run"],
+        affected=report["affected"],
+        chunks=report["chunks"],
+        files_queued=len(set(paths))
+    ))
+
+
 @app.get("/api/students/{student_id}", response_model=StudentResponse)
 async def get_student(
     student_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: dict = Depends(require_admin)
 ):
-    """Get a specific student by database ID."""
+    """
+    Get a specific student by database ID.
+    Responses carry a weak ETag; If-None-Match revalidation is answered with 304.
+    """
+    response_cache = get_response_cache()
+    cache_key = response_cache.student_key(student_id)
+    cached = response_cache.get("student", cache_key)
+    etag, body = ConditionalGet.unpack(cached) if cached is not None else (None, None)
+    if etag is not None:
+        if ConditionalGet.matches(request, etag):
+            return ConditionalGet.not_modified(etag)
+        return json_response(body, headers={"X-Cache": "HIT", **ConditionalGet.headers(etag)})
+    
+    # Revalidate against updated_at before loading (and decompressing) the whole row
+    latest_update = db.query(Student.updated_at).filter(Student.id == student_id).scalar()
+    if latest_update is None:
+        raise HTTPException(status_code=404, detail="Student not found")
+    etag = ConditionalGet.make_etag("student", cache_key, student_id, latest_update)
+    if ConditionalGet.matches(request, etag):
+        return ConditionalGet.not_modified(etag)
+    
     student = db.query(Student).filter(Student.id == student_id).first()
     
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     
-    return StudentResponse.from_orm(student)
+    with RequestMetrics.timed("ser"):
+        body = StudentResponse.model_validate(student).model_dump_json().encode("utf-8")
+    response_cache.set(cache_key, ConditionalGet.pack(etag, body))
+    return json_response(body, headers={"X-Cache": "MISS", **ConditionalGet.headers(etag)})
 
 
 @app.put("/api/students/{student_id}", response_model=StudentResponse)
@@ -311,14 +870,18 @@ async def update_student(
         raise HTTPException(status_code=404, detail="Student not found")
     
     # Update fields
+    old_department, old_program = student.department, student.program
     update_data = student_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(student, field, value)
     
+    RollupService.student_updated(db, old_department, old_program, student)
     db.commit()
     db.refresh(student)
+    StatsService.student_updated(old_department, student)
+    get_response_cache().student_changed(student.id)
     
-    return StudentResponse.from_orm(student)
+    return model_response(StudentResponse.model_validate(student))
 
 
 @app.delete("/api/students/{student_id}")
@@ -333,17 +896,17 @@ async def delete_student(
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     
-    # Delete associated files
-    try:
-        if student.original_image_path and os.path.exists(student.original_image_path):
-            os.remove(student.original_image_path)
-        if student.photo_path and os.path.exists(student.photo_path):
-            os.remove(student.photo_path)
-    except Exception as e:
-        print(f"Error deleting files: {str(e)}")
-    
+    department, created_at = student.department, student.created_at
+    paths = [student.original_image_path, student.photo_path]
+    RollupService.student_deleted(db, department, student.program, created_at)
     db.delete(student)
     db.commit()
+    StatsService.student_deleted(department, created_at)
+    get_response_cache().student_changed(student_id)
+    PHashService.forget([student_id])
+    
+    # Delete associated files no other student shares
+    IngestService.release_files(db, paths)
     
     return {"message": "Student deleted successfully"}
 
@@ -356,37 +919,43 @@ async def export_to_excel(
 ):
     """
     Export all students (or filtered) to Excel file.
+    Identical exports are served from the export cache until the data changes.
     """
     try:
-        # Base query
-        base_query = db.query(Student)
-        
-        # Apply search filter if provided
-        if query:
-            search_filter = f"%{query}%"
-            base_query = base_query.filter(
-                (Student.student_id.ilike(search_filter)) |
-                (Student.full_name.ilike(search_filter))
-            )
+        # Data version of the filtered rows: any insert, update or delete changes it
+        latest_update, row_count = apply_search_filter(
+            db.query(func.max(Student.updated_at), func.count(Student.id)),
+            query
+        ).one()
         
-        # Get all students
-        students = base_query.order_by(Student.student_id).all()
-        
-        if not students:
+        if not row_count:
             raise HTTPException(status_code=404, detail="No students found to export")
         
-        # Generate Excel file
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_filename = f"students_export_{timestamp}.xlsx"
-        output_path = os.path.join(settings.upload_dir, output_filename)
+        # updated_at alone misses a second edit within the same (SQLite: 1s) tick;
+        # the response cache's generation changes with every committed write
+        generation = get_response_cache().data_version()
         
-        ExcelService.export_students(students, output_path)
+        def build_export(output_path: str):
+            students = apply_search_filter(db.query(Student), query).order_by(Student.student_id).all()
+            ExcelService.export_students(students, output_path)
+        
+        background = None
+        if generation is None:
+            # No reliable version (cache off or unreachable): build afresh every time
+            output_path = export_cache.build_uncached("xlsx", build_export)
+            background = BackgroundTask(os.remove, output_path)
+        else:
+            data_version = f"{generation}:{latest_update.isoformat() if latest_update else ''}:{row_count}"
+            cache_key = ExportCache.make_key(query, "xlsx", data_version)
+            output_path = export_cache.get_or_build(cache_key, "xlsx", build_export)
         
         # Return file
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         return FileResponse(
             path=output_path,
-            filename=output_filename,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            filename=f"students_export_{timestamp}.xlsx",
+            media_type=EXCEL_MEDIA_TYPE,
+            background=background
         )
         
     except HTTPException:
@@ -395,52 +964,190 @@ async def export_to_excel(
         raise HTTPException(status_code=500, detail=f"Error exporting to Excel: {str(e)}")
 
 
+@app.get("/api/export/archive")
+async def export_archive(
+    query: Optional[str] = Query(None, description="Filter by student ID or name"),
+    department: Optional[str] = Query(None),
+    program: Optional[str] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(require_admin)
+):
+    """
+    Download the stored documents and photos of all (or filtered) students as a ZIP.
+    The archive is streamed as it is built: <student_id>/document.<ext> and
+    <student_id>/photo.<ext> per student, then manifest.csv with the student
+    data and the SHA-256 of every file. Files missing from storage are listed
+    in the manifest's missing column instead of failing the download.
+    """
+    def select_students(base_query):
+        base_query = apply_search_filter(base_query, query)
+        if department:
+            base_query = base_query.filter(Student.department == department)
+        if program:
+            base_query = base_query.filter(Student.program == program)
+        return base_query
+    
+    if not select_students(db.query(Student.id)).first():
+        raise HTTPException(status_code=404, detail="No students found to export")
+    
+    # Rows are read in short per-batch sessions: the request session is closed before the body is sent
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return StreamingResponse(
+        ArchiveService.stream(
+            SessionLocal,
+            select_students,
+            get_storage(),
+            read_ahead=settings.archive_read_ahead,
+            buffer_chunks=settings.archive_buffer_chunks
+        ),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="students_archive_{timestamp}.zip"'}
+    )
+
+
 @app.get("/api/files/{student_id}/{filename}")
-async def get_file(student_id: str, filename: str):
-    """Serve student files (images, photos)."""
+async def get_file(
+    student_id: str,
+    filename: str,
+    request: Request,
+    size: Optional[str] = Query(None, pattern="^(thumb|preview)$", description="Serve a downscaled derivative")
+):
+    """
+    Serve student files (images, photos) by storage key.
+    Supports ETag/Last-Modified revalidation and byte ranges.
+    """
+    if is_storage_key(filename):
+        key, variant, fallback = filename, None, False
+        if size:
+            # Missing derivatives are regenerated; fall back to the original if that fails
+            derivative_key = await run_in_threadpool(DerivativeService.get_or_create, filename, size)
+            fallback = derivative_key is None
+            key = derivative_key or filename
+            variant = f"{size}-original" if fallback else size
+        
+        stored = await run_in_threadpool(get_storage().stat, key)
+        if not stored:
+            raise HTTPException(status_code=404, detail="File not found")
+        
+        return FileService.build_object_response(request, stored, variant=variant, immutable=not fallback)
+    
+    # Legacy files stored under upload_dir/<student_id>/ before migrate_storage.py
     file_path = os.path.join(settings.upload_dir, student_id, filename)
     
-    if not os.path.exists(file_path):
+    if not os.path.isfile(file_path):
         raise HTTPException(status_code=404, detail="File not found")
     
-    return FileResponse(file_path)
+    # Hash off the event loop
+    digest = await run_in_threadpool(FileService.content_digest, file_path, os.stat(file_path))
+    return FileService.build_response(request, file_path, digest=digest)
 
 
 @app.get("/api/stats")
 async def get_statistics(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: dict = Depends(require_admin)
 ):
-    """Get system statistics."""
+    """
+    Get system statistics.
+    Computed with a single aggregate query and cached until the data changes.
+    Responses carry a weak ETag; If-None-Match revalidation is answered with 304.
+    """
     try:
-        total_students = db.query(Student).count()
+        stats = StatsService.get_statistics(db)
+        etag = ConditionalGet.make_etag("stats", *StatsService.version(stats))
+        if ConditionalGet.matches(request, etag):
+            return ConditionalGet.not_modified(etag)
         
-        # Get students by department
-        departments = db.query(
-            Student.department,
-            func.count(Student.id)
-        ).group_by(Student.department).all()
-        
-        # Get recent uploads (last 7 days)
-        from datetime import timedelta
-        week_ago = datetime.utcnow() - timedelta(days=7)
-        recent_uploads = db.query(Student).filter(
-            Student.created_at >= week_ago
-        ).count()
-        
-        return {
-            "total_students": total_students,
-            "recent_uploads": recent_uploads,
-            "departments": [
-                {"name": dept or "Unknown", "count": count}
-                for dept, count in departments
-            ]
-        }
+        return TimedORJSONResponse(stats, headers=ConditionalGet.headers(etag))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching statistics: {str(e)}")
 
 
+@app.get("/api/stats/timeseries")
+async def get_statistics_timeseries(
+    start: Optional[date] = Query(None, description="First day (default: 30 days before end)"),
+    end: Optional[date] = Query(None, description="Last day (default: today)"),
+    interval: str = Query("day", pattern=f"^({'|'.join(INTERVALS)})$", description="Bucket size"),
+    group_by: str = Query("none", pattern=f"^({'|'.join(GROUP_BY)})$", description="One series per department or program"),
+    department: Optional[str] = Query(None, description="Only this department"),
+    program: Optional[str] = Query(None, description="Only this program"),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(require_admin)
+):
+    """
+    Students added per day, week or month, optionally per department or program.
+    Read from the daily rollup table only; see rebuild_rollups.py to backfill it.
+    """
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if (end - start).days >= settings.stats_timeseries_max_days:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Range is limited to {settings.stats_timeseries_max_days} days"
+        )
+    
+    return RollupService.timeseries(db, start, end, interval, group_by, department, program)
+
+
+@app.post("/api/admin/reextract", status_code=202)
+async def start_reextraction(
+    request: ReextractRequest,
+    current_user: dict = Depends(require_admin)
+):
+    """
+    Re-extract student fields from stored OCR text without re-running OCR.
+    Runs in the background (dry run by default); poll the returned run for progress and the diff.
+    """
+    run_id = ReextractService.start_background(request.dict(), SessionLocal)
+    return {"run_id": run_id, "status": "running"}
+
+
+@app.get("/api/admin/reextract/{run_id}")
+async def get_reextraction(
+    run_id: str,
+    current_user: dict = Depends(require_admin)
+):
+    """Get the progress and report of a re-extraction run."""
+    run = ReextractService.get_run(run_id)
+    
+    if not run:
+        raise HTTPException(status_code=404, detail="Re-extraction run not found")
+    
+    return run
+
+
+@app.post("/api/admin/sweeper", status_code=202)
+async def start_sweep(
+    dry_run: bool = Query(False, description="Report orphans without removing them"),
+    current_user: dict = Depends(require_admin)
+):
+    """Start an orphaned-file sweep now; poll GET /api/admin/sweeper for the report."""
+    threading.Thread(target=sweeper.sweep, kwargs={"dry_run": dry_run}, name="upload-sweep", daemon=True).start()
+    return {"message": "Sweep started"}
+
+
+@app.get("/api/admin/sweeper")
+async def get_sweep_report(current_user: dict = Depends(require_admin)):
+    """Get the report of the last orphaned-file sweep."""
+    return {"enabled": settings.sweeper_enabled, "last_report": sweeper.last_report}
+
+
+@app.get("/api/admin/ocr")
+async def get_ocr_queue(current_user: dict = Depends(require_admin)):
+    """Get in-flight and queued OCR work per lane (this process)."""
+    return get_ocr_scheduler().stats()
+
+
+@app.get("/api/admin/cache")
+async def get_cache_stats(current_user: dict = Depends(require_admin)):
+    """Get hit/miss counters and hit rates of the student response cache (this process)."""
+    return get_response_cache().stats()
+
+
 # For local development
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,259 @@
+"""
+Compression migration script for NED University Document Management System
+Adds the extracted_text_compressed column, moves existing OCR text into it
+and optionally re-encodes stored BMP/TIFF originals losslessly, reporting
+sizes and read latency before and after
+
+Usage: python migrate_compression.py [--schema-only] [--originals png|webp] [--dry-run]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from sqlalchemy import inspect, select, text, update
+
+from database import SessionLocal, engine
+from models import Student
+from text_codec import compress_text, decompress_text
+from services.document_encoder import SAVE_OPTIONS, DocumentEncoder
+from services.ingest_service import IngestService
+from services.response_cache import get_response_cache
+from services.storage import get_storage, is_storage_key
+
+# Rows read for the latency measurement
+SAMPLE_ROWS = 2000
+
+
+def ensure_column():
+    """Add extracted_text_compressed to an existing students table."""
+    columns = {column["name"] for column in inspect(engine).get_columns(Student.__tablename__)}
+    if "extracted_text_compressed" in columns:
+        return False
+    column_type = Student.__table__.c.extracted_text_compressed.type.compile(dialect=engine.dialect)
+    with engine.begin() as conn:
+        conn.execute(text(f"ALTER TABLE {Student.__tablename__} ADD COLUMN extracted_text_compressed {column_type}"))
+    return True
+
+
+def table_size(db) -> int:
+    """On-disk size of the students table with TOAST and indexes (PostgreSQL only, else 0)."""
+    if engine.dialect.name != "postgresql":
+        return 0
+    return db.scalar(text(f"SELECT pg_total_relation_size('{Student.__tablename__}')"))
+
+
+def read_latency(db, ids, compressed: bool, runs: int = 3) -> float:
+    """Best of a few runs, in milliseconds, of fetching (and decompressing) the OCR text of the given rows."""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        if compressed:
+            for (data,) in db.execute(select(Student.extracted_text_compressed).where(Student.id.in_(ids))):
+                decompress_text(data)
+        else:
+            db.execute(select(Student.extracted_text_plain).where(Student.id.in_(ids))).all()
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings)
+
+
+def migrate_text(batch_size: int, dry_run: bool) -> dict:
+    """
+    Move plain extracted_text into the compressed column.
+
+    Returns:
+        Rows converted, text bytes before and after, and read latency of a sample before and after
+    """
+    summary = {'rows': 0, 'bytes_before': 0, 'bytes_after': 0, 'seconds': 0.0}
+    db = SessionLocal()
+
+    try:
+        sample = [
+            row_id for (row_id,) in db.execute(
+                select(Student.id).where(Student.extracted_text_plain.isnot(None)).order_by(Student.id).limit(SAMPLE_ROWS)
+            )
+        ]
+        summary['sample_rows'] = len(sample)
+        summary['table_bytes_before'] = table_size(db)
+        summary['read_ms_before'] = read_latency(db, sample, compressed=False)
+
+        started = time.perf_counter()
+        last_id = 0
+        while True:
+            rows = db.execute(
+                select(Student.id, Student.extracted_text_plain)
+                .where(Student.id > last_id, Student.extracted_text_plain.isnot(None))
+                .order_by(Student.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            mappings = []
+            for row in rows:
+                compressed = compress_text(row.extracted_text_plain)
+                summary['bytes_before'] += len(row.extracted_text_plain.encode("utf-8"))
+                summary['bytes_after'] += len(compressed)
+                mappings.append({'id': row.id, 'extracted_text_compressed': compressed, 'extracted_text_plain': None})
+            summary['rows'] += len(rows)
+
+            if not dry_run:
+                db.execute(update(Student), mappings)
+                db.commit()
+            print(f"\r  Compressed text of {summary['rows']} students (up to id {last_id})", end="", flush=True)
+
+        summary['seconds'] = time.perf_counter() - started
+        if summary['rows']:
+            print()
+        if not dry_run:
+            summary['read_ms_after'] = read_latency(db, sample, compressed=True)
+            summary['table_bytes_after'] = table_size(db)
+        return summary
+
+    finally:
+        db.close()
+
+
+def decode_ms(Image, path: str) -> float:
+    started = time.perf_counter()
+    with Image.open(path) as img:
+        img.load()
+    return (time.perf_counter() - started) * 1000
+
+
+def migrate_originals(target: str, batch_size: int, dry_run: bool) -> dict:
+    """
+    Re-encode stored originals losslessly and point their students at the new keys.
+
+    Returns:
+        Documents converted, stored bytes before and after, and total decode time before and after
+    """
+    from PIL import Image
+
+    storage = get_storage()
+    summary = {
+        'documents': 0, 'skipped': 0, 'bytes_before': 0, 'bytes_after': 0,
+        'decode_ms_before': 0.0, 'decode_ms_after': 0.0
+    }
+    work_dir = tempfile.mkdtemp(prefix="migrate_compression_")
+    converted = {}  # old key -> new key, for documents shared by several students
+    db = SessionLocal()
+
+    try:
+        last_id = 0
+        while True:
+            students = db.query(Student).filter(
+                Student.id > last_id, Student.original_image_path.isnot(None)
+            ).order_by(Student.id).limit(batch_size).all()
+            if not students:
+                break
+            last_id = students[-1].id
+
+            released = []
+            for student in students:
+                key = student.original_image_path
+                if not is_storage_key(key) or not DocumentEncoder.applies(os.path.splitext(key)[1], target):
+                    continue
+                if key not in converted:
+                    with storage.local_copy(key) as path:
+                        encoded = DocumentEncoder.reencode(path, os.path.splitext(key)[1], work_dir, target)
+                        if encoded is None:
+                            summary['skipped'] += 1
+                            converted[key] = None
+                            continue
+                        summary['decode_ms_before'] += decode_ms(Image, path)
+                        summary['decode_ms_after'] += decode_ms(Image, encoded[0])
+                        summary['bytes_before'] += os.path.getsize(path)
+                        summary['bytes_after'] += os.path.getsize(encoded[0])
+                        summary['documents'] += 1
+                        if dry_run:
+                            os.remove(encoded[0])
+                            converted[key] = key
+                        else:
+                            converted[key] = storage.put_file(*encoded, move=True)
+                if converted[key] and not dry_run:
+                    student.original_image_path = converted[key]
+                    released.append(key)
+
+            if not dry_run:
+                db.commit()
+                IngestService.release_files(db, released)
+            print(f"\r  Re-encoded {summary['documents']} originals (students up to id {last_id})", end="", flush=True)
+
+        if summary['documents'] or summary['skipped']:
+            print()
+        if not dry_run and summary['documents']:
+            get_response_cache().invalidate_all()
+        return summary
+
+    finally:
+        db.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def mb(size: int) -> str:
+    return f"{size / 1048576:.1f} MB"
+
+
+def main():
+    """Main migration function."""
+    parser = argparse.ArgumentParser(description="Compress stored OCR text and re-encode uncompressed originals")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Students per transaction")
+    parser.add_argument("--schema-only", action="store_true", help="Only add the compressed column (run before deploying)")
+    parser.add_argument("--originals", choices=sorted(SAVE_OPTIONS), help="Also re-encode BMP/TIFF originals to this format")
+    parser.add_argument("--dry-run", action="store_true", help="Measure without changing anything")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("NED University Document Management System")
+    print("Compression Migration" + (" (dry run)" if args.dry_run else ""))
+    print("=" * 60)
+    print()
+
+    try:
+        if not args.dry_run and ensure_column():
+            print("✓ Added students.extracted_text_compressed")
+        if args.schema_only:
+            return
+        text_summary = migrate_text(args.batch_size, args.dry_run)
+        originals_summary = migrate_originals(args.originals, args.batch_size, args.dry_run) if args.originals else None
+    except Exception as e:
+        print(f"\n❌ Migration failed: {str(e)}")
+        sys.exit(1)
+
+    before, after = text_summary['bytes_before'], text_summary['bytes_after']
+    print()
+    print(f"✓ Compressed text of {text_summary['rows']} students in {text_summary['seconds']:.1f}s")
+    if text_summary['rows']:
+        print(f"  Text: {mb(before)} -> {mb(after)} ({before / max(after, 1):.1f}x smaller)")
+    if 'read_ms_after' in text_summary and text_summary['sample_rows']:
+        print(
+            f"  Reading {text_summary['sample_rows']} rows: {text_summary['read_ms_before']:.1f} ms -> "
+            f"{text_summary['read_ms_after']:.1f} ms (decompression included)"
+        )
+    if text_summary.get('table_bytes_after'):
+        print(
+            f"  students table: {mb(text_summary['table_bytes_before'])} -> {mb(text_summary['table_bytes_after'])} "
+            "(run VACUUM FULL students to return the freed space to the OS)"
+        )
+
+    if originals_summary:
+        before, after = originals_summary['bytes_before'], originals_summary['bytes_after']
+        print(f"✓ Re-encoded {originals_summary['documents']} originals as {args.originals.upper()}")
+        if originals_summary['documents']:
+            print(f"  Files: {mb(before)} -> {mb(after)} ({before / max(after, 1):.1f}x smaller)")
+            print(
+                f"  Decoding: {originals_summary['decode_ms_before'] / originals_summary['documents']:.1f} ms -> "
+                f"{originals_summary['decode_ms_after'] / originals_summary['documents']:.1f} ms per document"
+            )
+        print(f"  Kept as uploaded (not smaller or not convertible): {originals_summary['skipped']}")
+
+    if args.dry_run:
+        print("  (dry run: nothing was changed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Storage migration script for NED University Document Management System
+Moves legacy files from upload_dir/<student_id>/ into content-addressed storage
+and replaces the paths on each student with storage keys
+"""
+import argparse
+import os
+import sys
+
+from database import SessionLocal, engine
+from models import Student
+from services.response_cache import get_response_cache
+from services.storage import get_storage, is_storage_key
+
+
+def ensure_indexes():
+    """Create the storage key indexes on an existing students table."""
+    for index in Student.__table__.indexes:
+        if index.name in ('idx_original_image_path', 'idx_photo_path'):
+            index.create(bind=engine, checkfirst=True)
+
+
+def migrate(batch_size: int, keep_originals: bool, dry_run: bool) -> dict:
+    """
+    Move legacy files into storage.
+
+    Args:
+        batch_size: Students committed per transaction
+        keep_originals: Copy instead of move, leaving the legacy files in place
+        dry_run: Only report what would be migrated
+
+    Returns:
+        Counts of migrated, missing and already migrated files
+    """
+    storage = get_storage()
+    summary = {'migrated': 0, 'missing': 0, 'already_migrated': 0, 'bytes': 0}
+    db = SessionLocal()
+
+    try:
+        last_id = 0
+        while True:
+            students = db.query(Student).filter(Student.id > last_id).order_by(Student.id).limit(batch_size).all()
+            if not students:
+                break
+
+            for student in students:
+                for column in ('original_image_path', 'photo_path'):
+                    path = getattr(student, column)
+                    if not path:
+                        continue
+                    if is_storage_key(path):
+                        summary['already_migrated'] += 1
+                        continue
+                    if not os.path.isfile(path):
+                        print(f"  Missing file for {student.student_id}: {path}")
+                        summary['missing'] += 1
+                        continue
+
+                    summary['bytes'] += os.path.getsize(path)
+                    summary['migrated'] += 1
+                    if not dry_run:
+                        setattr(student, column, storage.put_file(path, move=not keep_originals))
+
+            if not dry_run:
+                db.commit()
+            last_id = students[-1].id
+            print(f"  Processed students up to id {last_id}")
+
+        if not dry_run and summary['migrated']:
+            get_response_cache().invalidate_all()
+        return summary
+
+    finally:
+        db.close()
+
+
+def main():
+    """Main migration function."""
+    parser = argparse.ArgumentParser(description="Move uploaded files into content-addressed storage")
+    parser.add_argument("--batch-size", type=int, default=500, help="Students per transaction")
+    parser.add_argument("--keep-originals", action="store_true", help="Copy files instead of moving them")
+    parser.add_argument("--dry-run", action="store_true", help="Report without changing anything")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("NED University Document Management System")
+    print("Storage Migration")
+    print("=" * 60)
+    print()
+
+    try:
+        if not args.dry_run:
+            ensure_indexes()
+        summary = migrate(args.batch_size, args.keep_originals, args.dry_run)
+    except Exception as e:
+        print(f"\n❌ Migration failed: {str(e)}")
+        sys.exit(1)
+
+    print()
+    print(f"✓ Migrated files: {summary['migrated']} ({summary['bytes'] / 1048576:.1f} MB)")
+    print(f"  Already in storage: {summary['already_migrated']}")
+    print(f"  Missing on disk: {summary['missing']}")
+    if args.dry_run:
+        print("  (dry run: nothing was changed)")
+
+
+if __name__ == "__main__":
+    main()
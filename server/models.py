@@ -1,7 +1,10 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, LargeBinary, Index
+from typing import Optional
+
+from sqlalchemy import BigInteger, Column, Date, Integer, String, DateTime, Text, LargeBinary, Index, ForeignKey, or_
 from sqlalchemy.sql import func
 from database import Base
 from datetime import datetime
+from text_codec import compress_text, decompress_text
 
 
 class Student(Base):
@@ -20,9 +23,12 @@ class Student(Base):
     
     # Document information
     document_type = Column(String(100), nullable=True)
-    extracted_text = Column(Text, nullable=True)
+    # Raw OCR text, read and written through the extracted_text property.
+    # The plain column only holds rows migrate_compression.py has not converted yet.
+    extracted_text_plain = Column("extracted_text", Text, nullable=True)
+    extracted_text_compressed = Column(LargeBinary, nullable=True)
     
-    # File paths
+    # File storage keys (legacy rows may still hold filesystem paths)
     original_image_path = Column(String(500), nullable=True)
     photo_path = Column(String(500), nullable=True)
     processed_image_path = Column(String(500), nullable=True)
@@ -35,8 +41,26 @@ class Student(Base):
     __table_args__ = (
         Index('idx_student_search', 'student_id', 'full_name'),
         Index('idx_created_at', 'created_at'),
+        # Reference lookups before deleting deduplicated storage keys
+        Index('idx_original_image_path', 'original_image_path'),
+        Index('idx_photo_path', 'photo_path'),
     )
     
+    @property
+    def extracted_text(self) -> Optional[str]:
+        """OCR text, decompressed on access."""
+        return decompress_text(self.extracted_text_compressed, self.extracted_text_plain)
+    
+    @extracted_text.setter
+    def extracted_text(self, value: Optional[str]):
+        self.extracted_text_compressed = compress_text(value)
+        self.extracted_text_plain = None
+    
+    @staticmethod
+    def has_extracted_text():
+        """SQL condition for rows with OCR text in either column."""
+        return or_(Student.extracted_text_compressed.isnot(None), Student.extracted_text_plain.isnot(None))
+    
     def __repr__(self):
         return f"<Student(id={self.id}, student_id='{self.student_id}', name='{self.full_name}')>"
     
@@ -59,3 +83,74 @@ class Student(Base):
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
         }
+
+
+class OCRJob(Base):
+    """Queued document waiting for (or being processed by) an OCR worker."""
+    
+    __tablename__ = "ocr_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String(20), nullable=False, default="pending")  # pending, running, done, failed
+    stage = Column(String(50), nullable=True)  # last pipeline stage reached by the worker
+    
+    # Uploaded document (storage key)
+    file_key = Column(String(500), nullable=False)
+    original_filename = Column(String(500), nullable=True)
+    
+    # Claiming
+    worker_id = Column(String(100), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Outcome
+    student_id = Column(Integer, ForeignKey("students.id", ondelete="SET NULL"), nullable=True)
+    error = Column(Text, nullable=True)
+    
+    # Metadata
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    
+    __table_args__ = (
+        # Claim query: oldest pending/stale job first
+        Index('idx_ocr_jobs_claim', 'status', 'id'),
+        Index('idx_ocr_jobs_file_key', 'file_key'),
+    )
+    
+    def __repr__(self):
+        return f"<OCRJob(id={self.id}, status='{self.status}', file_key='{self.file_key}')>"
+
+
+class DocumentFingerprint(Base):
+    """Perceptual hash of a student's uploaded document, used for near-duplicate detection."""
+    
+    __tablename__ = "document_fingerprints"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    student_id = Column(Integer, ForeignKey("students.id", ondelete="CASCADE"), nullable=False, unique=True)
+    file_key = Column(String(500), nullable=True)
+    phash = Column(BigInteger, nullable=False)  # 64-bit dHash stored as a signed integer
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<DocumentFingerprint(student_id={self.student_id}, phash={self.phash})>"
+
+
+class StudentDailyRollup(Base):
+    """
+    Number of students created per day, department and program.
+
+    Kept current by every write to students, in the same transaction, so
+    trend queries never scan the students table. Missing departments and
+    programs are stored as '' because they are part of the primary key.
+    """
+    
+    __tablename__ = "student_daily_rollups"
+    
+    day = Column(Date, primary_key=True)
+    department = Column(String(200), primary_key=True, default="")
+    program = Column(String(200), primary_key=True, default="")
+    count = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<StudentDailyRollup(day={self.day}, department='{self.department}', program='{self.program}', count={self.count})>"
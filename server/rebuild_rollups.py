@@ -0,0 +1,44 @@
+"""
+Statistics rollup rebuild for NED University Document Management System
+Recomputes the per-day, per-department, per-program student counts behind
+/api/stats/timeseries from the students table. Run it once after deploying
+the rollup table, and after rows were written without going through the API
+(imports, seeding, manual SQL)
+
+Usage: python rebuild_rollups.py
+"""
+import argparse
+import sys
+import time
+
+from database import Base, SessionLocal, engine
+from services.rollup_service import RollupService
+
+
+def main():
+    """Main rebuild function."""
+    argparse.ArgumentParser(description="Rebuild the statistics rollup table from the students table").parse_args()
+
+    print("=" * 60)
+    print("NED University Document Management System")
+    print("Statistics Rollup Rebuild")
+    print("=" * 60)
+    print()
+
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        rows = RollupService.rebuild(db)
+    except Exception as e:
+        print(f"❌ Rebuild failed: {str(e)}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    print(f"✓ Wrote {rows} rollup rows in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Bulk re-extraction for NED University Document Management System
+Re-applies the current field extractor to stored extracted_text without
+re-running OCR, updating only the fields that changed
+
+Usage: python reextract.py [--apply] [--fields department program] [--diff diff.json]
+"""
+import argparse
+import json
+import sys
+
+from database import SessionLocal
+from services.reextract_service import REEXTRACT_FIELDS, ReextractService
+
+
+def print_progress(report: dict):
+    total = report["total"] or 1
+    print(
+        f"\r  {report['scanned']}/{report['total']} rows ({report['scanned'] * 100 // total}%), "
+        f"{report['changed']} changed, {report['elapsed_seconds']:.1f}s",
+        end="",
+        flush=True
+    )
+
+
+def main():
+    """Main re-extraction function."""
+    parser = argparse.ArgumentParser(description="Re-extract student fields from stored OCR text")
+    parser.add_argument("--apply", action="store_true", help="Write the changes (default is a dry run)")
+    parser.add_argument("--fields", nargs="+", choices=REEXTRACT_FIELDS, help="Only update these fields")
+    parser.add_argument("--only-empty", action="store_true", help="Only fill fields that are currently empty")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Rows per batch")
+    parser.add_argument("--workers", type=int, default=None, help="Extraction processes (default: CPU count)")
+    parser.add_argument("--diff", help="Write the diff of changed rows to this JSON file")
+    parser.add_argument("--diff-limit", type=int, default=100000, help="Maximum rows kept in the diff")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("NED University Document Management System")
+    print("Field Re-extraction" + ("" if args.apply else " (dry run)"))
+    print("=" * 60)
+    print()
+
+    db = SessionLocal()
+    try:
+        report = ReextractService.run(
+            db,
+            dry_run=not args.apply,
+            fields=args.fields,
+            only_empty=args.only_empty,
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+            diff_limit=args.diff_limit,
+            progress=print_progress
+        )
+    except Exception as e:
+        print(f"\n❌ Re-extraction failed: {str(e)}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    print("\n")
+    print(f"✓ Scanned {report['scanned']} rows in {report['elapsed_seconds']:.1f}s")
+    print(f"  Rows with changes: {report['changed']}")
+    print(f"  Rows updated: {report['updated']}")
+    print(f"  Student ID conflicts skipped: {report['conflicts']}")
+    for field, count in report["field_changes"].items():
+        print(f"    {field:15} {count}")
+
+    if args.diff:
+        with open(args.diff, "w") as f:
+            json.dump(report["diff"], f, indent=2, default=str)
+        print(f"\nDiff written to {args.diff}")
+    elif report["diff"] and not args.apply:
+        print("\nSample changes:")
+        for entry in report["diff"][:10]:
+            print(f"  id={entry['id']}: " + ", ".join(
+                f"{field}: {change['old']!r} -> {change['new']!r}" for field, change in entry["changes"].items()
+            ))
+
+
+if __name__ == "__main__":
+    main()
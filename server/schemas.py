@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, EmailStr
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 
@@ -63,12 +63,89 @@ class OCRResult(BaseModel):
     extracted_text: Optional[str] = None
     student_data: Optional[dict] = None
     photo_extracted: bool = False
+    card_detected: bool = False
+    timings: Optional[Dict[str, float]] = None
     error: Optional[str] = None
 
 
+class DuplicateMatch(BaseModel):
+    """Existing document an upload was detected as a near-duplicate of."""
+    student_id: int
+    distance: int
+
+
 class UploadResponse(BaseModel):
     """Schema for upload response."""
     success: bool
     message: str
     student: Optional[StudentResponse] = None
     ocr_result: Optional[OCRResult] = None
+    job_id: Optional[int] = None
+    duplicate_of: Optional[DuplicateMatch] = None
+
+
+class JobResponse(BaseModel):
+    """Schema for a queued OCR job."""
+    id: int
+    status: str
+    stage: Optional[str] = None
+    attempts: int
+    error: Optional[str] = None
+    student: Optional[StudentResponse] = None
+    created_at: datetime
+    updated_at: datetime
+
+
+class ReextractRequest(BaseModel):
+    """Schema for a bulk re-extraction request."""
+    dry_run: bool = True
+    fields: Optional[List[str]] = None
+    only_empty: bool = False
+    chunk_size: int = Field(500, ge=1, le=10000)
+    workers: Optional[int] = Field(None, ge=1)
+
+
+class BulkStudentFilter(BaseModel):
+    """Filter selecting the students a bulk operation applies to."""
+    query: Optional[str] = None  # student ID or name, as in search
+    department: Optional[str] = None
+    program: Optional[str] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    placeholder_only: bool = False  # only students whose ID could not be read (UNKNOWN_...)
+
+
+class BulkStudentRequest(BaseModel):
+    """Schema for a bulk update or delete of students selected by ids or a filter."""
+    action: str = Field(..., pattern="^(update|delete)$")
+    ids: Optional[List[int]] = Field(None, max_length=100000)
+    filter: Optional[BulkStudentFilter] = None
+    updates: Optional[StudentUpdate] = None
+    dry_run: bool = False
+    chunk_size: int = Field(1000, ge=1, le=10000)
+
+
+class BulkStudentResponse(BaseModel):
+    """Schema for the result of a bulk operation."""
+    action: str
+    dry_run: bool
+    affected: int
+    chunks: int
+    files_queued: int = 0
+
+
+class ResumableUploadCreate(BaseModel):
+    """Schema for starting a resumable upload."""
+    filename: str = Field(..., min_length=1, max_length=255)
+    size: int = Field(..., gt=0)
+    sha256: Optional[str] = Field(None, pattern="^[0-9a-fA-F]{64}$")  # of the whole file, checked on finalize
+
+
+class ResumableUploadStatus(BaseModel):
+    """Schema for the state of a resumable upload."""
+    upload_id: str
+    filename: str
+    size: int
+    offset: int  # bytes received; the next chunk starts here
+    chunk_size: int  # suggested chunk size
+    expires_at: datetime
@@ -1,8 +1,40 @@
-# Make OCR service optional
-try:
-    from .ocr_service import OCRService
-    __all__ = ['OCRService', 'ExcelService']
-except ImportError:
-    __all__ = ['ExcelService']
-
+# The OCR service is optional and slow to import (cv2, numpy, PIL, pytesseract),
+# so it is only imported on first access
 from .excel_service import ExcelService
+from .archive_service import ArchiveService
+from .export_cache import ExportCache
+from .stats_service import StatsService
+from .rollup_service import RollupService
+from .file_service import FileService
+from .derivative_service import DerivativeService
+from .document_encoder import DocumentEncoder
+from .storage import get_storage
+from .ocr_loader import OCRLoader
+from .ingest_service import IngestService
+from .job_queue import JobQueue
+from .field_extractor import FieldExtractor
+from .reextract_service import ReextractService
+from .phash_service import PHashService
+from .response_cache import get_response_cache
+from .bulk_service import BulkService
+from .upload_sweeper import UploadSweeper
+from .request_metrics import RequestMetrics
+from .conditional_get import ConditionalGet
+from .progress_stream import ProgressStream
+from .ocr_scheduler import get_ocr_scheduler
+from .resumable_upload import get_resumable_uploads
+
+__all__ = [
+    'OCRService', 'OCRLoader', 'ExcelService', 'ArchiveService', 'ExportCache', 'StatsService', 'RollupService',
+    'FileService', 'DerivativeService', 'DocumentEncoder', 'get_storage', 'IngestService', 'JobQueue',
+    'FieldExtractor', 'ReextractService', 'PHashService',
+    'get_response_cache', 'BulkService', 'UploadSweeper', 'RequestMetrics', 'ConditionalGet',
+    'ProgressStream', 'get_ocr_scheduler', 'get_resumable_uploads'
+]
+
+
+def __getattr__(name):
+    if name == 'OCRService':
+        from .ocr_service import OCRService
+        return OCRService
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,286 @@
+import csv
+import io
+import os
+import queue
+import re
+import threading
+import zipfile
+from collections import deque
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, NamedTuple, Set, Tuple
+
+from sqlalchemy import func
+
+from models import Student
+from services.storage import CHUNK_SIZE, StorageBackend, is_storage_key, key_digest
+
+# Students read per query; each batch uses its own short session
+BATCH_SIZE = 500
+
+MANIFEST_NAME = "manifest.csv"
+MANIFEST_HEADERS = [
+    "id", "student_id", "full_name", "email", "phone", "department", "program",
+    "year_of_study", "document_type", "created_at",
+    "document", "document_sha256", "photo", "photo_sha256", "missing"
+]
+
+ARCHIVE_COLUMNS = (
+    Student.id, Student.student_id, Student.full_name, Student.email, Student.phone,
+    Student.department, Student.program, Student.year_of_study, Student.document_type,
+    Student.created_at, Student.original_image_path, Student.photo_path
+)
+
+# Files of one student, by the column they come from
+FILE_KINDS = (("document", "original_image_path"), ("photo", "photo_path"))
+
+UNSAFE_NAME_CHARS = re.compile(r"[^A-Za-z0-9._-]+")
+
+# Markers a reader thread puts after the size and chunks of a file
+_END = object()
+_MISSING = object()
+
+
+class ArchiveEntry(NamedTuple):
+    """One file of the archive."""
+    student_id: int
+    kind: str
+    name: str  # path inside the archive
+    source: str  # storage key, or path of a legacy file under upload_dir
+    date_time: Tuple[int, int, int, int, int, int]
+
+
+class _ChunkSink:
+    """
+    Unseekable file object that collects what zipfile writes.
+    zipfile then writes data descriptors after each entry instead of seeking
+    back to patch the local header, so the archive can be sent as it is made.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> List[bytes]:
+        chunks, self._chunks = self._chunks, []
+        return chunks
+
+
+class ArchiveService:
+    """
+    Streams a ZIP of the stored documents and photos of a set of students,
+    plus a CSV manifest, without a temporary file.
+
+    Entries are stored uncompressed (scans and photos are already
+    compressed) with zip64 extensions where needed, so archives may exceed
+    4GB and 65535 files. The next few files are read from storage in
+    parallel while the current one is written; memory is bounded by
+    read_ahead * buffer_chunks storage chunks plus the central directory
+    (about 100 bytes per file).
+    """
+
+    @staticmethod
+    def stream(
+        session_factory,
+        select_students: Callable,
+        storage: StorageBackend,
+        read_ahead: int = 4,
+        buffer_chunks: int = 4
+    ) -> Iterator[bytes]:
+        """
+        Generate the archive.
+
+        Args:
+            session_factory: Creates database sessions (one per batch, so no transaction stays open)
+            select_students: Applies the export filter to a Student query
+            storage: Storage backend the files are read from
+            read_ahead: Files fetched in parallel ahead of the one being written
+            buffer_chunks: Storage chunks buffered per file being fetched
+
+        Yields:
+            ZIP bytes
+        """
+        with session_factory() as db:
+            # Students added while the archive streams are not included
+            max_id = select_students(db.query(func.max(Student.id))).scalar()
+        if max_id is None:
+            return
+
+        sink = _ChunkSink()
+        missing: Set[Tuple[int, str]] = set()
+
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+            entries = ArchiveService._iter_entries(session_factory, select_students, max_id)
+            for entry, chunks in ArchiveService._read_ahead(storage, entries, read_ahead, buffer_chunks):
+                size = chunks.get()
+                if size is _MISSING:
+                    missing.add((entry.student_id, entry.kind))
+                    continue
+                if isinstance(size, Exception):
+                    raise size
+
+                info = zipfile.ZipInfo(entry.name, date_time=entry.date_time)
+                info.compress_type = zipfile.ZIP_STORED
+                info.file_size = size  # lets zipfile choose zip64 up front
+                with archive.open(info, "w") as out:
+                    while True:
+                        chunk = chunks.get()
+                        if chunk is _END:
+                            break
+                        if isinstance(chunk, Exception):
+                            raise chunk
+                        out.write(chunk)
+                        yield from sink.drain()
+                yield from sink.drain()
+
+            info = zipfile.ZipInfo(MANIFEST_NAME, date_time=ArchiveService._date_time(datetime.now()))
+            with io.TextIOWrapper(archive.open(info, "w"), encoding="utf-8", newline="") as manifest:
+                writer = csv.writer(manifest)
+                writer.writerow(MANIFEST_HEADERS)
+                for rows in ArchiveService._iter_batches(session_factory, select_students, max_id):
+                    for row in rows:
+                        writer.writerow(ArchiveService._manifest_row(row, missing))
+                    manifest.flush()
+                    yield from sink.drain()
+
+        # Central directory
+        yield from sink.drain()
+
+    @staticmethod
+    def _iter_batches(session_factory, select_students: Callable, max_id: int) -> Iterator[list]:
+        last_id = 0
+        while True:
+            with session_factory() as db:
+                rows = select_students(db.query(*ARCHIVE_COLUMNS)).filter(
+                    Student.id > last_id, Student.id <= max_id
+                ).order_by(Student.id).limit(BATCH_SIZE).all()
+            if not rows:
+                return
+            last_id = rows[-1].id
+            yield rows
+
+    @staticmethod
+    def _iter_entries(session_factory, select_students: Callable, max_id: int) -> Iterator[ArchiveEntry]:
+        for rows in ArchiveService._iter_batches(session_factory, select_students, max_id):
+            for row in rows:
+                date_time = ArchiveService._date_time(row.created_at)
+                for kind, column in FILE_KINDS:
+                    source = getattr(row, column)
+                    if source:
+                        yield ArchiveEntry(row.id, kind, ArchiveService._entry_name(row, kind, source), source, date_time)
+
+    @staticmethod
+    def _entry_name(row, kind: str, source: str) -> str:
+        """<student_id>/document.jpg; IDs that are not safe as a folder name get the row id appended."""
+        folder = UNSAFE_NAME_CHARS.sub("_", row.student_id).strip("._") or "student"
+        if folder != row.student_id:
+            folder = f"{folder}_{row.id}"
+        return f"{folder}/{kind}{os.path.splitext(source)[1].lower()}"
+
+    @staticmethod
+    def _date_time(value) -> Tuple[int, int, int, int, int, int]:
+        # ZIP timestamps cannot predate 1980
+        if value is None or value.year < 1980:
+            return (1980, 1, 1, 0, 0, 0)
+        return value.timetuple()[:6]
+
+    @staticmethod
+    def _manifest_row(row, missing: Set[Tuple[int, str]]) -> list:
+        values = [
+            row.id, row.student_id, row.full_name, row.email, row.phone, row.department, row.program,
+            row.year_of_study, row.document_type, row.created_at.isoformat() if row.created_at else None
+        ]
+        absent = []
+        for kind, column in FILE_KINDS:
+            source = getattr(row, column)
+            if not source:
+                values += [None, None]
+            elif (row.id, kind) in missing:
+                values += [None, None]
+                absent.append(kind)
+            else:
+                values += [
+                    ArchiveService._entry_name(row, kind, source),
+                    key_digest(source) if is_storage_key(source) else None
+                ]
+        values.append(";".join(absent))
+        return values
+
+    @staticmethod
+    def _read_ahead(
+        storage: StorageBackend,
+        entries: Iterator[ArchiveEntry],
+        workers: int,
+        buffer_chunks: int
+    ) -> Iterator[Tuple[ArchiveEntry, queue.Queue]]:
+        """Yield entries in order with a queue their bytes arrive on, fetching up to `workers` files at once."""
+        workers = max(1, workers)
+        stop = threading.Event()
+        pending = deque()
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="archive-read")
+        try:
+            for entry in entries:
+                chunks = queue.Queue(maxsize=max(1, buffer_chunks))
+                executor.submit(ArchiveService._fetch, storage, entry.source, chunks, stop)
+                pending.append((entry, chunks))
+                if len(pending) >= workers:
+                    yield pending.popleft()
+            while pending:
+                yield pending.popleft()
+        finally:
+            # Also reached when the client disconnects: readers blocked on a full queue give up
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _fetch(storage: StorageBackend, source: str, chunks: queue.Queue, stop: threading.Event):
+        """Put the file's size, its chunks and _END on the queue (or _MISSING, or the exception)."""
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    chunks.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        sent_size = False
+        try:
+            if is_storage_key(source):
+                stored = storage.stat(source)
+                if stored is None:
+                    put(_MISSING)
+                    return
+                size, stream = stored.size, storage.iter_range(source)
+            else:
+                size, stream = os.path.getsize(source), ArchiveService._iter_file(source)
+
+            try:
+                sent_size = True
+                if not put(size):
+                    return
+                for chunk in stream:
+                    if not put(chunk):
+                        return
+            finally:
+                stream.close()
+            put(_END)
+        except FileNotFoundError as e:
+            # Once the entry is started a vanished file can only abort the archive
+            put(e if sent_size else _MISSING)
+        except Exception as e:
+            print(f"Error reading {source} for archive: {str(e)}")
+            put(e)
+
+    @staticmethod
+    def _iter_file(path: str) -> Iterator[bytes]:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                yield chunk
@@ -0,0 +1,176 @@
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import Student
+from services.ingest_service import IngestService
+from services.phash_service import PHashService
+from services.response_cache import get_response_cache
+from services.rollup_service import RollupService
+from services.stats_service import StatsService
+
+# Fields a bulk update may set; student_id is unique and must be edited one by one
+BULK_UPDATE_FIELDS = ('full_name', 'email', 'phone', 'department', 'program', 'year_of_study', 'document_type')
+
+
+class BulkService:
+    """
+    Bulk update and delete of students selected by ids or by a filter.
+
+    Each chunk is one set-based UPDATE/DELETE ... WHERE id IN (...) statement,
+    and all chunks run in a single transaction, so a failure leaves nothing
+    half-applied (rollup counts included). Files of deleted students are
+    released after the commit.
+    """
+
+    @staticmethod
+    def filter_conditions(filters: Optional[Dict]) -> List:
+        """Build WHERE conditions from a BulkStudentFilter dict."""
+        filters = filters or {}
+        conditions = []
+        if filters.get('query'):
+            pattern = f"%{filters['query']}%"
+            conditions.append(Student.student_id.ilike(pattern) | Student.full_name.ilike(pattern))
+        if filters.get('department'):
+            conditions.append(Student.department == filters['department'])
+        if filters.get('program'):
+            conditions.append(Student.program == filters['program'])
+        if filters.get('created_after'):
+            conditions.append(Student.created_at >= filters['created_after'])
+        if filters.get('created_before'):
+            conditions.append(Student.created_at < filters['created_before'])
+        if filters.get('placeholder_only'):
+            conditions.append(Student.student_id.like("UNKNOWN\\_%", escape="\\"))
+        return conditions
+
+    @staticmethod
+    def iter_id_chunks(db: Session, ids: Optional[List[int]], conditions: List, chunk_size: int) -> Iterator[List[int]]:
+        """Yield the ids to operate on, chunk by chunk, in id order."""
+        if ids is not None:
+            ordered = sorted(set(ids))
+            for start in range(0, len(ordered), chunk_size):
+                yield ordered[start:start + chunk_size]
+            return
+
+        # Keyset scan of the filter; rows already handled in this transaction are skipped by id
+        last_id = 0
+        while True:
+            chunk = list(db.scalars(
+                select(Student.id).where(Student.id > last_id, *conditions).order_by(Student.id).limit(chunk_size)
+            ))
+            if not chunk:
+                return
+            last_id = chunk[-1]
+            yield chunk
+
+    @staticmethod
+    def run(
+        db: Session,
+        action: str,
+        ids: Optional[List[int]] = None,
+        filters: Optional[Dict] = None,
+        updates: Optional[Dict] = None,
+        dry_run: bool = False,
+        chunk_size: int = 1000
+    ) -> Dict:
+        """
+        Apply a bulk update or delete.
+
+        Args:
+            db: Database session
+            action: "update" or "delete"
+            ids: Database ids of the students, or None to select by filters
+            filters: BulkStudentFilter values; combined with ids if both are given
+            updates: Field values to set (action "update")
+            dry_run: Only count the matching students
+            chunk_size: Ids per statement
+
+        Returns:
+            Report with the affected row count, the chunk count and, for deletes,
+            the file paths to release once the transaction is committed
+
+        Raises:
+            ValueError: If the request would select every student or the updates are invalid
+        """
+        conditions = BulkService.filter_conditions(filters)
+        if ids is None and not conditions:
+            raise ValueError("Provide ids or at least one filter")
+
+        values = {}
+        if action == "update":
+            values = {key: value for key, value in (updates or {}).items()}
+            invalid = set(values) - set(BULK_UPDATE_FIELDS)
+            if invalid:
+                raise ValueError(f"Fields cannot be bulk updated: {', '.join(sorted(invalid))}")
+            if not values:
+                raise ValueError("No fields to update")
+
+        report = {"action": action, "dry_run": dry_run, "affected": 0, "chunks": 0, "ids": [], "paths": []}
+
+        if dry_run:
+            count_query = select(func.count(Student.id)).where(*conditions)
+            if ids is not None:
+                count_query = count_query.where(Student.id.in_(set(ids)))
+            report["affected"] = db.scalar(count_query)
+            return report
+
+        try:
+            for chunk in BulkService.iter_id_chunks(db, ids, conditions, chunk_size):
+                if action == "delete":
+                    rows = db.execute(
+                        delete(Student)
+                        .where(Student.id.in_(chunk), *conditions)
+                        .returning(
+                            Student.id, Student.original_image_path, Student.photo_path,
+                            Student.department, Student.program, Student.created_at
+                        )
+                        .execution_options(synchronize_session=False)
+                    ).all()
+                    for row in rows:
+                        report["paths"].extend([row.original_image_path, row.photo_path])
+                    RollupService.rows_changed(db, [(row.department, row.program, row.created_at) for row in rows], [])
+                else:
+                    moves_rollup = 'department' in values or 'program' in values
+                    if moves_rollup:
+                        before = db.execute(
+                            select(Student.department, Student.program, Student.created_at)
+                            .where(Student.id.in_(chunk), *conditions)
+                        ).all()
+                    rows = db.execute(
+                        update(Student)
+                        .where(Student.id.in_(chunk), *conditions)
+                        .values(**values)
+                        .returning(Student.id, Student.department, Student.program, Student.created_at)
+                        .execution_options(synchronize_session=False)
+                    ).all()
+                    if moves_rollup:
+                        RollupService.rows_changed(
+                            db, before, [(row.department, row.program, row.created_at) for row in rows]
+                        )
+
+                report["ids"].extend(row.id for row in rows)
+                report["affected"] += len(rows)
+                report["chunks"] += 1
+
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        if report["affected"]:
+            StatsService.bulk_changed()
+            get_response_cache().invalidate_all()
+            if action == "delete":
+                PHashService.forget(report["ids"])
+        return report
+
+    @staticmethod
+    def release_files(paths: List[Optional[str]]):
+        """Release the files of deleted students (run as a background task)."""
+        db = SessionLocal()
+        try:
+            IngestService.release_files(db, paths)
+        finally:
+            db.close()
@@ -0,0 +1,56 @@
+import hashlib
+from typing import Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from services.file_service import FileService
+
+# Clients may keep responses but must revalidate them before every use
+CACHE_CONTROL = "private, no-cache"
+
+
+class ConditionalGet:
+    """
+    Weak ETags and 304 responses for the JSON API routes.
+
+    An ETag is a hash of the data version a response is built from (e.g.
+    the cache generation, max(updated_at) and the row count of the selected
+    students, plus the query), never of the serialized payload, so an
+    If-None-Match match is answered before any rows are loaded or serialized.
+    ETags are weak: they promise an equivalent response, not identical bytes.
+    """
+
+    @staticmethod
+    def make_etag(*parts) -> str:
+        raw = "\x1f".join("" if part is None else str(part) for part in parts)
+        return f'W/"{hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]}"'
+
+    @staticmethod
+    def matches(request: Request, etag: Optional[str]) -> bool:
+        """Whether the request's If-None-Match already names this ETag."""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is None or etag is None:
+            return False
+        return FileService.etag_matches(if_none_match, etag.removeprefix("W/"))
+
+    @staticmethod
+    def headers(etag: str) -> dict:
+        return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+    @staticmethod
+    def not_modified(etag: str) -> Response:
+        return Response(status_code=304, headers=ConditionalGet.headers(etag))
+
+    @staticmethod
+    def pack(etag: str, body: bytes) -> bytes:
+        """Store a response body with its ETag in one cache entry."""
+        return etag.encode("ascii") + b"\n" + body
+
+    @staticmethod
+    def unpack(value: bytes) -> Tuple[Optional[str], bytes]:
+        """Split a cache entry into ETag and body (entries from before ETags have none)."""
+        if value.startswith(b'W/"'):
+            etag, _, body = value.partition(b"\n")
+            return etag.decode("ascii"), body
+        return None, value
@@ -0,0 +1,171 @@
+import os
+import tempfile
+from typing import Iterable, Optional
+
+from services.storage import get_storage, key_digest
+
+
+def _load_pil():
+    """Import Pillow on first use; it is optional and slow to import at startup."""
+    try:
+        from PIL import Image, ImageOps
+        return Image, ImageOps
+    except ImportError:
+        return None, None
+
+
+# (key, size) pairs whose original cannot be rendered (e.g. PDFs). Keys are
+# content-addressed, so a failed render would fail again: remember it instead
+# of fetching the original on every request
+_unrenderable = set()
+UNRENDERABLE_MAX_ENTRIES = 100000
+
+
+class DerivativeService:
+    """Service for generating thumbnail and preview images of stored files."""
+
+    # Longest edge in pixels for each derivative size
+    SIZES = {
+        "thumb": 160,
+        "preview": 800,
+    }
+    JPEG_QUALITY = 80
+
+    @staticmethod
+    def derivative_key(key: str, size: str) -> str:
+        """
+        Get the storage key of a derivative.
+
+        Args:
+            key: Storage key of the original file
+            size: One of SIZES
+
+        Returns:
+            Storage key of the derivative JPEG
+        """
+        return f"{key_digest(key)}.{size}.jpg"
+
+    @staticmethod
+    def render(source_path: str, size: str, output_path: str) -> bool:
+        """
+        Write a downscaled JPEG of an image.
+
+        Args:
+            source_path: Path to the original image
+            size: One of SIZES
+            output_path: Where to write the derivative
+
+        Returns:
+            True on success, False if the file cannot be decoded as an image
+        """
+        Image, ImageOps = _load_pil()
+        if Image is None or size not in DerivativeService.SIZES:
+            # Without Pillow the original files are served instead
+            return False
+
+        max_edge = DerivativeService.SIZES[size]
+        try:
+            with Image.open(source_path) as img:
+                # Let the JPEG decoder downscale while decoding instead of loading full resolution
+                img.draft("RGB", (max_edge, max_edge))
+                img = ImageOps.exif_transpose(img)
+                img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+                if img.mode != "RGB":
+                    img = img.convert("RGB")
+
+                img.save(
+                    output_path,
+                    format="JPEG",
+                    quality=DerivativeService.JPEG_QUALITY,
+                    optimize=True,
+                    progressive=True
+                )
+            return True
+
+        except Exception as e:
+            print(f"Error generating {size} derivative for {source_path}: {str(e)}")
+            return False
+
+    @staticmethod
+    def generate(key: str, size: str, source_path: Optional[str] = None) -> Optional[str]:
+        """
+        Generate one derivative of a stored file.
+
+        Args:
+            key: Storage key of the original
+            size: One of SIZES
+            source_path: Local copy of the original, fetched from storage when not given
+
+        Returns:
+            Storage key of the derivative, or None if none can be produced
+        """
+        if _load_pil()[0] is None or size not in DerivativeService.SIZES:
+            return None
+
+        storage = get_storage()
+        fd, temp_path = tempfile.mkstemp(suffix=".jpg")
+        os.close(fd)
+        try:
+            if source_path:
+                rendered = DerivativeService.render(source_path, size, temp_path)
+            else:
+                with storage.local_copy(key) as local_path:
+                    rendered = DerivativeService.render(local_path, size, temp_path)
+            if not rendered:
+                return None
+
+            derivative_key = DerivativeService.derivative_key(key, size)
+            storage.put_named(derivative_key, temp_path)
+            return derivative_key
+        finally:
+            os.remove(temp_path)
+
+    @staticmethod
+    def generate_all(keys: Iterable[Optional[str]]):
+        """Generate every derivative size for the given files (used as a background task)."""
+        storage = get_storage()
+        for key in keys:
+            if not key:
+                continue
+            try:
+                with storage.local_copy(key) as local_path:
+                    for size in DerivativeService.SIZES:
+                        DerivativeService.generate(key, size, source_path=local_path)
+            except Exception as e:
+                print(f"Error generating derivatives for {key}: {str(e)}")
+
+    @staticmethod
+    def get_or_create(key: str, size: str) -> Optional[str]:
+        """
+        Get a derivative, generating it if it is missing.
+        Keys are content-addressed, so an existing derivative is never stale
+        and an original that failed to render is not tried again.
+
+        Returns:
+            Storage key of the derivative, or None if none can be produced
+        """
+        if (key, size) in _unrenderable:
+            return None
+        storage = get_storage()
+        derivative_key = DerivativeService.derivative_key(key, size)
+        if storage.exists(derivative_key):
+            return derivative_key
+
+        # A missing original is not remembered: it may be uploaded (again) later
+        if not storage.exists(key):
+            return None
+        derivative_key = DerivativeService.generate(key, size)
+        if derivative_key is None and storage.exists(key):
+            if len(_unrenderable) >= UNRENDERABLE_MAX_ENTRIES:
+                _unrenderable.clear()
+            _unrenderable.add((key, size))
+        return derivative_key
+
+    @staticmethod
+    def remove_all(key: Optional[str]):
+        """Delete every derivative of a stored file."""
+        if not key:
+            return
+        storage = get_storage()
+        for size in DerivativeService.SIZES:
+            storage.delete(DerivativeService.derivative_key(key, size))
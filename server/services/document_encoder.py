@@ -0,0 +1,86 @@
+import os
+from typing import Optional, Tuple
+
+from config import get_settings
+
+settings = get_settings()
+
+# Image modes each target format stores without converting pixels
+LOSSLESS_MODES = {
+    "png": ("1", "L", "LA", "P", "RGB", "RGBA", "I;16"),
+    "webp": ("RGB", "RGBA"),
+}
+SAVE_OPTIONS = {
+    "png": {"format": "PNG", "compress_level": 9},
+    "webp": {"format": "WEBP", "lossless": True, "quality": 100, "method": 6},
+}
+
+
+def _load_pil():
+    """Import Pillow on first use; it is optional and slow to import at startup."""
+    try:
+        from PIL import Image
+        return Image
+    except ImportError:
+        return None
+
+
+class DocumentEncoder:
+    """
+    Lossless re-encoding of uploaded originals.
+
+    Scanners often deliver uncompressed BMP or TIFF. With ORIGINAL_REENCODE
+    set, such documents are stored as PNG or lossless WebP instead: pixels
+    are identical, files are typically several times smaller. JPEGs, PDFs
+    and multi-page TIFFs are stored as uploaded, and a re-encoded file is
+    only kept if it is actually smaller.
+    """
+
+    @staticmethod
+    def applies(extension: str, target: Optional[str] = None) -> bool:
+        """Whether documents with this extension are re-encoded."""
+        target = target or settings.original_reencode
+        extensions = {ext.strip().lower() for ext in settings.original_reencode_extensions.split(",") if ext.strip()}
+        return target in SAVE_OPTIONS and extension.lower() in extensions
+
+    @staticmethod
+    def reencode(path: str, extension: str, output_dir: str, target: Optional[str] = None) -> Optional[Tuple[str, str]]:
+        """
+        Write a losslessly re-encoded copy of a document; the source is left alone.
+
+        Args:
+            path: Document to re-encode
+            extension: Its extension (temp files do not always keep it)
+            output_dir: Directory for the re-encoded copy
+            target: "png" or "webp", defaults to settings.original_reencode
+
+        Returns:
+            (path, extension) of the copy, or None if the document is kept as it is
+        """
+        target = target or settings.original_reencode
+        if not DocumentEncoder.applies(extension, target):
+            return None
+        Image = _load_pil()
+        if Image is None:
+            return None
+
+        output_path = os.path.join(output_dir, f"reencoded_{os.getpid()}_{os.path.basename(path)}.{target}")
+        try:
+            with Image.open(path) as img:
+                if getattr(img, "n_frames", 1) > 1 or img.mode not in LOSSLESS_MODES[target]:
+                    return None
+                options = dict(SAVE_OPTIONS[target])
+                for key in ("dpi", "icc_profile"):
+                    if img.info.get(key):
+                        options[key] = img.info[key]
+                img.save(output_path, **options)
+        except Exception as e:
+            print(f"Could not re-encode {path}: {str(e)}")
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            return None
+
+        if os.path.getsize(output_path) >= os.path.getsize(path):
+            os.remove(output_path)
+            return None
+        return output_path, f".{target}"
@@ -1,6 +1,3 @@
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill
-from openpyxl.utils import get_column_letter
 from typing import List
 from models import Student
 import os
@@ -22,6 +19,11 @@ class ExcelService:
         Returns:
             Path to the generated Excel file
         """
+        # openpyxl is slow to import, so load it on first export rather than at startup
+        from openpyxl import Workbook
+        from openpyxl.styles import Font, Alignment, PatternFill
+        from openpyxl.utils import get_column_letter
+        
         # Create workbook
         wb = Workbook()
         ws = wb.active
@@ -0,0 +1,181 @@
+import hashlib
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+
+class ExportCache:
+    """
+    Disk cache for generated export artifacts.
+
+    Artifacts are keyed on the normalized query, the export format and a
+    data version, so an identical export is served from disk until the
+    underlying rows change. Old artifacts are evicted by age and by total size.
+    """
+
+    LOCK_STRIPES = 32
+
+    def __init__(self, cache_dir: str, max_bytes: int, max_age_seconds: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def normalize_query(query: Optional[str]) -> str:
+        """Normalize a search filter the same way the database compares it (ILIKE is case-insensitive)."""
+        return (query or "").lower()
+
+    @staticmethod
+    def make_key(query: Optional[str], export_format: str, data_version: str) -> str:
+        """
+        Build the cache key for an export.
+
+        Args:
+            query: Raw search filter from the request
+            export_format: File extension of the artifact (e.g. "xlsx")
+            data_version: Opaque string that changes whenever the exported rows change
+
+        Returns:
+            Hex digest identifying the artifact
+        """
+        raw = "\x1f".join([ExportCache.normalize_query(query), export_format, data_version])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str, export_format: str) -> str:
+        """Get the on-disk path of an artifact."""
+        return os.path.join(self.cache_dir, f"{key}.{export_format}")
+
+    def get(self, key: str, export_format: str) -> Optional[str]:
+        """
+        Look up a cached artifact.
+
+        Returns:
+            Path to the artifact, or None if it is missing or expired
+        """
+        path = self.path_for(key, export_format)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+
+        if time.time() - stat.st_mtime > self.max_age_seconds:
+            self._remove(path)
+            return None
+
+        # Touch the artifact so size-based eviction drops the least recently used first
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return path
+
+    def get_or_build(self, key: str, export_format: str, build: Callable[[str], None]) -> str:
+        """
+        Return a cached artifact, building it if necessary.
+
+        Concurrent requests for the same key wait for a single build.
+
+        Args:
+            key: Cache key from make_key
+            export_format: File extension of the artifact
+            build: Callable that writes the artifact to the given path
+
+        Returns:
+            Path to the artifact
+        """
+        path = self.get(key, export_format)
+        if path:
+            return path
+
+        with self._lock_for(key):
+            path = self.get(key, export_format)
+            if path:
+                return path
+
+            path = self.path_for(key, export_format)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.{export_format}"
+            try:
+                build(temp_path)
+                os.replace(temp_path, path)
+            finally:
+                if os.path.exists(temp_path):
+                    self._remove(temp_path)
+
+        self.evict()
+        return path
+
+    def build_uncached(self, export_format: str, build: Callable[[str], None]) -> str:
+        """
+        Build an artifact that is not cached, for when no data version is known.
+        The caller removes it once sent; abandoned ones are evicted by age.
+
+        Returns:
+            Path to the artifact
+        """
+        path = os.path.join(self.cache_dir, f"uncached.{os.getpid()}.{threading.get_ident()}.{time.time_ns()}.tmp.{export_format}")
+        try:
+            build(path)
+        except Exception:
+            if os.path.exists(path):
+                self._remove(path)
+            raise
+        return path
+
+    def evict(self) -> int:
+        """
+        Remove expired artifacts, then the least recently used ones until the
+        cache fits in max_bytes.
+
+        Returns:
+            Number of bytes reclaimed
+        """
+        now = time.time()
+        entries = []
+        reclaimed = 0
+
+        try:
+            names = os.listdir(self.cache_dir)
+        except FileNotFoundError:
+            return 0
+
+        for name in names:
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if not os.path.isfile(path):
+                continue
+
+            # Leave in-flight builds alone unless they were clearly abandoned
+            if ".tmp." in name and now - stat.st_mtime < self.max_age_seconds:
+                continue
+
+            if now - stat.st_mtime > self.max_age_seconds:
+                reclaimed += self._remove(path, stat.st_size)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            reclaimed += self._remove(path, size)
+            total -= size
+
+        return reclaimed
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        return self._locks[int(key[:8], 16) % self.LOCK_STRIPES]
+
+    @staticmethod
+    def _remove(path: str, size: int = 0) -> int:
+        try:
+            os.remove(path)
+            return size
+        except OSError as e:
+            print(f"Error removing cached export {path}: {str(e)}")
+            return 0
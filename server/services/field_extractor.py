@@ -0,0 +1,106 @@
+import re
+from typing import Dict, Optional
+
+
+class FieldExtractor:
+    """
+    Regex extraction of student fields from OCR text.
+
+    Kept free of the OCR imports (cv2, pytesseract) so stored text can be
+    re-extracted cheaply, including in worker processes.
+    """
+    
+    @staticmethod
+    def extract_student_data(text: str) -> Dict[str, Optional[str]]:
+        """
+        Extract structured student data from OCR text.
+        
+        Args:
+            text: Raw OCR text
+            
+        Returns:
+            Dictionary with extracted student information
+        """
+        data = {
+            'student_id': None,
+            'full_name': None,
+            'email': None,
+            'phone': None,
+            'department': None,
+            'program': None,
+            'year_of_study': None,
+        }
+        
+        # Normalize text
+        text = text.replace('\n', ' ').replace('\r', ' ')
+        
+        # Extract Student ID (various formats)
+        student_id_patterns = [
+            r'(?:Student\s*ID|ID\s*No|ID\s*Number|Matric\s*No)[:\s]*([A-Z0-9\-/]+)',
+            r'\b([A-Z]{2,}\d{4,})\b',  # Format like CS20221234
+            r'\b(\d{6,10})\b',  # Pure numeric IDs
+        ]
+        
+        for pattern in student_id_patterns:
+            match = re.search(pattern, text, re.IGNORECASE)
+            if match:
+                data['student_id'] = match.group(1).strip()
+                break
+        
+        # Extract Name
+        name_patterns = [
+            r'(?:Name|Student\s*Name|Full\s*Name)[:\s]*([A-Za-z\s]{3,50}?)(?:\s*(?:ID|Student|Department|DOB|Date)|\s*\d|\s*$)',
+            r'(?:^|\n)([A-Z][a-z]+(?:\s+[A-Z][a-z]+){1,3})(?:\s|$)',
+        ]
+        
+        for pattern in name_patterns:
+            match = re.search(pattern, text, re.IGNORECASE)
+            if match:
+                name = match.group(1).strip()
+                if len(name) > 5:  # Reasonable name length
+                    data['full_name'] = name
+                    break
+        
+        # Extract Email
+        email_pattern = r'\b([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})\b'
+        email_match = re.search(email_pattern, text)
+        if email_match:
+            data['email'] = email_match.group(1)
+        
+        # Extract Phone
+        phone_patterns = [
+            r'(?:Phone|Tel|Mobile|Contact)[:\s]*([+\d\s\-()]{10,20})',
+            r'\b(\+?\d{1,4}[\s\-]?\(?\d{1,4}\)?[\s\-]?\d{3,4}[\s\-]?\d{3,4})\b',
+        ]
+        
+        for pattern in phone_patterns:
+            match = re.search(pattern, text, re.IGNORECASE)
+            if match:
+                data['phone'] = match.group(1).strip()
+                break
+        
+        # Extract Department
+        dept_pattern = r'(?:Department|Dept|Faculty)[:\s]*([A-Za-z\s&]{3,50}?)(?:\s*(?:Program|Course|Year|Student)|\s*$)'
+        dept_match = re.search(dept_pattern, text, re.IGNORECASE)
+        if dept_match:
+            data['department'] = dept_match.group(1).strip()
+        
+        # Extract Program
+        program_pattern = r'(?:Program|Course|Major)[:\s]*([A-Za-z\s&]{3,50}?)(?:\s*(?:Year|Level|Student)|\s*$)'
+        program_match = re.search(program_pattern, text, re.IGNORECASE)
+        if program_match:
+            data['program'] = program_match.group(1).strip()
+        
+        # Extract Year of Study
+        year_patterns = [
+            r'(?:Year|Level|Class)[:\s]*(\d{1,2}|First|Second|Third|Fourth|Final)',
+            r'\b(Year\s*\d|Level\s*\d)\b',
+        ]
+        
+        for pattern in year_patterns:
+            match = re.search(pattern, text, re.IGNORECASE)
+            if match:
+                data['year_of_study'] = match.group(1).strip()
+                break
+        
+        return data
@@ -0,0 +1,243 @@
+import hashlib
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Callable, Iterator, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from services.storage import StoredObject, get_storage, key_digest
+
+
+class FileService:
+    """Service for serving stored files with HTTP caching and byte ranges."""
+
+    CHUNK_SIZE = 64 * 1024
+    DIGEST_CACHE_SIZE = 4096
+    IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+    REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+    _digest_cache: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+    _digest_lock = threading.Lock()
+
+    @staticmethod
+    def content_digest(path: str, stat: os.stat_result) -> str:
+        """
+        Get the SHA-256 of a file, cached by path, size and modification time.
+
+        Args:
+            path: Path to the file
+            stat: Result of os.stat for the file
+
+        Returns:
+            Hex digest of the file contents
+        """
+        cache_key = (path, stat.st_size, stat.st_mtime_ns)
+        with FileService._digest_lock:
+            digest = FileService._digest_cache.get(cache_key)
+            if digest:
+                FileService._digest_cache.move_to_end(cache_key)
+                return digest
+
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(FileService.CHUNK_SIZE), b""):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+
+        with FileService._digest_lock:
+            FileService._digest_cache[cache_key] = digest
+            while len(FileService._digest_cache) > FileService.DIGEST_CACHE_SIZE:
+                FileService._digest_cache.popitem(last=False)
+        return digest
+
+    @staticmethod
+    def etag_matches(if_none_match: str, etag: str) -> bool:
+        """Weak comparison of an If-None-Match header against an ETag."""
+        if if_none_match.strip() == "*":
+            return True
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+    @staticmethod
+    def not_modified_since(if_modified_since: str, mtime: float) -> bool:
+        """Check an If-Modified-Since header against a modification time."""
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= since.timestamp()
+
+    @staticmethod
+    def parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+        """
+        Parse a single-range "bytes=" header.
+
+        Returns:
+            Inclusive (start, end) offsets, or None if the header should be ignored
+
+        Raises:
+            ValueError: If the range cannot be satisfied
+        """
+        unit, _, spec = range_header.partition("=")
+        if unit.strip().lower() != "bytes" or "," in spec:
+            # Multipart ranges are not supported; serve the full body instead
+            return None
+
+        start_text, _, end_text = (part.strip() for part in spec.strip().partition("-"))
+        if not (start_text or end_text) or not all(part.isdigit() for part in (start_text, end_text) if part):
+            # Malformed ranges are ignored
+            return None
+
+        if not start_text:
+            suffix = int(end_text)
+            if suffix == 0:
+                raise ValueError("Empty suffix range")
+            start, end = max(size - suffix, 0), size - 1
+        else:
+            start = int(start_text)
+            end = min(int(end_text), size - 1) if end_text else size - 1
+
+        if start >= size or start > end:
+            raise ValueError("Range not satisfiable")
+        return start, end
+
+    @staticmethod
+    def iter_file_range(path: str, start: int, end: int) -> Iterator[bytes]:
+        """Yield the bytes of a file between two inclusive offsets."""
+        remaining = end - start + 1
+        with open(path, "rb") as f:
+            f.seek(start)
+            while remaining > 0:
+                chunk = f.read(min(FileService.CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    @staticmethod
+    def build_response(request: Request, path: str, immutable: bool = False, digest: Optional[str] = None) -> Response:
+        """
+        Build a response for a local file, honouring conditional and Range requests.
+
+        Args:
+            request: Incoming request
+            path: Path to the file
+            immutable: Whether the URL is content-addressed and can be cached forever
+            digest: Known SHA-256 of the file, computed when not given
+
+        Returns:
+            200, 206, 304 or 416 response
+        """
+        stat = os.stat(path)
+        return FileService._respond(
+            request,
+            size=stat.st_size,
+            modified=stat.st_mtime,
+            digest=digest or FileService.content_digest(path, stat),
+            media_type=mimetypes.guess_type(path)[0] or "application/octet-stream",
+            iter_range=lambda start, end: FileService.iter_file_range(path, start, end),
+            immutable=immutable,
+            path=path,
+            stat=stat
+        )
+
+    @staticmethod
+    def build_object_response(
+        request: Request,
+        stored: StoredObject,
+        variant: Optional[str] = None,
+        immutable: bool = True
+    ) -> Response:
+        """
+        Build a response for a content-addressed storage object.
+        The key embeds the content hash, so the response is immutable.
+
+        Args:
+            request: Incoming request
+            stored: Metadata of the stored object
+            variant: Added to the ETag when the bytes are not the original's
+                (a derivative shares its original's content hash)
+            immutable: False for responses that may change, such as an original
+                served in place of a derivative that could not be rendered
+
+        Returns:
+            200, 206, 304 or 416 response
+        """
+        storage = get_storage()
+        digest = key_digest(stored.key)
+        return FileService._respond(
+            request,
+            size=stored.size,
+            modified=stored.modified,
+            digest=f"{digest}-{variant}" if variant else digest,
+            media_type=mimetypes.guess_type(stored.key)[0] or "application/octet-stream",
+            iter_range=lambda start, end: storage.iter_range(stored.key, start, end),
+            immutable=immutable,
+            path=storage.local_path(stored.key)
+        )
+
+    @staticmethod
+    def _respond(
+        request: Request,
+        size: int,
+        modified: float,
+        digest: str,
+        media_type: str,
+        iter_range: Callable[[int, int], Iterator[bytes]],
+        immutable: bool,
+        path: Optional[str] = None,
+        stat: Optional[os.stat_result] = None
+    ) -> Response:
+        etag = f'"{digest}"'
+        headers = {
+            "ETag": etag,
+            "Last-Modified": formatdate(modified, usegmt=True),
+            "Cache-Control": FileService.IMMUTABLE_CACHE_CONTROL if immutable else FileService.REVALIDATE_CACHE_CONTROL,
+            "Accept-Ranges": "bytes",
+        }
+
+        # Conditional GET: If-None-Match takes precedence over If-Modified-Since
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            if FileService.etag_matches(if_none_match, etag):
+                return Response(status_code=304, headers=headers)
+        else:
+            if_modified_since = request.headers.get("if-modified-since")
+            if if_modified_since and FileService.not_modified_since(if_modified_since, modified):
+                return Response(status_code=304, headers=headers)
+
+        range_header = request.headers.get("range")
+        if_range = request.headers.get("if-range")
+        if range_header and (
+            not if_range or
+            if_range.strip() == etag or
+            FileService.not_modified_since(if_range, modified)
+        ):
+            try:
+                byte_range = FileService.parse_range(range_header, size)
+            except ValueError:
+                return Response(
+                    status_code=416,
+                    headers={**headers, "Content-Range": f"bytes */{size}"}
+                )
+
+            if byte_range:
+                start, end = byte_range
+                headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+                headers["Content-Length"] = str(end - start + 1)
+                return StreamingResponse(
+                    iter_range(start, end),
+                    status_code=206,
+                    media_type=media_type,
+                    headers=headers
+                )
+
+        if path:
+            return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat)
+
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(iter_range(0, size - 1), media_type=media_type, headers=headers)
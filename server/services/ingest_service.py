@@ -0,0 +1,205 @@
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from models import OCRJob, Student
+from services.derivative_service import DerivativeService
+from services.phash_service import PHashService
+from services.response_cache import get_response_cache
+from services.rollup_service import RollupService
+from services.stats_service import StatsService
+from services.storage import get_storage, is_storage_key
+
+settings = get_settings()
+
+
+class IngestService:
+    """Service for turning OCR results into stored files and Student rows."""
+
+    @staticmethod
+    def check_duplicate(db: Session, document_path: str) -> Tuple[Optional[int], Optional[Tuple[Student, int]]]:
+        """
+        Fingerprint a document and look for a near-duplicate among stored documents.
+
+        Returns:
+            The perceptual hash (None if disabled or not an image) and the
+            matching (student, distance), if any
+        """
+        if settings.phash_duplicate_action == "off":
+            return None, None
+
+        phash = PHashService.compute(document_path)
+        match = PHashService.find_duplicate(db, phash)
+        if match is None:
+            return phash, None
+
+        student = db.query(Student).filter(Student.id == match[0]).first()
+        return phash, (student, match[1]) if student else None
+
+    @staticmethod
+    def save_result(
+        db: Session,
+        ocr_result: Dict,
+        original_key: str,
+        job: Optional[OCRJob] = None,
+        phash: Optional[int] = None
+    ) -> Tuple[Student, str]:
+        """
+        Store the extracted photo and create or update the student from an OCR result.
+
+        Args:
+            db: Database session
+            ocr_result: Result of OCRService.process_document
+            original_key: Storage key of the uploaded document
+            job: Queue job to mark as done in the same transaction
+            phash: Perceptual hash of the document, stored for duplicate detection
+
+        Returns:
+            The committed student and a status message
+        """
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        # Extract student data
+        student_data = dict(ocr_result.get('student_data') or {})
+
+        # Validate required fields
+        if not student_data.get('student_id') or not student_data.get('full_name'):
+            # If OCR couldn't extract required fields, generate placeholder
+            student_data['student_id'] = student_data.get('student_id') or f"UNKNOWN_{timestamp}"
+            student_data['full_name'] = student_data.get('full_name') or "Unknown Student"
+
+        photo_key = None
+        if ocr_result.get('photo_path'):
+            photo_key = get_storage().put_file(ocr_result['photo_path'], ".jpg", move=True)
+
+        # Check if student already exists
+        existing_student = db.query(Student).filter(
+            Student.student_id == student_data['student_id']
+        ).first()
+
+        if existing_student:
+            # Update existing student
+            old_department, old_program = existing_student.department, existing_student.program
+            old_paths = [existing_student.original_image_path, existing_student.photo_path]
+            for key, value in student_data.items():
+                if value:
+                    setattr(existing_student, key, value)
+
+            existing_student.original_image_path = original_key
+            if photo_key:
+                existing_student.photo_path = photo_key
+            existing_student.extracted_text = ocr_result.get('extracted_text')
+
+            IngestService._finish_job(db, job, existing_student)
+            IngestService._record_fingerprint(db, existing_student, phash)
+            RollupService.student_updated(db, old_department, old_program, existing_student)
+            db.commit()
+            db.refresh(existing_student)
+            if phash is not None:
+                PHashService.indexed(existing_student.id, phash)
+            StatsService.student_updated(old_department, existing_student)
+            get_response_cache().student_changed(existing_student.id)
+            IngestService.release_files(db, [
+                path for path in old_paths
+                if path not in (existing_student.original_image_path, existing_student.photo_path)
+            ])
+            return existing_student, "Student data updated successfully"
+
+        # Create new student
+        student = Student(
+            student_id=student_data['student_id'],
+            full_name=student_data['full_name'],
+            email=student_data.get('email'),
+            phone=student_data.get('phone'),
+            department=student_data.get('department'),
+            program=student_data.get('program'),
+            year_of_study=student_data.get('year_of_study'),
+            document_type="ID Card",
+            extracted_text=ocr_result.get('extracted_text'),
+            original_image_path=original_key,
+            photo_path=photo_key
+        )
+
+        db.add(student)
+        IngestService._finish_job(db, job, student)
+        IngestService._record_fingerprint(db, student, phash)
+        RollupService.student_created(db, student)
+        db.commit()
+        db.refresh(student)
+        if phash is not None:
+            PHashService.indexed(student.id, phash)
+        StatsService.student_created(student)
+        get_response_cache().student_changed(student.id)
+        return student, "Document uploaded and processed successfully"
+
+    @staticmethod
+    def _finish_job(db: Session, job: Optional[OCRJob], student: Student):
+        if job is None:
+            return
+        db.flush()
+        job.status = "done"
+        job.stage = "committed"
+        job.student_id = student.id
+        job.error = None
+
+    @staticmethod
+    def _record_fingerprint(db: Session, student: Student, phash: Optional[int]):
+        if phash is None:
+            return
+        db.flush()
+        PHashService.record(db, student.id, phash, student.original_image_path)
+
+    @staticmethod
+    def finish_duplicate(db: Session, job: OCRJob, student: Student):
+        """Close a queued job whose document was skipped as a near-duplicate of a stored one."""
+        job.status = "done"
+        job.stage = "duplicate"
+        job.student_id = student.id
+        job.error = None
+        db.commit()
+
+    @staticmethod
+    def is_referenced(db: Session, path: str) -> bool:
+        """Check whether a student or a pending/running job still uses a stored file."""
+        return bool(
+            db.query(Student.id).filter(
+                or_(Student.original_image_path == path, Student.photo_path == path)
+            ).first() or db.query(OCRJob.id).filter(
+                OCRJob.file_key == path,
+                OCRJob.status.in_(("pending", "running"))
+            ).first()
+        )
+
+    @staticmethod
+    def release_files(db: Session, paths: List[Optional[str]]):
+        """
+        Delete stored files that no student or queued job references any more.
+        Storage is deduplicated, so a key is only removed once its last reference is gone.
+        Must be called after the referencing rows have been committed away.
+
+        An upload of the same content may already hold the key without having
+        committed its row yet. Storing a duplicate refreshes the object's
+        modification time, so keys written within the sweeper grace period are
+        left for the sweeper, which removes them once they are still unreferenced.
+        """
+        storage = get_storage()
+        cutoff = time.time() - settings.sweeper_grace_seconds
+        for path in set(filter(None, paths)):
+            try:
+                if is_storage_key(path):
+                    if IngestService.is_referenced(db, path):
+                        continue
+                    stored = storage.stat(path)
+                    if stored is not None and stored.modified < cutoff:
+                        storage.delete(path)
+                        DerivativeService.remove_all(path)
+                elif os.path.exists(path):
+                    # Legacy file stored under upload_dir/<student_id>/
+                    os.remove(path)
+            except Exception as e:
+                print(f"Error deleting file {path}: {str(e)}")
@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from models import OCRJob
+
+settings = get_settings()
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class JobQueue:
+    """
+    Database-backed OCR job queue.
+
+    Workers claim jobs with SELECT ... FOR UPDATE SKIP LOCKED, so any number of
+    worker processes can poll the same table without a separate broker. A
+    running job whose heartbeat is older than worker_stale_seconds is assumed
+    to belong to a dead worker and is claimed again.
+    """
+
+    @staticmethod
+    def enqueue(db: Session, file_key: str, original_filename: Optional[str] = None) -> OCRJob:
+        """
+        Queue a stored document for OCR.
+
+        Args:
+            db: Database session
+            file_key: Storage key of the uploaded document
+            original_filename: Name the file was uploaded with
+
+        Returns:
+            The committed job
+        """
+        job = OCRJob(file_key=file_key, original_filename=original_filename, status="pending", stage="received")
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    @staticmethod
+    def claim(db: Session, worker_id: str) -> Optional[OCRJob]:
+        """
+        Claim the oldest pending (or stale running) job.
+
+        Returns:
+            The claimed job, or None if the queue is empty
+        """
+        stale_before = _utcnow() - timedelta(seconds=settings.worker_stale_seconds)
+
+        while True:
+            job = db.query(OCRJob).filter(
+                or_(
+                    OCRJob.status == "pending",
+                    and_(OCRJob.status == "running", OCRJob.heartbeat_at < stale_before)
+                )
+            ).order_by(OCRJob.id).with_for_update(skip_locked=True).first()
+
+            if job is None:
+                db.commit()
+                return None
+
+            if job.attempts >= settings.worker_max_attempts:
+                # Keeps crashing its workers: give up instead of claiming it forever
+                job.status = "failed"
+                job.error = job.error or f"Gave up after {job.attempts} attempts"
+                db.commit()
+                continue
+
+            job.status = "running"
+            job.stage = "claimed"
+            job.worker_id = worker_id
+            job.attempts += 1
+            job.heartbeat_at = _utcnow()
+            db.commit()
+            db.refresh(job)
+            return job
+
+    @staticmethod
+    def heartbeat(db: Session, job_id: int, worker_id: str, stage: Optional[str] = None) -> bool:
+        """
+        Refresh a running job's heartbeat.
+
+        Returns:
+            False if the job has been reclaimed by another worker
+        """
+        values = {"heartbeat_at": _utcnow()}
+        if stage:
+            values["stage"] = stage
+        result = db.execute(
+            update(OCRJob)
+            .where(OCRJob.id == job_id, OCRJob.worker_id == worker_id, OCRJob.status == "running")
+            .values(**values)
+        )
+        db.commit()
+        return result.rowcount > 0
+
+    @staticmethod
+    def lock_owned(db: Session, job_id: int, worker_id: str) -> Optional[OCRJob]:
+        """
+        Lock a job row before writing its results.
+
+        Returns:
+            The job if this worker still owns it, otherwise None
+        """
+        job = db.query(OCRJob).filter(OCRJob.id == job_id).with_for_update().first()
+        if job is None or job.worker_id != worker_id or job.status != "running":
+            return None
+        return job
+
+    @staticmethod
+    def fail(db: Session, job_id: int, worker_id: str, error: str, retry: bool = False):
+        """Record a failed attempt, putting the job back in the queue if retry is set."""
+        db.execute(
+            update(OCRJob)
+            .where(OCRJob.id == job_id, OCRJob.worker_id == worker_id)
+            .values(
+                status="pending" if retry else "failed",
+                error=error[:2000],
+                worker_id=None
+            )
+        )
+        db.commit()
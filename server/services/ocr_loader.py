@@ -0,0 +1,77 @@
+import threading
+import time
+from typing import Optional
+
+
+class OCRLoader:
+    """
+    Lazy loader for the OCR stack.
+
+    services.ocr_service pulls in cv2, numpy, PIL and pytesseract, which take
+    seconds to import. The API imports it on first use (or from the background
+    warm-up) instead of at startup, so health checks answer immediately.
+    """
+
+    _lock = threading.Lock()
+    _service = None
+    _error: Optional[str] = None
+    _loaded = False
+    _warm = False
+    _warm_error: Optional[str] = None
+    timings = {}
+
+    @staticmethod
+    def get():
+        """
+        Get the OCRService class, importing it on first call.
+
+        Returns:
+            OCRService, or None if its dependencies are not installed
+        """
+        if OCRLoader._loaded:
+            return OCRLoader._service
+
+        with OCRLoader._lock:
+            if not OCRLoader._loaded:
+                start = time.perf_counter()
+                try:
+                    from services.ocr_service import OCRService
+                    OCRLoader._service = OCRService
+                except ImportError as e:
+                    print(f"Warning: OCR service not available: {e}")
+                    OCRLoader._error = str(e)
+                OCRLoader.timings['import_seconds'] = round(time.perf_counter() - start, 3)
+                OCRLoader._loaded = True
+
+        return OCRLoader._service
+
+    @staticmethod
+    def error() -> Optional[str]:
+        """Get why the OCR stack could not be loaded, if it failed."""
+        return OCRLoader._error
+
+    @staticmethod
+    def warm_up():
+        """Import the OCR stack and preload its engines and models."""
+        service = OCRLoader.get()
+        if service is None:
+            return
+
+        start = time.perf_counter()
+        try:
+            service.warm_up()
+        except Exception as e:
+            # Uploads still work; the first one just pays the loading cost
+            print(f"Warning: OCR warm-up failed: {e}")
+            OCRLoader._warm_error = str(e)
+        OCRLoader.timings['warm_up_seconds'] = round(time.perf_counter() - start, 3)
+        OCRLoader._warm = True
+
+    @staticmethod
+    def status() -> str:
+        """Get the OCR readiness: "loading", "ready", "degraded" or "unavailable"."""
+        if not OCRLoader._loaded or (OCRLoader._service is not None and not OCRLoader._warm):
+            return "loading"
+        if OCRLoader._service is None:
+            return "unavailable"
+        return "degraded" if OCRLoader._warm_error else "ready"
@@ -0,0 +1,182 @@
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Iterator, Optional
+
+from config import get_settings
+
+settings = get_settings()
+
+# Lanes in priority order: single uploads from the UI, bulk uploads, internal jobs (re-extraction)
+LANES = ("interactive", "batch", "background")
+
+# Guess of one document's OCR time until real ones have been measured
+INITIAL_SECONDS_PER_DOCUMENT = 5.0
+
+
+def max_in_flight() -> int:
+    """Documents OCR'd at the same time in this process."""
+    return settings.ocr_max_in_flight or os.cpu_count() or 1
+
+
+def threads_per_document() -> int:
+    """Threads tesseract and OpenCV may use per document, so in-flight documents share the CPUs."""
+    if settings.ocr_threads_per_document:
+        return settings.ocr_threads_per_document
+    return max(1, (os.cpu_count() or 1) // max_in_flight())
+
+
+class OCRBusy(Exception):
+    """Raised when a lane's queue is full; retry_after estimates when to try again (seconds)."""
+
+    def __init__(self, lane: str, retry_after: int):
+        super().__init__(f"OCR queue is full ({lane}), retry in {retry_after}s")
+        self.lane = lane
+        self.retry_after = retry_after
+
+
+class OCRScheduler:
+    """
+    Admission control for OCR work.
+
+    At most max_in_flight documents are processed at once. Further work waits
+    in a per-lane FIFO; a free slot always goes to the highest-priority lane
+    with waiters, so interactive uploads overtake batch and background work.
+    A lane whose queue is full rejects new work right away with OCRBusy
+    instead of letting every request slow down until it times out.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        max_queued: Dict[str, Optional[int]],
+        queue_timeout: Dict[str, Optional[float]]
+    ):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queued = max_queued  # None = unbounded
+        self.queue_timeout = queue_timeout  # None = wait as long as it takes
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._waiting = {lane: deque() for lane in LANES}
+        self._seconds_per_document = INITIAL_SECONDS_PER_DOCUMENT
+        self._counters = {lane: {"admitted": 0, "queued": 0, "rejected": 0} for lane in LANES}
+
+    def _next_waiter(self):
+        for lane in LANES:
+            if self._waiting[lane]:
+                return self._waiting[lane][0]
+        return None
+
+    def _has_priority_waiters(self, lane: str) -> bool:
+        """Whether work in this lane or a higher-priority one is already waiting."""
+        for other in LANES:
+            if self._waiting[other]:
+                return True
+            if other == lane:
+                return False
+        return False
+
+    def retry_after(self) -> int:
+        """Estimated seconds until the current backlog has been worked off."""
+        backlog = self._in_flight + sum(len(waiting) for waiting in self._waiting.values())
+        return max(1, math.ceil(self._seconds_per_document * backlog / self.max_in_flight))
+
+    def check(self, lane: str = "interactive"):
+        """Reject early, before any work is done, if the lane's queue is already full."""
+        with self._cond:
+            self._check_capacity(lane, weight=1)
+
+    def _check_capacity(self, lane: str, weight: int):
+        limit = self.max_queued.get(lane)
+        if self._in_flight + weight <= self.max_in_flight and not self._has_priority_waiters(lane):
+            return
+        if limit is not None and len(self._waiting[lane]) >= limit:
+            self._counters[lane]["rejected"] += 1
+            raise OCRBusy(lane, self.retry_after())
+
+    @contextmanager
+    def slot(self, lane: str = "interactive", weight: int = 1) -> Iterator[None]:
+        """
+        Hold OCR capacity for the duration of the block.
+
+        Args:
+            lane: One of LANES
+            weight: Slots to hold (e.g. the processes of a re-extraction chunk)
+
+        Raises:
+            OCRBusy: If the lane's queue is full or the wait exceeds the lane's queue timeout
+        """
+        weight = min(max(1, weight), self.max_in_flight)
+        ticket = object()
+
+        with self._cond:
+            self._check_capacity(lane, weight)
+            if self._in_flight + weight > self.max_in_flight or self._has_priority_waiters(lane):
+                self._waiting[lane].append(ticket)
+                self._counters[lane]["queued"] += 1
+                timeout = self.queue_timeout.get(lane)
+                deadline = time.monotonic() + timeout if timeout else None
+                try:
+                    while self._next_waiter() is not ticket or self._in_flight + weight > self.max_in_flight:
+                        remaining = deadline - time.monotonic() if deadline else None
+                        if remaining is not None and remaining <= 0:
+                            self._counters[lane]["rejected"] += 1
+                            raise OCRBusy(lane, self.retry_after())
+                        self._cond.wait(remaining)
+                finally:
+                    self._waiting[lane].remove(ticket)
+                    # The next waiter may be able to go now
+                    self._cond.notify_all()
+            self._in_flight += weight
+            self._counters[lane]["admitted"] += 1
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - started) / weight
+            with self._cond:
+                self._in_flight -= weight
+                # Moving average of the time one slot is held, for Retry-After
+                self._seconds_per_document += 0.2 * (elapsed - self._seconds_per_document)
+                self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "max_in_flight": self.max_in_flight,
+                "in_flight": self._in_flight,
+                "threads_per_document": threads_per_document(),
+                "seconds_per_document": round(self._seconds_per_document, 3),
+                "lanes": {
+                    lane: {
+                        "waiting": len(self._waiting[lane]),
+                        "max_queued": self.max_queued.get(lane),
+                        **self._counters[lane]
+                    }
+                    for lane in LANES
+                },
+            }
+
+
+@lru_cache()
+def get_ocr_scheduler() -> OCRScheduler:
+    """Get the process-wide OCR scheduler."""
+    return OCRScheduler(
+        max_in_flight=max_in_flight(),
+        max_queued={
+            "interactive": settings.ocr_max_queued,
+            "batch": settings.ocr_max_queued_batch,
+            "background": None,
+        },
+        queue_timeout={
+            "interactive": settings.ocr_queue_timeout_seconds,
+            "batch": settings.ocr_queue_timeout_seconds,
+            # Nobody waits on a re-extraction's response; it yields to uploads instead of failing halfway
+            "background": None,
+        }
+    )
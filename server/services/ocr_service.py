@@ -2,10 +2,13 @@ import pytesseract
 import cv2
 import numpy as np
 from PIL import Image
-import re
 import os
-from typing import Optional, Tuple, Dict
+import threading
+import time
+from typing import Callable, Optional, Tuple, Dict, Union
 from config import get_settings
+from services.field_extractor import FieldExtractor
+from services.ocr_scheduler import threads_per_document
 
 settings = get_settings()
 
@@ -13,53 +16,288 @@ settings = get_settings()
 if settings.tesseract_cmd and os.path.exists(settings.tesseract_cmd):
     pytesseract.pytesseract.tesseract_cmd = settings.tesseract_cmd
 
+# Documents processed at the same time share the CPUs instead of each
+# tesseract/OpenCV call spreading over all of them (an explicit
+# OMP_THREAD_LIMIT in the environment wins)
+os.environ.setdefault("OMP_THREAD_LIMIT", str(threads_per_document()))
+cv2.setNumThreads(threads_per_document())
+
+
+# Canonical size of a warped ID card (ISO/IEC 7810 ID-1, 85.60 x 53.98 mm, at ~300 dpi)
+CARD_LONG_SIDE = 1012
+CARD_SHORT_SIDE = 638
+
+# Longest side of the downscaled copy the card outline is searched on
+CARD_DETECT_MAX_SIDE = 640
+
+# Bytes of working memory per decoded pixel: the BGR image, its grayscale copy
+# for OCR, the grayscale copy for face detection and denoising strips
+WORKING_BYTES_PER_PIXEL = 6
+
+# Reduced decoding factors OpenCV supports (JPEG scales while decoding)
+REDUCED_COLOR_FLAGS = {
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+# Denoising runs over horizontal strips of this many rows, plus a margin of
+# search window + template radius rows so strip seams match a full-image pass
+DENOISE_STRIP_ROWS = 1024
+DENOISE_TEMPLATE_SIZE = 7
+DENOISE_SEARCH_SIZE = 21
+DENOISE_MARGIN = DENOISE_SEARCH_SIZE // 2 + DENOISE_TEMPLATE_SIZE // 2
+
 
 class OCRService:
     """Service for OCR text extraction from documents."""
     
+    # Cascade classifiers are not safe to share between threads, so cache one per thread
+    _thread_state = threading.local()
+    
+    @staticmethod
+    def get_face_cascade():
+        """Load the face detector once per thread and reuse it across documents."""
+        cascade = getattr(OCRService._thread_state, 'face_cascade', None)
+        if cascade is None:
+            cascade = cv2.CascadeClassifier(
+                cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+            )
+            OCRService._thread_state.face_cascade = cascade
+        return cascade
+    
     @staticmethod
-    def preprocess_image(image_path: str) -> np.ndarray:
+    def warm_up():
         """
-        Preprocess image for better OCR results.
+        Preload the OCR engines and models so the first upload does not pay for them.
+        Runs tesseract once on a small blank image to page in its language data.
+        """
+        OCRService.get_face_cascade()
+        blank = np.full((64, 256), 255, dtype=np.uint8)
+        pytesseract.image_to_string(blank, lang='eng')
+    
+    @staticmethod
+    def image_size(image_path: str) -> Optional[Tuple[int, int]]:
+        """Read an image's (width, height) from its header without decoding it, or None."""
+        try:
+            with Image.open(image_path) as img:
+                return img.size
+        except Image.DecompressionBombError:
+            raise ValueError(f"Image too large: {os.path.basename(image_path)}")
+        except Exception:
+            return None
+    
+    @staticmethod
+    def decode_factor(width: int, height: int) -> int:
+        """
+        Pick the reduced-decoding factor (1, 2, 4 or 8) for an image.
+        
+        The factor is the smallest one that fits the per-document memory
+        budget, raised while the reduced image still has at least
+        settings.ocr_max_side pixels on its long side (no OCR detail is lost).
+        """
+        budget_pixels = settings.ocr_memory_budget_mb * 1024 * 1024 / WORKING_BYTES_PER_PIXEL
+        factor = 1
+        while factor < 8 and width * height / (factor * factor) > budget_pixels:
+            factor *= 2
+        while factor < 8 and max(width, height) / (factor * 2) >= settings.ocr_max_side:
+            factor *= 2
+        return factor
+    
+    @staticmethod
+    def load_document(image_path: str) -> Optional[np.ndarray]:
+        """
+        Decode a document within the per-document memory budget.
+        
+        Images above settings.ocr_max_pixels are rejected before decoding.
+        Larger images are decoded at reduced resolution (JPEGs scale inside
+        the decoder and never exist at full size) and downscaled so the long
+        side is at most settings.ocr_max_side.
         
         Args:
             image_path: Path to the image file
             
+        Returns:
+            BGR image, or None if OpenCV cannot decode the file (e.g. a PDF)
+            
+        Raises:
+            ValueError: If the image has more pixels than allowed
+        """
+        size = OCRService.image_size(image_path)
+        factor = 1
+        if size is not None:
+            width, height = size
+            if width * height > settings.ocr_max_pixels:
+                raise ValueError(
+                    f"Image too large: {width}x{height} pixels (limit {settings.ocr_max_pixels})"
+                )
+            factor = OCRService.decode_factor(width, height)
+        
+        img = cv2.imread(image_path, REDUCED_COLOR_FLAGS.get(factor, cv2.IMREAD_COLOR))
+        if img is None:
+            return None
+        
+        scale = settings.ocr_max_side / max(img.shape[:2])
+        if scale < 1.0:
+            img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        return img
+    
+    @staticmethod
+    def load_image(image_path: str) -> np.ndarray:
+        """Read an image file as a BGR array (within the memory budget, see load_document)."""
+        img = OCRService.load_document(image_path)
+        if img is None:
+            raise ValueError(f"Could not read image: {os.path.basename(image_path)}")
+        return img
+    
+    @staticmethod
+    def order_corners(points: np.ndarray) -> np.ndarray:
+        """Order four points as top-left, top-right, bottom-right, bottom-left."""
+        points = points.reshape(4, 2).astype(np.float32)
+        sums = points.sum(axis=1)
+        diffs = np.diff(points, axis=1).ravel()
+        return np.array([
+            points[np.argmin(sums)],
+            points[np.argmin(diffs)],
+            points[np.argmax(sums)],
+            points[np.argmax(diffs)],
+        ], dtype=np.float32)
+    
+    @staticmethod
+    def find_card_outline(img: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Find the outline of an ID card in a photo.
+        
+        Edges are searched on a downscaled copy; the largest convex quadrilateral
+        covering at least settings.card_min_area_ratio of the frame wins.
+        
+        Args:
+            img: BGR image
+            
+        Returns:
+            Four corners in full-resolution coordinates (ordered), or None
+        """
+        height, width = img.shape[:2]
+        scale = min(1.0, CARD_DETECT_MAX_SIDE / max(height, width))
+        small = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else img
+        
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        gray = cv2.GaussianBlur(gray, (5, 5), 0)
+        edges = cv2.Canny(gray, 50, 150)
+        edges = cv2.dilate(edges, np.ones((3, 3), np.uint8), iterations=1)
+        
+        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        min_area = settings.card_min_area_ratio * small.shape[0] * small.shape[1]
+        
+        for contour in sorted(contours, key=cv2.contourArea, reverse=True)[:5]:
+            if cv2.contourArea(contour) < min_area:
+                break
+            approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+            if len(approx) == 4 and cv2.isContourConvex(approx):
+                return OCRService.order_corners(approx / scale)
+        
+        return None
+    
+    @staticmethod
+    def crop_card(img: np.ndarray) -> Tuple[np.ndarray, bool]:
+        """
+        Crop a photo to the ID card it contains and warp it to the canonical card size.
+        
+        Args:
+            img: BGR image
+            
+        Returns:
+            (card image, True) or (the unchanged image, False) if no card outline was found
+        """
+        corners = OCRService.find_card_outline(img)
+        if corners is None:
+            return img, False
+        
+        top_left, top_right, bottom_right, bottom_left = corners
+        width = max(np.linalg.norm(top_right - top_left), np.linalg.norm(bottom_right - bottom_left))
+        height = max(np.linalg.norm(bottom_left - top_left), np.linalg.norm(bottom_right - top_right))
+        
+        # Keep the card's orientation; the photo was taken either way up
+        if width >= height:
+            size = (CARD_LONG_SIDE, CARD_SHORT_SIDE)
+        else:
+            size = (CARD_SHORT_SIDE, CARD_LONG_SIDE)
+        
+        target = np.array([
+            [0, 0], [size[0] - 1, 0], [size[0] - 1, size[1] - 1], [0, size[1] - 1]
+        ], dtype=np.float32)
+        matrix = cv2.getPerspectiveTransform(corners, target)
+        return cv2.warpPerspective(img, matrix, size, flags=cv2.INTER_AREA), True
+    
+    @staticmethod
+    def preprocess_image(image: Union[str, np.ndarray]) -> np.ndarray:
+        """
+        Preprocess image for better OCR results.
+        
+        Args:
+            image: Path to the image file, or a BGR image
+            
         Returns:
             Preprocessed image as numpy array
         """
         # Read image
-        img = cv2.imread(image_path)
+        img = OCRService.load_image(image) if isinstance(image, str) else image
         
-        # Convert to grayscale
+        # Convert to grayscale; every later step works in this one buffer
         gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
         
         # Apply thresholding to make text more clear
-        _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=gray)
         
         # Denoise
-        denoised = cv2.fastNlMeansDenoising(thresh, None, 10, 7, 21)
+        OCRService.denoise_in_place(gray)
         
         # Apply slight dilation to make text thicker
         kernel = np.ones((1, 1), np.uint8)
-        processed = cv2.dilate(denoised, kernel, iterations=1)
+        cv2.dilate(gray, kernel, dst=gray, iterations=1)
+        
+        return gray
+    
+    @staticmethod
+    def denoise_in_place(gray: np.ndarray, strip_rows: int = DENOISE_STRIP_ROWS):
+        """
+        Non-local means denoising of a grayscale image, written back into it.
+        
+        Runs strip by strip with DENOISE_MARGIN rows of context on each side,
+        so only one strip's temporaries exist at a time; the result equals a
+        single full-image pass.
+        """
+        height = gray.shape[0]
+        above = gray[0:0].copy()  # original rows just above the current strip
         
-        return processed
+        for top in range(0, height, strip_rows):
+            bottom = min(top + strip_rows, height)
+            below = min(bottom + DENOISE_MARGIN, height)
+            # Rows from top down are still original; rows above were already overwritten
+            window = np.vstack((above, gray[top:below])) if len(above) else gray[top:below]
+            denoised = cv2.fastNlMeansDenoising(window, None, 10, DENOISE_TEMPLATE_SIZE, DENOISE_SEARCH_SIZE)
+            
+            above = gray[max(top, bottom - DENOISE_MARGIN):bottom].copy()
+            offset = window.shape[0] - (below - top)
+            gray[top:bottom] = denoised[offset:offset + bottom - top]
     
     @staticmethod
-    def extract_text(image_path: str) -> str:
+    def extract_text(image: Union[str, np.ndarray], on_preprocessed: Optional[Callable[[], None]] = None) -> str:
         """
         Extract text from image using OCR.
         
         Args:
-            image_path: Path to the image file
+            image: Path to the image file, or a BGR image
+            on_preprocessed: Called between preprocessing and tesseract
             
         Returns:
             Extracted text
         """
         try:
             # Preprocess image
-            processed_img = OCRService.preprocess_image(image_path)
+            processed_img = OCRService.preprocess_image(image)
+            if on_preprocessed:
+                on_preprocessed()
             
             # Perform OCR
             text = pytesseract.image_to_string(processed_img, lang='eng')
@@ -80,111 +318,29 @@ class OCRService:
         Returns:
             Dictionary with extracted student information
         """
-        data = {
-            'student_id': None,
-            'full_name': None,
-            'email': None,
-            'phone': None,
-            'department': None,
-            'program': None,
-            'year_of_study': None,
-        }
-        
-        # Normalize text
-        text = text.replace('\n', ' ').replace('\r', ' ')
-        
-        # Extract Student ID (various formats)
-        student_id_patterns = [
-            r'(?:Student\s*ID|ID\s*No|ID\s*Number|Matric\s*No)[:\s]*([A-Z0-9\-/]+)',
-            r'\b([A-Z]{2,}\d{4,})\b',  # Format like CS20221234
-            r'\b(\d{6,10})\b',  # Pure numeric IDs
-        ]
-        
-        for pattern in student_id_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                data['student_id'] = match.group(1).strip()
-                break
-        
-        # Extract Name
-        name_patterns = [
-            r'(?:Name|Student\s*Name|Full\s*Name)[:\s]*([A-Za-z\s]{3,50}?)(?:\s*(?:ID|Student|Department|DOB|Date)|\s*\d|\s*$)',
-            r'(?:^|\n)([A-Z][a-z]+(?:\s+[A-Z][a-z]+){1,3})(?:\s|$)',
-        ]
-        
-        for pattern in name_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                name = match.group(1).strip()
-                if len(name) > 5:  # Reasonable name length
-                    data['full_name'] = name
-                    break
-        
-        # Extract Email
-        email_pattern = r'\b([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})\b'
-        email_match = re.search(email_pattern, text)
-        if email_match:
-            data['email'] = email_match.group(1)
-        
-        # Extract Phone
-        phone_patterns = [
-            r'(?:Phone|Tel|Mobile|Contact)[:\s]*([+\d\s\-()]{10,20})',
-            r'\b(\+?\d{1,4}[\s\-]?\(?\d{1,4}\)?[\s\-]?\d{3,4}[\s\-]?\d{3,4})\b',
-        ]
-        
-        for pattern in phone_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                data['phone'] = match.group(1).strip()
-                break
-        
-        # Extract Department
-        dept_pattern = r'(?:Department|Dept|Faculty)[:\s]*([A-Za-z\s&]{3,50}?)(?:\s*(?:Program|Course|Year|Student)|\s*$)'
-        dept_match = re.search(dept_pattern, text, re.IGNORECASE)
-        if dept_match:
-            data['department'] = dept_match.group(1).strip()
-        
-        # Extract Program
-        program_pattern = r'(?:Program|Course|Major)[:\s]*([A-Za-z\s&]{3,50}?)(?:\s*(?:Year|Level|Student)|\s*$)'
-        program_match = re.search(program_pattern, text, re.IGNORECASE)
-        if program_match:
-            data['program'] = program_match.group(1).strip()
-        
-        # Extract Year of Study
-        year_patterns = [
-            r'(?:Year|Level|Class)[:\s]*(\d{1,2}|First|Second|Third|Fourth|Final)',
-            r'\b(Year\s*\d|Level\s*\d)\b',
-        ]
-        
-        for pattern in year_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                data['year_of_study'] = match.group(1).strip()
-                break
-        
-        return data
+        return FieldExtractor.extract_student_data(text)
     
     @staticmethod
-    def detect_and_extract_photo(image_path: str, output_dir: str) -> Optional[str]:
+    def detect_and_extract_photo(image_path: str, output_dir: str, img: Optional[np.ndarray] = None) -> Optional[str]:
         """
         Detect and extract student photo from document.
         
         Args:
             image_path: Path to the document image
             output_dir: Directory to save extracted photo
+            img: Already loaded (and cropped) BGR image of the document
             
         Returns:
             Path to extracted photo or None
         """
         try:
             # Read image
-            img = cv2.imread(image_path)
+            if img is None:
+                img = OCRService.load_image(image_path)
             gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
             
             # Load face cascade
-            face_cascade = cv2.CascadeClassifier(
-                cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-            )
+            face_cascade = OCRService.get_face_cascade()
             
             # Detect faces
             faces = face_cascade.detectMultiScale(
@@ -224,13 +380,15 @@ class OCRService:
             return None
     
     @staticmethod
-    def process_document(image_path: str, output_dir: str) -> Dict:
+    def process_document(image_path: str, output_dir: str, progress: Optional[Callable[[str], None]] = None) -> Dict:
         """
         Complete document processing: OCR + photo extraction.
         
         Args:
             image_path: Path to the document image
             output_dir: Directory for saving processed files
+            progress: Called with each stage name as it finishes (decoded,
+                card_detected, preprocessed, ocr_done, fields_extracted, photo_extracted)
             
         Returns:
             Dictionary with processing results
@@ -241,28 +399,57 @@ class OCRService:
             'student_data': None,
             'photo_path': None,
             'photo_extracted': False,
+            'card_detected': False,
+            'timings': {},
             'error': None
         }
+        timings = result['timings']
+        started = time.perf_counter()
+        
+        def lap(stage: str, event: str):
+            nonlocal started
+            now = time.perf_counter()
+            timings[stage] = round((now - started) * 1000, 1)
+            started = now
+            if progress:
+                progress(event)
         
         try:
+            # Decode once, within the memory budget; None (e.g. a PDF) falls
+            # through to the per-stage error handling
+            img = OCRService.load_document(image_path)
+            lap('load', 'decoded')
+            
+            # Crop to the card so the later stages only see the document
+            if img is not None and settings.card_detection:
+                img, result['card_detected'] = OCRService.crop_card(img)
+                lap('detect_card', 'card_detected')
+            
             # Extract text
-            text = OCRService.extract_text(image_path)
+            text = OCRService.extract_text(
+                img if img is not None else image_path,
+                on_preprocessed=lambda: lap('preprocess', 'preprocessed')
+            )
             result['extracted_text'] = text
+            lap('ocr', 'ocr_done')
             
             # Extract structured data
             if text:
                 student_data = OCRService.extract_student_data(text)
                 result['student_data'] = student_data
+            lap('extract_fields', 'fields_extracted')
             
             # Extract photo
-            photo_path = OCRService.detect_and_extract_photo(image_path, output_dir)
+            photo_path = OCRService.detect_and_extract_photo(image_path, output_dir, img=img)
             if photo_path:
                 result['photo_path'] = photo_path
                 result['photo_extracted'] = True
+            lap('photo', 'photo_extracted')
             
             result['success'] = True
             
         except Exception as e:
             result['error'] = str(e)
         
+        timings['total'] = round(sum(timings.values()), 1)
         return result
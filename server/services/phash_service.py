@@ -0,0 +1,265 @@
+import threading
+import time
+from array import array
+from itertools import combinations
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from models import DocumentFingerprint, Student
+
+settings = get_settings()
+
+HASH_BITS = 64
+
+
+def to_signed64(value: int) -> int:
+    """Map an unsigned 64-bit hash onto a signed BIGINT column."""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def from_signed64(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+class HammingIndex:
+    """
+    Multi-index hashing over 64-bit hashes.
+
+    Each hash is split into CHUNKS 16-bit substrings, each with its own bucket
+    table. Two hashes within Hamming distance r agree to within r // CHUNKS
+    bits on at least one substring (pigeonhole), so a lookup only probes the
+    buckets of substrings close to the query's and verifies those candidates.
+    At 1M hashes a bucket holds ~15 entries, so lookups up to distance 7 (one
+    flipped bit per substring, 17 buckets each) stay under a millisecond. From
+    distance 8 every substring probes 137 buckets and lookups take a few ms.
+
+    Removed and replaced hashes leave tombstoned slots behind; once they make
+    up a quarter of the slots the index is rebuilt from the live ones.
+    """
+
+    CHUNKS = 4
+    CHUNK_BITS = HASH_BITS // CHUNKS
+    CHUNK_MASK = (1 << CHUNK_BITS) - 1
+    # Fewest tombstones worth a rebuild, and their largest share of the slots
+    COMPACT_MIN_TOMBSTONES = 1024
+    COMPACT_RATIO = 0.25
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hashes = array('Q')
+        self._ids = array('q')
+        self._position: Dict[int, int] = {}  # doc id -> slot
+        self._tables: List[Dict[int, array]] = [dict() for _ in range(self.CHUNKS)]
+        self._flip_masks: Dict[int, List[int]] = {}
+        self._tombstones = 0
+
+    def __len__(self) -> int:
+        return len(self._position)
+
+    def _chunks(self, value: int):
+        for i in range(self.CHUNKS):
+            yield i, (value >> (i * self.CHUNK_BITS)) & self.CHUNK_MASK
+
+    def _masks(self, radius: int) -> List[int]:
+        """All 16-bit masks with at most `radius` bits set."""
+        masks = self._flip_masks.get(radius)
+        if masks is None:
+            masks = [0]
+            for bits in range(1, radius + 1):
+                for positions in combinations(range(self.CHUNK_BITS), bits):
+                    masks.append(sum(1 << p for p in positions))
+            self._flip_masks[radius] = masks
+        return masks
+
+    def add(self, doc_id: int, value: int):
+        """Add or replace the hash of a document."""
+        with self._lock:
+            if doc_id in self._position:
+                self._remove_locked(doc_id)
+            self._append_locked(doc_id, value)
+
+    def _append_locked(self, doc_id: int, value: int):
+        slot = len(self._hashes)
+        self._hashes.append(value)
+        self._ids.append(doc_id)
+        self._position[doc_id] = slot
+        for i, chunk in self._chunks(value):
+            bucket = self._tables[i].get(chunk)
+            if bucket is None:
+                bucket = self._tables[i][chunk] = array('I')
+            bucket.append(slot)
+
+    def remove(self, doc_id: int):
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id: int):
+        # Tombstone the slot; bucket entries pointing at it are skipped on lookup
+        slot = self._position.pop(doc_id, None)
+        if slot is None:
+            return
+        self._ids[slot] = -1
+        self._tombstones += 1
+        if self._tombstones >= max(self.COMPACT_MIN_TOMBSTONES, len(self._hashes) * self.COMPACT_RATIO):
+            self._compact_locked()
+
+    def _compact_locked(self):
+        """Rebuild the slots and bucket tables without tombstones."""
+        live = [(doc_id, value) for doc_id, value in zip(self._ids, self._hashes) if doc_id >= 0]
+        self._hashes = array('Q')
+        self._ids = array('q')
+        self._position = {}
+        self._tables = [dict() for _ in range(self.CHUNKS)]
+        self._tombstones = 0
+        for doc_id, value in live:
+            self._append_locked(doc_id, value)
+
+    def search(self, value: int, max_distance: int, limit: int = 10) -> List[Tuple[int, int]]:
+        """
+        Find documents whose hash is within max_distance bits of value.
+
+        Returns:
+            (doc id, distance) pairs, closest first
+        """
+        masks = self._masks(max_distance // self.CHUNKS)
+        found = {}
+
+        with self._lock:
+            # Read under the lock: compaction replaces the arrays
+            hashes, ids = self._hashes, self._ids
+            for i, chunk in self._chunks(value):
+                table = self._tables[i]
+                for mask in masks:
+                    bucket = table.get(chunk ^ mask)
+                    if not bucket:
+                        continue
+                    for slot in bucket:
+                        distance = (hashes[slot] ^ value).bit_count()
+                        if distance <= max_distance:
+                            found[slot] = distance
+
+            matches = [(ids[slot], distance) for slot, distance in found.items() if ids[slot] >= 0]
+
+        matches.sort(key=lambda match: match[1])
+        return matches[:limit]
+
+
+class PHashService:
+    """Service for perceptual hashing and near-duplicate lookup of uploaded scans."""
+
+    _index = HammingIndex()
+    _sync_lock = threading.Lock()
+    _last_row_id = 0
+    _last_sync = 0.0
+    _last_full_sync = 0.0
+
+    @staticmethod
+    def compute(image_path: str) -> Optional[int]:
+        """
+        Compute the 64-bit difference hash (dHash) of an image.
+
+        The image is reduced to 9x8 grayscale and each bit records whether a
+        pixel is brighter than its right neighbour, so re-photographs of the
+        same card land within a few bits of each other.
+
+        Returns:
+            Unsigned 64-bit hash, or None if the file cannot be decoded as an image
+        """
+        try:
+            from PIL import Image
+        except ImportError:
+            return None
+
+        try:
+            with Image.open(image_path) as img:
+                img.draft("L", (64, 64))
+                pixels = list(img.convert("L").resize((9, 8), Image.BILINEAR).getdata())
+        except Exception:
+            return None
+
+        value = 0
+        for row in range(8):
+            for col in range(8):
+                left = pixels[row * 9 + col]
+                right = pixels[row * 9 + col + 1]
+                value = (value << 1) | (1 if left > right else 0)
+        return value
+
+    @staticmethod
+    def sync(db: Session, force: bool = False):
+        """
+        Load fingerprints added since the last sync (including by other processes)
+        into the in-memory index.
+
+        Ids are assigned at insert but rows commit later, so a lower id can
+        become visible after a higher one was loaded. Each sync therefore
+        re-reads the last phash_sync_overlap_rows ids below the cursor, and
+        every phash_full_sync_seconds all rows are re-read in case a
+        transaction stayed open longer than that. Re-adding a loaded row
+        only replaces its entry.
+        """
+        now = time.monotonic()
+        if not force and now - PHashService._last_sync < settings.phash_sync_seconds:
+            return
+
+        with PHashService._sync_lock:
+            full = bool(settings.phash_full_sync_seconds) and (
+                now - PHashService._last_full_sync >= settings.phash_full_sync_seconds
+            )
+            after_id = 0 if full else max(PHashService._last_row_id - settings.phash_sync_overlap_rows, 0)
+            rows = db.query(
+                DocumentFingerprint.id,
+                DocumentFingerprint.student_id,
+                DocumentFingerprint.phash
+            ).filter(
+                DocumentFingerprint.id > after_id
+            ).order_by(DocumentFingerprint.id).yield_per(10000)
+
+            for row_id, student_id, phash in rows:
+                PHashService._index.add(student_id, from_signed64(phash))
+                PHashService._last_row_id = max(PHashService._last_row_id, row_id)
+            PHashService._last_sync = now
+            if full:
+                PHashService._last_full_sync = now
+
+    @staticmethod
+    def find_duplicate(db: Session, phash: Optional[int]) -> Optional[Tuple[int, int]]:
+        """
+        Find an existing document within settings.phash_max_distance of a hash.
+
+        Returns:
+            (student database id, distance) of the closest match, or None
+        """
+        if phash is None:
+            return None
+
+        PHashService.sync(db)
+        for student_id, distance in PHashService._index.search(phash, settings.phash_max_distance):
+            # Matches may come from students another process has since deleted
+            if db.query(Student.id).filter(Student.id == student_id).first():
+                return student_id, distance
+            PHashService._index.remove(student_id)
+        return None
+
+    @staticmethod
+    def record(db: Session, student_id: int, phash: int, file_key: Optional[str] = None):
+        """Store a student's fingerprint (call inside the ingest transaction)."""
+        fingerprint = db.query(DocumentFingerprint).filter(DocumentFingerprint.student_id == student_id).first()
+        if fingerprint:
+            # Re-insert so other processes pick the new hash up by id
+            db.delete(fingerprint)
+            db.flush()
+        db.add(DocumentFingerprint(student_id=student_id, phash=to_signed64(phash), file_key=file_key))
+
+    @staticmethod
+    def indexed(student_id: int, phash: int):
+        """Add a committed fingerprint to the in-memory index."""
+        PHashService._index.add(student_id, phash)
+
+    @staticmethod
+    def forget(student_ids: List[int]):
+        """Drop deleted students from the in-memory index."""
+        for student_id in student_ids:
+            PHashService._index.remove(student_id)
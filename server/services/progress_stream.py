@@ -0,0 +1,71 @@
+import asyncio
+import json
+import time
+from typing import AsyncIterator, Optional
+
+# Comment line sent while no stage has finished, so proxies keep the stream open
+KEEPALIVE_SECONDS = 15
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # stop nginx from buffering the stream
+}
+
+
+def format_event(event: str, data: str) -> str:
+    """Format one Server-Sent Event; data must be a single line (e.g. compact JSON)."""
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+class ProgressStream:
+    """
+    Stage events of one upload as Server-Sent Events.
+
+    Stages are reported from the thread running the upload pipeline (emit()
+    is thread-safe) and read on the event loop by events(). Each stage event
+    carries the time since the upload was received and since the previous
+    stage. The stream ends with a "result" or "error" event.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.started = time.perf_counter()
+        self.last = self.started
+
+    def _put(self, item):
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, item)
+
+    def emit(self, stage: str, **data):
+        """Report that a stage has finished."""
+        now = time.perf_counter()
+        event = {
+            "stage": stage,
+            "elapsed_ms": round((now - self.started) * 1000, 1),
+            "duration_ms": round((now - self.last) * 1000, 1),
+            **data
+        }
+        self.last = now
+        self._put(("stage", json.dumps(event)))
+
+    def result(self, body: str):
+        """Send the final response body (JSON) as the "result" event."""
+        self._put(("result", body))
+
+    def error(self, status_code: int, detail: str, **data):
+        self._put(("error", json.dumps({"status_code": status_code, "detail": detail, **data})))
+
+    def close(self):
+        self._put(None)
+
+    async def events(self) -> AsyncIterator[str]:
+        while True:
+            try:
+                item: Optional[tuple] = await asyncio.wait_for(self.queue.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if item is None:
+                return
+            yield format_event(*item)
+
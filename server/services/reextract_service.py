@@ -0,0 +1,259 @@
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from models import Student
+from text_codec import decompress_text
+from services.field_extractor import FieldExtractor
+from services.ocr_scheduler import get_ocr_scheduler
+from services.response_cache import get_response_cache
+from services.rollup_service import RollupService
+from services.stats_service import StatsService
+
+# Fields the extractor produces that may be overwritten by a re-extraction
+REEXTRACT_FIELDS = ('student_id', 'full_name', 'email', 'phone', 'department', 'program', 'year_of_study')
+
+PLACEHOLDER_ID_PREFIX = "UNKNOWN_"
+PLACEHOLDER_NAME = "Unknown Student"
+
+
+def _extract_many(texts: List[str]) -> List[Dict[str, Optional[str]]]:
+    """Run the extractor over a batch of texts (executed in worker processes)."""
+    return [FieldExtractor.extract_student_data(text) for text in texts]
+
+
+class ReextractService:
+    """
+    Re-apply the current field extractor to stored OCR text without re-running OCR.
+
+    Rows are streamed in id order in chunks, extraction runs in a process pool,
+    and only fields whose value changed are written, one bulk UPDATE per chunk.
+    """
+
+    # In-process registry of runs started from the admin endpoint
+    _runs: Dict[str, dict] = {}
+    _runs_lock = threading.Lock()
+
+    @staticmethod
+    def diff_row(row, extracted: Dict[str, Optional[str]], fields: Iterable[str], only_empty: bool) -> Dict[str, dict]:
+        """
+        Compare a stored row with freshly extracted fields.
+
+        Like the upload path, empty extracted values never overwrite stored ones.
+        student_id and full_name are only replaced while they are OCR placeholders,
+        so manual corrections are kept.
+
+        Returns:
+            Mapping of field to {"old": ..., "new": ...} for changed fields
+        """
+        changes = {}
+        for field in fields:
+            new_value = extracted.get(field)
+            old_value = getattr(row, field)
+            if not new_value or new_value == old_value:
+                continue
+            if only_empty and old_value:
+                continue
+            if field == 'student_id' and not (old_value or "").startswith(PLACEHOLDER_ID_PREFIX):
+                continue
+            if field == 'full_name' and old_value not in (None, "", PLACEHOLDER_NAME):
+                continue
+            changes[field] = {"old": old_value, "new": new_value}
+        return changes
+
+    @staticmethod
+    def run(
+        db: Session,
+        dry_run: bool = True,
+        fields: Optional[List[str]] = None,
+        only_empty: bool = False,
+        chunk_size: int = 500,
+        workers: Optional[int] = None,
+        diff_limit: int = 1000,
+        progress: Optional[Callable[[dict], None]] = None
+    ) -> dict:
+        """
+        Re-extract student fields from stored extracted_text.
+
+        Args:
+            db: Database session
+            dry_run: Report the diff without writing anything
+            fields: Fields to update, defaults to REEXTRACT_FIELDS
+            only_empty: Only fill fields that are currently empty
+            chunk_size: Rows read, extracted and updated per batch
+            workers: Extraction processes, defaults to the CPU count (1 runs in-process)
+            diff_limit: Maximum number of changed rows included in the report
+            progress: Called with the running report after every chunk
+
+        Returns:
+            Report with counts, per-field change counts and the (truncated) diff
+        """
+        fields = [field for field in (fields or REEXTRACT_FIELDS) if field in REEXTRACT_FIELDS]
+        workers = workers or os.cpu_count() or 1
+        columns = [Student.id, Student.extracted_text_compressed, Student.extracted_text_plain]
+        columns += [getattr(Student, field) for field in fields]
+        # Rollup key of each row, to move students whose department or program changes
+        columns += [getattr(Student, field) for field in ('department', 'program', 'created_at') if field not in fields]
+
+        report = {
+            "dry_run": dry_run,
+            "total": db.query(Student.id).filter(Student.has_extracted_text()).count(),
+            "scanned": 0,
+            "changed": 0,
+            "updated": 0,
+            "conflicts": 0,
+            "field_changes": {field: 0 for field in fields},
+            "diff": [],
+            "elapsed_seconds": 0.0,
+        }
+        started = time.perf_counter()
+
+        # spawn: never fork a threaded server process
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn")
+        ) if workers > 1 else None
+
+        try:
+            last_id = 0
+            while True:
+                # Keyset pagination keeps every chunk an index range scan
+                rows = db.query(*columns).filter(
+                    Student.id > last_id,
+                    Student.has_extracted_text()
+                ).order_by(Student.id).limit(chunk_size).all()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+
+                texts = [decompress_text(row.extracted_text_compressed, row.extracted_text_plain) for row in rows]
+                # Background lane: uploads waiting for OCR go before the next chunk
+                with get_ocr_scheduler().slot("background", weight=workers):
+                    if pool:
+                        batch = max(len(texts) // workers, 1)
+                        extracted = []
+                        for part in pool.map(_extract_many, [texts[i:i + batch] for i in range(0, len(texts), batch)]):
+                            extracted.extend(part)
+                    else:
+                        extracted = _extract_many(texts)
+
+                mappings = ReextractService._collect_changes(db, rows, extracted, fields, only_empty, report, diff_limit)
+
+                if mappings and not dry_run:
+                    ReextractService._move_rollups(db, rows, mappings)
+                    db.execute(update(Student), mappings)
+                    db.commit()
+                    report["updated"] += len(mappings)
+
+                report["scanned"] += len(rows)
+                report["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+                if progress:
+                    progress(report)
+
+        finally:
+            if pool:
+                pool.shutdown()
+
+        if report["updated"]:
+            StatsService.bulk_changed()
+            get_response_cache().invalidate_all()
+        return report
+
+    @staticmethod
+    def _move_rollups(db: Session, rows, mappings: List[dict]):
+        """Move re-extracted students whose department or program changed to their new rollup rows."""
+        by_id = {row.id: row for row in rows}
+        moved = [
+            (by_id[mapping["id"]], mapping) for mapping in mappings
+            if 'department' in mapping or 'program' in mapping
+        ]
+        RollupService.rows_changed(
+            db,
+            [(row.department, row.program, row.created_at) for row, _ in moved],
+            [
+                (mapping.get('department', row.department), mapping.get('program', row.program), row.created_at)
+                for row, mapping in moved
+            ]
+        )
+
+    @staticmethod
+    def _collect_changes(db: Session, rows, extracted, fields, only_empty: bool, report: dict, diff_limit: int) -> List[dict]:
+        changed_rows = []
+        claimed_ids = set()
+
+        for row, data in zip(rows, extracted):
+            changes = ReextractService.diff_row(row, data, fields, only_empty)
+            if 'student_id' in changes:
+                new_id = changes['student_id']['new']
+                if new_id in claimed_ids:
+                    del changes['student_id']
+                    report["conflicts"] += 1
+                else:
+                    claimed_ids.add(new_id)
+            if changes:
+                changed_rows.append((row, changes))
+
+        # A placeholder can only take a real student ID that no other row has
+        if claimed_ids:
+            taken = {
+                student_id for (student_id,) in
+                db.query(Student.student_id).filter(Student.student_id.in_(claimed_ids))
+            }
+            for row, changes in changed_rows:
+                if 'student_id' in changes and changes['student_id']['new'] in taken:
+                    del changes['student_id']
+                    report["conflicts"] += 1
+
+        mappings = []
+        for row, changes in changed_rows:
+            if not changes:
+                continue
+            report["changed"] += 1
+            for field in changes:
+                report["field_changes"][field] += 1
+            if len(report["diff"]) < diff_limit:
+                report["diff"].append({"id": row.id, "changes": changes})
+            mappings.append({"id": row.id, **{field: change["new"] for field, change in changes.items()}})
+        return mappings
+
+    @staticmethod
+    def start_background(run_kwargs: dict, session_factory) -> str:
+        """
+        Start a re-extraction in a background thread.
+
+        Returns:
+            Run ID to poll with get_run
+        """
+        run_id = uuid.uuid4().hex
+        state = {"id": run_id, "status": "running", "report": None, "error": None}
+        with ReextractService._runs_lock:
+            ReextractService._runs[run_id] = state
+
+        def progress(report: dict):
+            state["report"] = dict(report, diff=report["diff"][:50])
+
+        def target():
+            db = session_factory()
+            try:
+                state["report"] = ReextractService.run(db, progress=progress, **run_kwargs)
+                state["status"] = "done"
+            except Exception as e:
+                state["status"] = "failed"
+                state["error"] = str(e)
+            finally:
+                db.close()
+
+        threading.Thread(target=target, name=f"reextract-{run_id[:8]}", daemon=True).start()
+        return run_id
+
+    @staticmethod
+    def get_run(run_id: str) -> Optional[dict]:
+        """Get the state of a background run."""
+        return ReextractService._runs.get(run_id)
@@ -0,0 +1,127 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Dict, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import get_settings
+
+settings = get_settings()
+
+# Metrics of the request being handled; a mutable dict so that work run in
+# threadpools (which see a copy of the context) still adds to the same totals
+_current: ContextVar[Optional[Dict]] = ContextVar("request_metrics", default=None)
+
+# Longest statement text printed by the slow-query log
+MAX_STATEMENT_LENGTH = 1000
+
+
+class RequestMetrics:
+    """
+    Per-request query count, database time and stage timings.
+
+    SQLAlchemy cursor events time every statement on the engine. Statements
+    made while a request is being handled are added to that request's
+    metrics, which the HTTP middleware reports in a Server-Timing header.
+    Statements slower than SQL_SLOW_QUERY_MS are logged wherever they run.
+    """
+
+    @staticmethod
+    def install(engine: Engine):
+        """Attach the timing hooks to an engine (once per process)."""
+        if event.contains(engine, "before_cursor_execute", RequestMetrics._before_cursor_execute):
+            return
+        event.listen(engine, "before_cursor_execute", RequestMetrics._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", RequestMetrics._after_cursor_execute)
+        event.listen(engine, "handle_error", RequestMetrics._handle_error)
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @staticmethod
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        elapsed = time.perf_counter() - started
+
+        metrics = _current.get()
+        if metrics is not None:
+            metrics["queries"] += 1
+            metrics["db"] += elapsed
+
+        if settings.sql_slow_query_ms and elapsed * 1000 >= settings.sql_slow_query_ms:
+            where = f" in {metrics['method']} {metrics['path']}" if metrics is not None else ""
+            print(f"Slow query ({elapsed * 1000:.1f} ms{where}): {statement[:MAX_STATEMENT_LENGTH]}")
+
+    @staticmethod
+    def _handle_error(context):
+        # after_cursor_execute does not run for a failed statement; drop its start
+        # time so the stack stays balanced for the pooled connection's next query
+        conn = context.connection
+        if conn is None or context.execution_context is None:
+            return
+        stack = conn.info.get("query_started")
+        if not stack:
+            return
+        elapsed = time.perf_counter() - stack.pop()
+
+        metrics = _current.get()
+        if metrics is not None:
+            metrics["queries"] += 1
+            metrics["db"] += elapsed
+
+    @staticmethod
+    def start(method: str, path: str) -> Token:
+        """Start collecting metrics for a request; pass the token to finish()."""
+        return _current.set({
+            "method": method,
+            "path": path,
+            "started": time.perf_counter(),
+            "queries": 0,
+            "db": 0.0,
+            "ocr": 0.0,
+            "ser": 0.0,
+        })
+
+    @staticmethod
+    def finish(token: Token) -> Dict:
+        """Stop collecting and return the request's metrics (with the total time)."""
+        metrics = _current.get()
+        _current.reset(token)
+        metrics["total"] = time.perf_counter() - metrics["started"]
+
+        if settings.sql_query_count_warning and metrics["queries"] > settings.sql_query_count_warning:
+            print(
+                f"Warning: {metrics['method']} {metrics['path']} ran {metrics['queries']} queries "
+                f"({metrics['db'] * 1000:.1f} ms in the database)"
+            )
+        return metrics
+
+    @staticmethod
+    def current() -> Optional[Dict]:
+        """Metrics of the request being handled, if any."""
+        return _current.get()
+
+    @staticmethod
+    @contextmanager
+    def timed(stage: str) -> Iterator[None]:
+        """Add the time spent in the block to a stage of the current request ("ocr", "ser")."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            metrics = _current.get()
+            if metrics is not None:
+                metrics[stage] = metrics.get(stage, 0.0) + time.perf_counter() - started
+
+    @staticmethod
+    def server_timing(metrics: Dict) -> str:
+        """Format metrics as a Server-Timing header value (durations in milliseconds)."""
+        parts = [f'db;dur={metrics["db"] * 1000:.1f};desc="{metrics["queries"]} queries"']
+        for stage in ("ocr", "ser"):
+            if metrics.get(stage):
+                parts.append(f"{stage};dur={metrics[stage] * 1000:.1f}")
+        parts.append(f"total;dur={metrics['total'] * 1000:.1f}")
+        return ", ".join(parts)
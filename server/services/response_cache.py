@@ -0,0 +1,259 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from config import get_settings
+from services.export_cache import ExportCache
+
+settings = get_settings()
+
+
+class CacheBackend:
+    """Key-value store behind the response cache: byte values with a TTL plus integer counters."""
+
+    # Distinguishes counters that other processes (or a restart) may hold different values for
+    namespace = ""
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl_seconds: int):
+        raise NotImplementedError
+
+    def get_counters(self, keys: List[str]) -> List[int]:
+        """Read several counters at once; missing counters are 0."""
+        raise NotImplementedError
+
+    def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """In-process LRU backend. Also the stand-in for the shared backend in development."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._counters: Dict[str, int] = {}
+        # Counters live and die with this backend
+        self.namespace = uuid.uuid4().hex
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: bytes, ttl_seconds: int):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_counters(self, keys: List[str]) -> List[int]:
+        with self._lock:
+            return [self._counters.get(key, 0) for key in keys]
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = self._counters.get(key, 0) + 1
+            self._counters[key] = value
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisBackend(CacheBackend):
+    """Backend shared by all API processes and workers, so invalidations reach every process."""
+
+    def __init__(self, url: str):
+        # redis is only needed (and only imported) for the shared backend
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("The redis response cache backend requires the redis package (pip install -r requirements-optional.txt)")
+
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ttl_seconds: int):
+        self.client.set(key, value, ex=ttl_seconds)
+
+    def get_counters(self, keys: List[str]) -> List[int]:
+        return [int(value or 0) for value in self.client.mget(keys)]
+
+    def incr(self, key: str) -> int:
+        return self.client.incr(key)
+
+    def clear(self):
+        # Entries are namespaced by generation; bumping the generation is enough
+        pass
+
+
+class ResponseCache:
+    """
+    Cache of serialized responses for the student list and detail routes.
+
+    Keys embed generation counters instead of being deleted on writes:
+    - every list entry includes the "students" generation, bumped by any student write;
+    - a detail entry includes the generation of that one student, so editing a
+      student leaves the cached detail of every other student valid.
+    A write bumps the counters after it commits, so a response built from
+    older data can only be stored under a generation nobody reads any more.
+    Backend errors never fail a request; they count as misses.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: int, prefix: str = "rc"):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        self._stats_lock = threading.Lock()
+        self._stats = {"search": [0, 0], "student": [0, 0], "errors": 0}  # [hits, misses]
+
+    def _generations(self, *scopes: str) -> List[int]:
+        return self.backend.get_counters([f"{self.prefix}:gen:{scope}" for scope in scopes])
+
+    def search_key(self, query: Optional[str], page: int, page_size: int) -> Optional[str]:
+        """Build the key of a search page, or None if the backend is unreachable."""
+        try:
+            (generation,) = self._generations("students")
+        except Exception as e:
+            self._record_error(e)
+            return None
+        return f"{self.prefix}:search:{generation}:{page}:{page_size}:{ExportCache.normalize_query(query)}"
+
+    def student_key(self, student_id: int) -> Optional[str]:
+        """Build the key of a student detail response, or None if the backend is unreachable."""
+        try:
+            generation, student_generation = self._generations("all", f"student:{student_id}")
+        except Exception as e:
+            self._record_error(e)
+            return None
+        return f"{self.prefix}:student:{student_id}:{generation}:{student_generation}"
+
+    def data_version(self) -> Optional[str]:
+        """
+        Version of the student data that changes with every write that
+        invalidates the search pages, or None if the backend is unreachable.
+        """
+        try:
+            (generation,) = self._generations("students")
+        except Exception as e:
+            self._record_error(e)
+            return None
+        return f"{self.backend.namespace}:{generation}"
+
+    def get(self, kind: str, key: Optional[str]) -> Optional[bytes]:
+        """Look up a response, counting a hit or miss for the route kind ("search" or "student")."""
+        value = None
+        if key is not None:
+            try:
+                value = self.backend.get(key)
+            except Exception as e:
+                self._record_error(e)
+        with self._stats_lock:
+            self._stats[kind][0 if value is not None else 1] += 1
+        return value
+
+    def set(self, key: Optional[str], value: bytes):
+        if key is None:
+            return
+        try:
+            self.backend.set(key, value, self.ttl_seconds)
+        except Exception as e:
+            self._record_error(e)
+
+    def student_changed(self, *student_ids: int):
+        """Invalidate the search pages and the given students' details (call after commit)."""
+        try:
+            self.backend.incr(f"{self.prefix}:gen:students")
+            for student_id in student_ids:
+                self.backend.incr(f"{self.prefix}:gen:student:{student_id}")
+        except Exception as e:
+            self._record_error(e)
+
+    def invalidate_all(self):
+        """Invalidate every cached response, e.g. after a bulk update."""
+        try:
+            self.backend.incr(f"{self.prefix}:gen:students")
+            self.backend.incr(f"{self.prefix}:gen:all")
+        except Exception as e:
+            self._record_error(e)
+
+    def _record_error(self, error: Exception):
+        with self._stats_lock:
+            self._stats["errors"] += 1
+        print(f"Response cache error: {str(error)}")
+
+    def stats(self) -> dict:
+        """Hit/miss counters and hit rates of this process since start (or reset)."""
+        with self._stats_lock:
+            report = {"backend": type(self.backend).__name__, "errors": self._stats["errors"]}
+            hits_total = misses_total = 0
+            for kind in ("search", "student"):
+                hits, misses = self._stats[kind]
+                hits_total += hits
+                misses_total += misses
+                report[kind] = {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+                }
+            lookups = hits_total + misses_total
+            report["hit_rate"] = round(hits_total / lookups, 4) if lookups else None
+            return report
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats = {"search": [0, 0], "student": [0, 0], "errors": 0}
+
+
+class NullCache(ResponseCache):
+    """Response cache that never stores anything (RESPONSE_CACHE_BACKEND=off)."""
+
+    def __init__(self):
+        super().__init__(MemoryBackend(0), 0)
+
+    def search_key(self, query: Optional[str], page: int, page_size: int) -> Optional[str]:
+        return None
+
+    def student_key(self, student_id: int) -> Optional[str]:
+        return None
+
+    def data_version(self) -> Optional[str]:
+        return None
+
+    def student_changed(self, *student_ids: int):
+        pass
+
+    def invalidate_all(self):
+        pass
+
+
+@lru_cache()
+def get_response_cache() -> ResponseCache:
+    """Get the configured response cache."""
+    if settings.response_cache_backend == "off":
+        return NullCache()
+    if settings.response_cache_backend == "redis":
+        backend = RedisBackend(settings.response_cache_url)
+    else:
+        backend = MemoryBackend(settings.response_cache_max_entries)
+    return ResponseCache(backend, settings.response_cache_ttl_seconds)
@@ -0,0 +1,291 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: uploads are only serialized within one process
+    fcntl = None
+
+from config import get_settings
+
+settings = get_settings()
+
+PARTIAL_SUFFIX = ".partial"
+META_SUFFIX = ".json"
+UPLOAD_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class UploadNotFound(Exception):
+    """The upload does not exist, expired or was already finalized."""
+
+
+class UploadOffsetMismatch(Exception):
+    """A chunk was sent for an offset other than the upload's current one."""
+
+    def __init__(self, offset: int):
+        super().__init__(f"Upload is at offset {offset}")
+        self.offset = offset
+
+
+class ResumableUploadStore:
+    """
+    Partial uploads kept on disk until they are complete.
+
+    Each upload is <id>.partial (the bytes received so far) plus <id>.json
+    (file name, declared size and checksum, expiry). The size of the partial
+    file is the upload's offset, so an upload survives API restarts and can
+    be resumed by any process that shares the directory. Appends and
+    completion hold an exclusive flock on the partial file across the offset
+    check and the write, so API workers never append the same chunk twice.
+    A chunk is only appended after its SHA-256 matched, so the partial file
+    never holds unverified bytes. Uploads without a chunk for expiry_seconds are removed
+    by the sweeper.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, chunk_bytes: int, chunk_max_bytes: int, expiry_seconds: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.chunk_bytes = chunk_bytes
+        self.chunk_max_bytes = chunk_max_bytes
+        self.expiry_seconds = expiry_seconds
+        self._locks: Dict[str, list] = {}  # upload id -> [lock, threads holding or waiting]
+        self._locks_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, upload_id: str):
+        if not UPLOAD_ID_PATTERN.match(upload_id):
+            raise UploadNotFound(upload_id)
+        base = os.path.join(self.directory, upload_id)
+        return base + PARTIAL_SUFFIX, base + META_SUFFIX
+
+    @contextmanager
+    def _thread_lock(self, upload_id: str) -> Iterator[None]:
+        """Per-upload thread lock, dropped once no thread holds or waits for it."""
+        with self._locks_lock:
+            entry = self._locks.get(upload_id)
+            if entry is None:
+                entry = self._locks[upload_id] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._locks_lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[upload_id]
+
+    @contextmanager
+    def _locked(self, upload_id: str) -> Iterator[int]:
+        """
+        Hold the upload exclusively, across threads and processes, and yield
+        a descriptor of its partial file.
+        """
+        partial_path, _ = self._paths(upload_id)
+        with self._thread_lock(upload_id):
+            try:
+                # Never create: a finalized or aborted upload must stay gone
+                fd = os.open(partial_path, os.O_RDWR)
+            except FileNotFoundError:
+                raise UploadNotFound(upload_id)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                # Another process may have finalized or aborted it while we waited
+                if not os.path.exists(partial_path) or os.fstat(fd).st_ino != os.stat(partial_path).st_ino:
+                    raise UploadNotFound(upload_id)
+                yield fd
+            finally:
+                os.close(fd)  # releases the flock
+
+    def _write_meta(self, meta_path: str, meta: dict):
+        temp_path = f"{meta_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(temp_path, meta_path)
+
+    def _load(self, upload_id: str) -> dict:
+        partial_path, meta_path = self._paths(upload_id)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            offset = os.path.getsize(partial_path)
+        except (FileNotFoundError, ValueError):
+            raise UploadNotFound(upload_id)
+        if meta["expires_at"] < time.time():
+            self._remove(upload_id)
+            raise UploadNotFound(upload_id)
+        return {**meta, "offset": offset}
+
+    def create(self, filename: str, extension: str, size: int, sha256: Optional[str] = None) -> dict:
+        """
+        Start an upload.
+
+        Raises:
+            ValueError: If the declared size is out of range
+        """
+        if size <= 0 or size > self.max_bytes:
+            raise ValueError(f"Upload size must be between 1 and {self.max_bytes} bytes")
+
+        upload_id = uuid.uuid4().hex
+        partial_path, meta_path = self._paths(upload_id)
+        meta = {
+            "upload_id": upload_id,
+            "filename": filename,
+            "extension": extension,
+            "size": size,
+            "sha256": sha256.lower() if sha256 else None,
+            "created_at": time.time(),
+            "expires_at": time.time() + self.expiry_seconds,
+        }
+        open(partial_path, "wb").close()
+        self._write_meta(meta_path, meta)
+        return self.status(upload_id)
+
+    def status(self, upload_id: str) -> dict:
+        """Current offset and metadata of an upload."""
+        return {**self._load(upload_id), "chunk_size": self.chunk_bytes}
+
+    def append(self, upload_id: str, offset: int, data: bytes, sha256: str) -> dict:
+        """
+        Append one chunk.
+
+        Args:
+            upload_id: Upload to append to
+            offset: Byte offset the chunk starts at; must equal the current offset
+            data: Chunk bytes
+            sha256: Hex SHA-256 of the chunk
+
+        Raises:
+            UploadNotFound: If the upload does not exist (any more)
+            UploadOffsetMismatch: If offset is not the current offset (resend from the returned one)
+            ValueError: If the checksum does not match or the chunk is too large
+        """
+        if len(data) > self.chunk_max_bytes:
+            raise ValueError(f"Chunks are limited to {self.chunk_max_bytes} bytes")
+        if hashlib.sha256(data).hexdigest() != sha256.lower():
+            raise ValueError("Chunk checksum mismatch")
+
+        with self._locked(upload_id) as fd:
+            meta = self._load(upload_id)
+            if offset != meta["offset"]:
+                raise UploadOffsetMismatch(meta["offset"])
+            if offset + len(data) > meta["size"]:
+                raise ValueError("Chunk extends past the declared upload size")
+
+            _, meta_path = self._paths(upload_id)
+            os.lseek(fd, offset, os.SEEK_SET)
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            # Every chunk pushes the expiry out again
+            meta.pop("offset")
+            meta["expires_at"] = time.time() + self.expiry_seconds
+            self._write_meta(meta_path, meta)
+
+        return self.status(upload_id)
+
+    def complete(self, upload_id: str, target_path: str) -> dict:
+        """
+        Move a fully received upload to target_path and forget it.
+
+        Raises:
+            UploadNotFound: If the upload does not exist (any more)
+            UploadOffsetMismatch: If bytes are still missing (resume from the returned offset)
+            ValueError: If the whole-file checksum does not match; the upload is discarded
+        """
+        with self._locked(upload_id):
+            meta = self._load(upload_id)
+            if meta["offset"] != meta["size"]:
+                raise UploadOffsetMismatch(meta["offset"])
+
+            partial_path, meta_path = self._paths(upload_id)
+            if meta["sha256"]:
+                sha = hashlib.sha256()
+                with open(partial_path, "rb") as f:
+                    for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                        sha.update(block)
+                if sha.hexdigest() != meta["sha256"]:
+                    self._remove(upload_id)
+                    raise ValueError("File checksum mismatch, upload discarded")
+
+            shutil.move(partial_path, target_path)
+            os.remove(meta_path)
+
+        return meta
+
+    def restore(self, meta: dict, path: str):
+        """
+        Put a file taken with complete() back, e.g. when OCR had no room for it,
+        so finalize can be retried. The expiry starts over.
+        """
+        partial_path, meta_path = self._paths(meta["upload_id"])
+        shutil.move(path, partial_path)
+        meta = {key: value for key, value in meta.items() if key not in ("offset", "chunk_size")}
+        meta["expires_at"] = time.time() + self.expiry_seconds
+        self._write_meta(meta_path, meta)
+
+    def _remove(self, upload_id: str):
+        for path in self._paths(upload_id):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def abort(self, upload_id: str):
+        """Remove an upload and its bytes."""
+        try:
+            with self._locked(upload_id):
+                self._remove(upload_id)
+        except UploadNotFound:
+            self._remove(upload_id)  # metadata without a partial file
+
+    def expired(self) -> Iterator[Tuple[str, int]]:
+        """
+        Uploads past their expiry, with the bytes they hold on disk.
+        A partial file whose metadata is missing expires expiry_seconds after its last write.
+        """
+        uploads: Dict[str, Dict[str, os.stat_result]] = {}
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            upload_id, suffix = os.path.splitext(entry.name)
+            if suffix in (PARTIAL_SUFFIX, META_SUFFIX) and UPLOAD_ID_PATTERN.match(upload_id):
+                try:
+                    uploads.setdefault(upload_id, {})[suffix] = entry.stat()
+                except FileNotFoundError:
+                    pass
+
+        now = time.time()
+        for upload_id, stats in uploads.items():
+            try:
+                with open(os.path.join(self.directory, upload_id + META_SUFFIX)) as f:
+                    expires_at = json.load(f)["expires_at"]
+            except (OSError, ValueError, KeyError):
+                expires_at = max(stat.st_mtime for stat in stats.values()) + self.expiry_seconds
+            if expires_at < now:
+                yield upload_id, sum(stat.st_size for stat in stats.values())
+
+
+@lru_cache()
+def get_resumable_uploads() -> ResumableUploadStore:
+    """Get the resumable upload store (partial files under <upload_dir>/.partial)."""
+    return ResumableUploadStore(
+        directory=os.path.join(settings.upload_dir, ".partial"),
+        max_bytes=settings.resumable_upload_max_bytes,
+        chunk_bytes=settings.resumable_chunk_bytes,
+        chunk_max_bytes=settings.resumable_chunk_max_bytes,
+        expiry_seconds=settings.resumable_upload_expiry_seconds
+    )
@@ -0,0 +1,217 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models import Student, StudentDailyRollup
+
+INTERVALS = ("day", "week", "month")
+GROUP_BY = ("none", "department", "program")
+
+# (day, department, program); day None = the day of the current transaction
+RollupKey = Tuple[Optional[date], str, str]
+
+
+def rollup_key(department: Optional[str], program: Optional[str], created_at: Optional[datetime] = None) -> RollupKey:
+    """Rollup row a student with these values is counted in."""
+    return (created_at.date() if created_at else None, department or "", program or "")
+
+
+def bucket_start(day: date, interval: str) -> date:
+    """First day of the day/week (Monday)/month bucket containing day."""
+    if interval == "week":
+        return day - timedelta(days=day.weekday())
+    if interval == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _next_bucket(day: date, interval: str) -> date:
+    if interval == "week":
+        return day + timedelta(days=7)
+    if interval == "month":
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return day + timedelta(days=1)
+
+
+class RollupService:
+    """
+    Per-day, per-department, per-program student counts.
+
+    Writers call the methods below before committing, so the rollup rows
+    change in the same transaction as the students they count and can never
+    drift from the base table. Increments are upserts, which PostgreSQL
+    serializes on the (day, department, program) row instead of failing on a
+    duplicate key when two uploads land in the same bucket.
+    """
+
+    @staticmethod
+    def apply(db: Session, deltas: Dict[RollupKey, int]):
+        """Add the given count changes to the rollup rows (inside the caller's transaction)."""
+        for (day, department, program), delta in deltas.items():
+            if delta > 0:
+                RollupService._increment(db, day, department, program, delta)
+            elif delta < 0:
+                key = (
+                    StudentDailyRollup.day == (day if day is not None else func.date(func.now())),
+                    StudentDailyRollup.department == department,
+                    StudentDailyRollup.program == program,
+                )
+                db.execute(
+                    update(StudentDailyRollup)
+                    .where(*key)
+                    .values(count=StudentDailyRollup.count + delta)
+                    .execution_options(synchronize_session=False)
+                )
+                # Drop emptied rows so the table holds what a rebuild would
+                db.execute(
+                    delete(StudentDailyRollup)
+                    .where(*key, StudentDailyRollup.count <= 0)
+                    .execution_options(synchronize_session=False)
+                )
+
+    @staticmethod
+    def _increment(db: Session, day: Optional[date], department: str, program: str, delta: int):
+        table = StudentDailyRollup.__table__
+        values = {
+            # date(now()) is the day created_at's server default will get
+            "day": day if day is not None else func.date(func.now()),
+            "department": department,
+            "program": program,
+            "count": delta,
+        }
+        dialect = db.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            stmt = dialect_insert(table).values(**values)
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[table.c.day, table.c.department, table.c.program],
+                set_={"count": table.c.count + stmt.excluded.count}
+            ))
+            return
+
+        updated = db.execute(
+            update(table)
+            .where(table.c.day == values["day"], table.c.department == department, table.c.program == program)
+            .values(count=table.c.count + delta)
+        ).rowcount
+        if not updated:
+            db.execute(insert(table).values(**values))
+
+    @staticmethod
+    def student_created(db: Session, student: Student):
+        RollupService.apply(db, {rollup_key(student.department, student.program, student.created_at): 1})
+
+    @staticmethod
+    def student_updated(db: Session, old_department: Optional[str], old_program: Optional[str], student: Student):
+        """Move a student between rollup rows if its department or program changed."""
+        RollupService.rows_changed(
+            db,
+            [(old_department, old_program, student.created_at)],
+            [(student.department, student.program, student.created_at)]
+        )
+
+    @staticmethod
+    def student_deleted(db: Session, department: Optional[str], program: Optional[str], created_at: Optional[datetime]):
+        RollupService.apply(db, {rollup_key(department, program, created_at): -1})
+
+    @staticmethod
+    def rows_changed(db: Session, before: Iterable[tuple], after: Iterable[tuple]):
+        """
+        Apply many changes at once (bulk update/delete, re-extraction).
+
+        Args:
+            before: (department, program, created_at) of the affected students before the change
+            after: The same after the change (nothing for deleted students)
+        """
+        deltas = defaultdict(int)
+        for values in before:
+            deltas[rollup_key(*values)] -= 1
+        for values in after:
+            deltas[rollup_key(*values)] += 1
+        RollupService.apply(db, deltas)
+
+    @staticmethod
+    def rebuild(db: Session) -> int:
+        """
+        Recompute every rollup row from the students table in one transaction.
+
+        Returns:
+            Number of rollup rows written
+        """
+        day = func.date(Student.created_at)
+        department = func.coalesce(Student.department, "")
+        program = func.coalesce(Student.program, "")
+        try:
+            if db.get_bind().dialect.name == "postgresql":
+                # Writers wait for the rebuild instead of incrementing rows it is about to replace
+                db.execute(text(f"LOCK TABLE {StudentDailyRollup.__tablename__} IN EXCLUSIVE MODE"))
+            db.execute(delete(StudentDailyRollup))
+            db.execute(
+                insert(StudentDailyRollup).from_select(
+                    ["day", "department", "program", "count"],
+                    select(day, department, program, func.count(Student.id)).group_by(day, department, program)
+                )
+            )
+            rows = db.scalar(select(func.count()).select_from(StudentDailyRollup))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return rows
+
+    @staticmethod
+    def timeseries(
+        db: Session,
+        start: date,
+        end: date,
+        interval: str = "day",
+        group_by: str = "none",
+        department: Optional[str] = None,
+        program: Optional[str] = None
+    ) -> dict:
+        """
+        Students created per bucket between start and end (inclusive), read from the rollups only.
+
+        Returns:
+            Bucket start dates and one series of counts per group, zero-filled
+        """
+        columns = [StudentDailyRollup.day]
+        if group_by != "none":
+            columns.append(getattr(StudentDailyRollup, group_by))
+        query = select(*columns, func.sum(StudentDailyRollup.count)).where(
+            StudentDailyRollup.day >= start,
+            StudentDailyRollup.day <= end,
+            StudentDailyRollup.count > 0
+        ).group_by(*columns)
+        if department is not None:
+            query = query.where(StudentDailyRollup.department == department)
+        if program is not None:
+            query = query.where(StudentDailyRollup.program == program)
+
+        buckets: List[date] = []
+        current = bucket_start(start, interval)
+        while current <= end:
+            buckets.append(current)
+            current = _next_bucket(current, interval)
+        positions = {bucket: i for i, bucket in enumerate(buckets)}
+
+        series: Dict[str, List[int]] = {}
+        for row in db.execute(query):
+            name = (row[1] or "Unknown") if group_by != "none" else "All"
+            counts = series.setdefault(name, [0] * len(buckets))
+            counts[positions[bucket_start(row[0], interval)]] += int(row[-1])
+
+        ordered = sorted(series.items(), key=lambda item: -sum(item[1]))
+        return {
+            "interval": interval,
+            "group_by": group_by,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "buckets": [bucket.isoformat() for bucket in buckets],
+            "series": [{"name": name, "counts": counts, "total": sum(counts)} for name, counts in ordered],
+            "total": sum(sum(counts) for counts in series.values()),
+        }
@@ -0,0 +1,216 @@
+import bisect
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from models import Student
+
+settings = get_settings()
+
+RECENT_WINDOW = timedelta(days=7)
+
+
+def _to_epoch(value: Optional[datetime]) -> float:
+    """Convert a (possibly naive UTC) datetime to a POSIX timestamp."""
+    if value is None:
+        return time.time()
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class StatsCounters:
+    """
+    Incrementally maintained statistics.
+
+    Seeded once from the database, then adjusted on every create, update and
+    delete made through this process. Counters are re-seeded periodically so
+    changes made by other processes are eventually picked up.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seeded_at: Optional[float] = None
+        self._departments: Dict[Optional[str], int] = {}
+        self._recent: List[float] = []  # sorted creation timestamps inside the recent window
+
+    def needs_seed(self) -> bool:
+        return (
+            self._seeded_at is None or
+            time.time() - self._seeded_at > settings.stats_counter_resync_seconds
+        )
+
+    def seed(self, db: Session):
+        """Load counters from the database."""
+        departments = db.query(Student.department, func.count(Student.id)).group_by(Student.department).all()
+        week_ago = datetime.utcnow() - RECENT_WINDOW
+        recent = [
+            _to_epoch(created_at)
+            for (created_at,) in db.query(Student.created_at).filter(Student.created_at >= week_ago)
+        ]
+
+        with self._lock:
+            self._departments = {dept: count for dept, count in departments}
+            self._recent = sorted(recent)
+            self._seeded_at = time.time()
+
+    def snapshot(self) -> dict:
+        cutoff = time.time() - RECENT_WINDOW.total_seconds()
+        with self._lock:
+            # Drop timestamps that have aged out of the window
+            del self._recent[:bisect.bisect_left(self._recent, cutoff)]
+            departments = [(dept, count) for dept, count in self._departments.items() if count > 0]
+            recent_uploads = len(self._recent)
+
+        return StatsService.format_statistics(departments, recent_uploads)
+
+    def student_created(self, department: Optional[str], created_at: Optional[datetime]):
+        with self._lock:
+            if self._seeded_at is None:
+                return
+            self._departments[department] = self._departments.get(department, 0) + 1
+            bisect.insort(self._recent, _to_epoch(created_at))
+
+    def student_deleted(self, department: Optional[str], created_at: Optional[datetime]):
+        with self._lock:
+            if self._seeded_at is None:
+                return
+            self._departments[department] = max(self._departments.get(department, 0) - 1, 0)
+            stamp = _to_epoch(created_at)
+            index = bisect.bisect_left(self._recent, stamp)
+            if index < len(self._recent) and self._recent[index] == stamp:
+                del self._recent[index]
+
+    def reset(self):
+        """Force a re-seed on next use (after changes too broad to apply one by one)."""
+        with self._lock:
+            self._seeded_at = None
+
+    def department_changed(self, old_department: Optional[str], new_department: Optional[str]):
+        if old_department == new_department:
+            return
+        with self._lock:
+            if self._seeded_at is None:
+                return
+            self._departments[old_department] = max(self._departments.get(old_department, 0) - 1, 0)
+            self._departments[new_department] = self._departments.get(new_department, 0) + 1
+
+
+class StatsService:
+    """Service for dashboard statistics."""
+
+    _lock = threading.Lock()
+    _cached: Optional[dict] = None
+    _cached_at: float = 0.0
+    _generation: int = 0
+    _counters = StatsCounters()
+
+    @staticmethod
+    def format_statistics(departments, recent_uploads: int) -> dict:
+        """Build the /api/stats payload from per-department counts."""
+        return {
+            "total_students": sum(count for _, count in departments),
+            "recent_uploads": recent_uploads,
+            "departments": [
+                {"name": dept or "Unknown", "count": count}
+                for dept, count in departments
+            ]
+        }
+
+    @staticmethod
+    def compute_statistics(db: Session) -> dict:
+        """
+        Compute statistics with a single aggregate query.
+
+        Args:
+            db: Database session
+
+        Returns:
+            Dictionary with total students, recent uploads and per-department counts
+        """
+        week_ago = datetime.utcnow() - RECENT_WINDOW
+        rows = db.query(
+            Student.department,
+            func.count(Student.id),
+            func.count(case((Student.created_at >= week_ago, Student.id)))
+        ).group_by(Student.department).all()
+
+        return StatsService.format_statistics(
+            [(dept, count) for dept, count, _ in rows],
+            sum(recent for _, _, recent in rows)
+        )
+
+    @staticmethod
+    def get_statistics(db: Session) -> dict:
+        """
+        Get statistics, served from the TTL cache or from incremental counters
+        depending on settings.stats_backend.
+        """
+        if settings.stats_backend == "counters":
+            counters = StatsService._counters
+            if counters.needs_seed():
+                counters.seed(db)
+            return counters.snapshot()
+
+        with StatsService._lock:
+            cached = StatsService._cached
+            if cached is not None and time.monotonic() - StatsService._cached_at < settings.stats_cache_ttl_seconds:
+                return cached
+            generation = StatsService._generation
+
+        stats = StatsService.compute_statistics(db)
+
+        with StatsService._lock:
+            # Don't cache a result that raced with an invalidation
+            if generation == StatsService._generation:
+                StatsService._cached = stats
+                StatsService._cached_at = time.monotonic()
+        return stats
+
+    @staticmethod
+    def version(stats: dict) -> tuple:
+        """
+        The counts a statistics payload is made of, for its ETag. They come
+        from the cache or the counters, so no query or serialization is needed.
+        """
+        return (
+            stats["total_students"],
+            stats["recent_uploads"],
+            *(f"{dept['name']}={dept['count']}" for dept in stats["departments"])
+        )
+
+    @staticmethod
+    def invalidate():
+        """Drop the cached statistics."""
+        with StatsService._lock:
+            StatsService._cached = None
+            StatsService._generation += 1
+
+    @staticmethod
+    def student_created(student: Student):
+        """Record a newly committed student."""
+        StatsService.invalidate()
+        StatsService._counters.student_created(student.department, student.created_at)
+
+    @staticmethod
+    def student_updated(old_department: Optional[str], student: Student):
+        """Record a committed update to a student."""
+        StatsService.invalidate()
+        StatsService._counters.department_changed(old_department, student.department)
+
+    @staticmethod
+    def student_deleted(department: Optional[str], created_at: Optional[datetime]):
+        """Record a committed student deletion (values are captured before the delete)."""
+        StatsService.invalidate()
+        StatsService._counters.student_deleted(department, created_at)
+
+    @staticmethod
+    def bulk_changed():
+        """Record a committed change to many students at once."""
+        StatsService.invalidate()
+        StatsService._counters.reset()
@@ -0,0 +1,344 @@
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from typing import BinaryIO, Iterator, NamedTuple, Optional
+
+from config import get_settings
+
+settings = get_settings()
+
+CHUNK_SIZE = 1024 * 1024
+
+# <sha256>[.<variant>][.<ext>], e.g. "3f2a...e1.jpg" or "3f2a...e1.thumb.jpg"
+STORAGE_KEY_PATTERN = re.compile(r"^[0-9a-f]{64}(?:\.[A-Za-z0-9_-]{1,16}){0,2}$")
+
+
+def is_storage_key(value: Optional[str]) -> bool:
+    """Check whether a stored path is a content-addressed storage key."""
+    return bool(value) and STORAGE_KEY_PATTERN.match(value) is not None
+
+
+def key_digest(key: str) -> str:
+    """Get the content hash embedded in a storage key."""
+    return key[:64]
+
+
+def normalize_extension(extension: str) -> str:
+    extension = (extension or "").lower()
+    if extension and not extension.startswith("."):
+        extension = f".{extension}"
+    return extension
+
+
+class StoredObject(NamedTuple):
+    """Metadata of a stored object."""
+    key: str
+    size: int
+    modified: float
+
+
+class StorageBackend:
+    """
+    Content-addressed object storage.
+
+    Objects are keyed on the SHA-256 of their contents plus the original file
+    extension, so identical files are stored once. Keys are sharded by their
+    first two hex byte pairs (ab/cd/abcd...).
+    """
+
+    def put(self, stream: BinaryIO, extension: str = "") -> str:
+        """Store a stream and return its key."""
+        raise NotImplementedError
+
+    def put_file(self, path: str, extension: Optional[str] = None, move: bool = False) -> str:
+        """
+        Store a local file and return its key.
+
+        Args:
+            path: Path to the file
+            extension: Extension for the key, defaults to the file's own
+            move: Remove the local file once it is stored
+        """
+        if extension is None:
+            extension = os.path.splitext(path)[1]
+        with open(path, "rb") as f:
+            key = self.put(f, extension)
+        if move:
+            os.remove(path)
+        return key
+
+    def put_named(self, key: str, path: str):
+        """Store a local file under an explicit key (used for derived variants)."""
+        raise NotImplementedError
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        """Get object metadata, or None if the key does not exist."""
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        return self.stat(key) is not None
+
+    def iter_range(self, key: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """Stream an object's bytes between two inclusive offsets."""
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def iter_keys(self) -> Iterator[str]:
+        """List every stored key."""
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Get a filesystem path for the object if the backend keeps one."""
+        return None
+
+    @contextmanager
+    def local_copy(self, key: str) -> Iterator[str]:
+        """Yield a local path to the object, downloading it to a temporary file if needed."""
+        path = self.local_path(key)
+        if path:
+            yield path
+            return
+
+        suffix = os.path.splitext(key)[1]
+        fd, temp_path = tempfile.mkstemp(suffix=suffix)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in self.iter_range(key):
+                    f.write(chunk)
+            yield temp_path
+        finally:
+            os.remove(temp_path)
+
+    @staticmethod
+    def shard_path(key: str) -> str:
+        return f"{key[0:2]}/{key[2:4]}/{key}"
+
+
+class LocalStorage(StorageBackend):
+    """Content-addressed storage on the local filesystem."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.temp_dir = os.path.join(root, ".tmp")
+        os.makedirs(self.temp_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *self.shard_path(key).split("/"))
+
+    def _commit(self, temp_path: str, key: str):
+        final_path = self._path(key)
+        if os.path.exists(final_path):
+            # Deduplicated: identical content is already stored. Touch it so the
+            # orphan sweeper's grace period counts from this upload
+            os.remove(temp_path)
+            os.utime(final_path, None)
+            return
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(temp_path, final_path)
+
+    def put(self, stream: BinaryIO, extension: str = "") -> str:
+        sha = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=self.temp_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                    sha.update(chunk)
+                    f.write(chunk)
+            key = f"{sha.hexdigest()}{normalize_extension(extension)}"
+            self._commit(temp_path, key)
+            return key
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def put_file(self, path: str, extension: Optional[str] = None, move: bool = False) -> str:
+        if not move:
+            return super().put_file(path, extension, move)
+
+        # Hash in place and rename instead of copying the bytes
+        if extension is None:
+            extension = os.path.splitext(path)[1]
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                sha.update(chunk)
+        key = f"{sha.hexdigest()}{normalize_extension(extension)}"
+
+        final_path = self._path(key)
+        if os.path.exists(final_path):
+            os.remove(path)
+            os.utime(final_path, None)
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            shutil.move(path, final_path)
+        return key
+
+    def put_named(self, key: str, path: str):
+        fd, temp_path = tempfile.mkstemp(dir=self.temp_dir)
+        os.close(fd)
+        shutil.copyfile(path, temp_path)
+        os.makedirs(os.path.dirname(self._path(key)), exist_ok=True)
+        os.replace(temp_path, self._path(key))
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        try:
+            result = os.stat(self._path(key))
+        except FileNotFoundError:
+            return None
+        return StoredObject(key=key, size=result.st_size, modified=result.st_mtime)
+
+    def iter_range(self, key: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        with open(self._path(key), "rb") as f:
+            f.seek(start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                chunk = f.read(CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def iter_keys(self) -> Iterator[str]:
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if is_storage_key(filename):
+                    yield filename
+
+    def local_path(self, key: str) -> Optional[str]:
+        return self._path(key)
+
+
+class S3Storage(StorageBackend):
+    """Content-addressed storage in an S3-compatible bucket (AWS S3, MinIO, ...)."""
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        access_key: Optional[str] = None,
+        secret_key: Optional[str] = None
+    ):
+        # boto3 is only needed (and only imported) for the S3 backend
+        try:
+            import boto3
+            from botocore.config import Config as BotoConfig
+            from botocore.exceptions import ClientError
+        except ImportError:
+            raise RuntimeError("The S3 storage backend requires boto3 (pip install -r requirements-optional.txt)")
+
+        self._client_error = ClientError
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url or None,
+            region_name=region or None,
+            aws_access_key_id=access_key or None,
+            aws_secret_access_key=secret_key or None,
+            # Self-hosted endpoints such as MinIO expect path-style addressing
+            config=BotoConfig(s3={"addressing_style": "path"} if endpoint_url else {})
+        )
+
+    def _object_key(self, key: str) -> str:
+        sharded = self.shard_path(key)
+        return f"{self.prefix}/{sharded}" if self.prefix else sharded
+
+    def put(self, stream: BinaryIO, extension: str = "") -> str:
+        # The key depends on the content hash, so spool the stream while hashing it
+        sha = hashlib.sha256()
+        with tempfile.SpooledTemporaryFile(max_size=8 * CHUNK_SIZE) as spool:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                sha.update(chunk)
+                spool.write(chunk)
+            key = f"{sha.hexdigest()}{normalize_extension(extension)}"
+
+            if self.exists(key):
+                self._touch(key)
+            else:
+                spool.seek(0)
+                self.client.upload_fileobj(spool, self.bucket, self._object_key(key))
+        return key
+
+    def _touch(self, key: str):
+        """
+        Deduplicated: refresh LastModified so the orphan sweeper's (and
+        release_files') grace period counts from this upload. S3 only allows
+        copying an object onto itself when its metadata is replaced.
+        """
+        object_key = self._object_key(key)
+        self.client.copy_object(
+            Bucket=self.bucket,
+            Key=object_key,
+            CopySource={"Bucket": self.bucket, "Key": object_key},
+            MetadataDirective="REPLACE"
+        )
+
+    def put_named(self, key: str, path: str):
+        self.client.upload_file(path, self.bucket, self._object_key(key))
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+        except self._client_error as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        modified: datetime = response["LastModified"]
+        return StoredObject(key=key, size=response["ContentLength"], modified=modified.timestamp())
+
+    def iter_range(self, key: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        kwargs = {}
+        if start or end is not None:
+            kwargs["Range"] = f"bytes={start}-{'' if end is None else end}"
+        response = self.client.get_object(Bucket=self.bucket, Key=self._object_key(key), **kwargs)
+        body = response["Body"]
+        try:
+            yield from body.iter_chunks(CHUNK_SIZE)
+        finally:
+            body.close()
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+
+    def iter_keys(self) -> Iterator[str]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        kwargs = {"Bucket": self.bucket}
+        if self.prefix:
+            kwargs["Prefix"] = f"{self.prefix}/"
+        for page in paginator.paginate(**kwargs):
+            for item in page.get("Contents", []):
+                key = item["Key"].rsplit("/", 1)[-1]
+                if is_storage_key(key):
+                    yield key
+
+
+@lru_cache()
+def get_storage() -> StorageBackend:
+    """Get the configured storage backend."""
+    if settings.storage_backend == "s3":
+        return S3Storage(
+            bucket=settings.s3_bucket,
+            prefix=settings.s3_prefix,
+            endpoint_url=settings.s3_endpoint_url,
+            region=settings.s3_region,
+            access_key=settings.s3_access_key,
+            secret_key=settings.s3_secret_key
+        )
+    return LocalStorage(settings.storage_local_dir or os.path.join(settings.upload_dir, "objects"))
@@ -0,0 +1,328 @@
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models import OCRJob, Student
+from services.derivative_service import DerivativeService
+from services.ingest_service import IngestService
+from services.storage import StorageBackend, is_storage_key, key_digest
+
+# Files the upload path, OCR and re-encoding write next to the uploads and normally remove again
+TRANSIENT_PREFIXES = ("temp_", "photo_", "reencoded_")
+
+REFERENCE_BATCH_SIZE = 500
+
+
+class RateLimiter:
+    """Token bucket that spaces filesystem/storage operations out to at most `per_second`."""
+
+    def __init__(self, per_second: float, stop: Optional[threading.Event] = None):
+        self.interval = 1.0 / per_second if per_second > 0 else 0.0
+        self.stop = stop or threading.Event()
+        self._next = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        if self._next > now:
+            self.stop.wait(self._next - now)
+        self._next = max(self._next, now) + self.interval
+
+
+class UploadSweeper:
+    """
+    Removes files that nothing references any more:
+
+    - temp_* and photo_* files left in upload_dir by failed uploads;
+    - legacy files under upload_dir/<student_id>/ that no student points at;
+    - stored objects that no student or pending/running OCR job references,
+      and derivatives whose original is gone;
+    - abandoned temporary files of the local storage backend;
+    - expired and over-budget export artifacts;
+    - resumable uploads that expired before they were finalized.
+
+    Only files older than the grace period are touched, so in-flight uploads
+    are never raced, and every delete is re-checked against the database right
+    before it happens. Operations are rate limited so a sweep never competes
+    with ingest I/O.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        upload_dir: str,
+        storage: StorageBackend,
+        grace_seconds: int,
+        ops_per_second: float,
+        export_cache=None,
+        skip_dirs: Optional[List[str]] = None,
+        resumable_uploads=None
+    ):
+        self.session_factory = session_factory
+        self.upload_dir = upload_dir
+        self.storage = storage
+        self.grace_seconds = grace_seconds
+        self.ops_per_second = ops_per_second
+        self.export_cache = export_cache
+        self.resumable_uploads = resumable_uploads
+        # Directories under upload_dir that are not legacy student folders
+        self.skip_dirs = {os.path.abspath(path) for path in (skip_dirs or [])}
+        self.last_report: Optional[Dict] = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._run_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def sweep(self, dry_run: bool = False) -> Dict:
+        """
+        Run one sweep.
+
+        Args:
+            dry_run: Report what would be removed without deleting anything
+
+        Returns:
+            Report with removed file counts and reclaimed bytes per kind
+        """
+        with self._run_lock:
+            report = {
+                "dry_run": dry_run,
+                "started_at": time.time(),
+                "scanned": 0,
+                "removed": 0,
+                "reclaimed_bytes": 0,
+                "kinds": {},
+                "errors": 0,
+                "elapsed_seconds": 0.0,
+            }
+            limiter = RateLimiter(self.ops_per_second, self._stop)
+            cutoff = time.time() - self.grace_seconds
+            started = time.perf_counter()
+
+            db = self.session_factory()
+            try:
+                self._sweep_upload_dir(db, report, limiter, cutoff, dry_run)
+                self._sweep_storage(db, report, limiter, cutoff, dry_run)
+                self._sweep_partials(report, limiter, dry_run)
+            finally:
+                db.close()
+
+            if self.export_cache is not None and not dry_run:
+                reclaimed = self.export_cache.evict()
+                if reclaimed:
+                    self._count(report, "export", reclaimed)
+
+            report["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+            self.last_report = report
+            return report
+
+    def _count(self, report: Dict, kind: str, size: int, files: int = 1):
+        kind_report = report["kinds"].setdefault(kind, {"files": 0, "bytes": 0})
+        kind_report["files"] += files
+        kind_report["bytes"] += size
+        report["removed"] += files
+        report["reclaimed_bytes"] += size
+
+    def _remove_file(self, report: Dict, kind: str, path: str, size: int, dry_run: bool):
+        if not dry_run:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                return
+            except OSError as e:
+                report["errors"] += 1
+                print(f"Error sweeping {path}: {str(e)}")
+                return
+        self._count(report, kind, size)
+
+    def _sweep_upload_dir(self, db: Session, report: Dict, limiter: RateLimiter, cutoff: float, dry_run: bool):
+        try:
+            entries = list(os.scandir(self.upload_dir))
+        except FileNotFoundError:
+            return
+
+        for entry in entries:
+            if self._stop.is_set():
+                return
+            if entry.is_file(follow_symlinks=False):
+                if entry.name.startswith(TRANSIENT_PREFIXES):
+                    limiter.wait()
+                    report["scanned"] += 1
+                    stat = entry.stat()
+                    if stat.st_mtime < cutoff:
+                        self._remove_file(report, entry.name.split("_", 1)[0], entry.path, stat.st_size, dry_run)
+            elif entry.is_dir(follow_symlinks=False):
+                if entry.name.startswith(".") or os.path.abspath(entry.path) in self.skip_dirs:
+                    continue
+                self._sweep_legacy_dir(db, report, limiter, cutoff, dry_run, entry.path)
+
+    def _sweep_partials(self, report: Dict, limiter: RateLimiter, dry_run: bool):
+        """Resumable uploads past their own expiry (the grace period does not apply)."""
+        if self.resumable_uploads is None:
+            return
+        for upload_id, size in self.resumable_uploads.expired():
+            if self._stop.is_set():
+                return
+            limiter.wait()
+            report["scanned"] += 1
+            if not dry_run:
+                try:
+                    self.resumable_uploads.abort(upload_id)
+                except OSError as e:
+                    report["errors"] += 1
+                    print(f"Error sweeping upload {upload_id}: {str(e)}")
+                    continue
+            self._count(report, "partial", size)
+
+    def _sweep_legacy_dir(self, db: Session, report: Dict, limiter: RateLimiter, cutoff: float, dry_run: bool, directory: str):
+        """Files under upload_dir/<student_id>/ written before storage keys existed."""
+        candidates = []
+        for entry in os.scandir(directory):
+            if entry.is_file(follow_symlinks=False):
+                limiter.wait()
+                report["scanned"] += 1
+                stat = entry.stat()
+                if stat.st_mtime < cutoff:
+                    candidates.append((entry.path, stat.st_size))
+
+        if candidates:
+            referenced = self._legacy_references(db, os.path.basename(directory))
+            for path, size in candidates:
+                if self._legacy_tail(path) not in referenced:
+                    self._remove_file(report, "legacy", path, size, dry_run)
+
+        if not dry_run:
+            try:
+                os.rmdir(directory)  # only succeeds once the folder is empty
+            except OSError:
+                pass
+
+    def _sweep_storage(self, db: Session, report: Dict, limiter: RateLimiter, cutoff: float, dry_run: bool):
+        temp_dir = getattr(self.storage, "temp_dir", None)
+        if temp_dir and os.path.isdir(temp_dir):
+            for entry in os.scandir(temp_dir):
+                limiter.wait()
+                report["scanned"] += 1
+                stat = entry.stat()
+                if stat.st_mtime < cutoff:
+                    self._remove_file(report, "storage_tmp", entry.path, stat.st_size, dry_run)
+
+        # Pass 1: originals. Digests of kept originals decide which derivatives stay
+        kept_digests = set()
+        for batch in self._batches(key for key in self.storage.iter_keys() if not self._is_derivative(key)):
+            if self._stop.is_set():
+                return
+            referenced = self._referenced_paths(db, batch)
+            for key in batch:
+                limiter.wait()
+                report["scanned"] += 1
+                if key in referenced:
+                    kept_digests.add(bytes.fromhex(key_digest(key))[:16])
+                    continue
+                stored = self.storage.stat(key)
+                if stored is None:
+                    continue
+                # Re-check right before deleting: the key may have been referenced since the batch query
+                if stored.modified >= cutoff or IngestService.is_referenced(db, key):
+                    kept_digests.add(bytes.fromhex(key_digest(key))[:16])
+                    continue
+                if not dry_run:
+                    self.storage.delete(key)
+                self._count(report, "object", stored.size)
+
+        # Pass 2: derivatives whose original was removed (or never kept)
+        for key in self.storage.iter_keys():
+            if self._stop.is_set():
+                return
+            if not self._is_derivative(key) or bytes.fromhex(key_digest(key))[:16] in kept_digests:
+                continue
+            limiter.wait()
+            report["scanned"] += 1
+            stored = self.storage.stat(key)
+            if stored is None or stored.modified >= cutoff:
+                continue
+            if not dry_run:
+                self.storage.delete(key)
+            self._count(report, "derivative", stored.size)
+
+    @staticmethod
+    def _is_derivative(key: str) -> bool:
+        parts = key.split(".")
+        return len(parts) == 3 and parts[1] in DerivativeService.SIZES
+
+    @staticmethod
+    def _batches(keys: Iterator[str]) -> Iterator[List[str]]:
+        batch = []
+        for key in keys:
+            if is_storage_key(key):
+                batch.append(key)
+            if len(batch) >= REFERENCE_BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    @staticmethod
+    def _legacy_tail(path: str) -> tuple:
+        """(<student_id>, <filename>) of a legacy path, however upload_dir was spelled when it was stored."""
+        return tuple(path.replace("\\", "/").rstrip("/").split("/")[-2:])
+
+    @staticmethod
+    def _legacy_references(db: Session, folder: str) -> set:
+        """
+        Legacy files under upload_dir/<folder>/ that a student or a pending/running OCR job points at.
+        Rows hold the path as joined with the UPLOAD_DIR and working directory of
+        the time (./uploads/..., /app/uploads/...), so paths are compared by
+        their last two components rather than as strings.
+        """
+        pattern = f"%{folder}%"
+        paths = set(db.scalars(select(Student.original_image_path).where(Student.original_image_path.like(pattern))))
+        paths.update(db.scalars(select(Student.photo_path).where(Student.photo_path.like(pattern))))
+        paths.update(db.scalars(select(OCRJob.file_key).where(
+            OCRJob.file_key.like(pattern),
+            OCRJob.status.in_(("pending", "running"))
+        )))
+        return {UploadSweeper._legacy_tail(path) for path in paths if path}
+
+    @staticmethod
+    def _referenced_paths(db: Session, paths: List[str]) -> set:
+        """Paths in the batch that a student or a pending/running OCR job points at."""
+        referenced = set(db.scalars(select(Student.original_image_path).where(Student.original_image_path.in_(paths))))
+        referenced.update(db.scalars(select(Student.photo_path).where(Student.photo_path.in_(paths))))
+        referenced.update(db.scalars(select(OCRJob.file_key).where(
+            OCRJob.file_key.in_(paths),
+            OCRJob.status.in_(("pending", "running"))
+        )))
+        return referenced
+
+    def start(self, interval_seconds: int):
+        """Sweep every interval_seconds in a background thread (first sweep after one interval)."""
+        def loop():
+            while not self._stop.is_set():
+                self._wake.wait(interval_seconds)
+                self._wake.clear()
+                if self._stop.is_set():
+                    return
+                try:
+                    report = self.sweep()
+                    print(
+                        f"Upload sweep removed {report['removed']} files, "
+                        f"reclaimed {report['reclaimed_bytes']} bytes in {report['elapsed_seconds']}s"
+                    )
+                except Exception as e:
+                    print(f"Upload sweep failed: {str(e)}")
+
+        self._thread = threading.Thread(target=loop, name="upload-sweeper", daemon=True)
+        self._thread.start()
+
+    def trigger(self):
+        """Run the next sweep now instead of waiting for the interval."""
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
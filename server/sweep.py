@@ -0,0 +1,71 @@
+"""
+Orphaned file sweep for NED University Document Management System
+Removes leftover temp/photo files, unreferenced stored objects and
+derivatives, stale export artifacts and expired resumable uploads. Use this
+from cron when the API's background sweeper is disabled (e.g. with several
+API instances)
+
+Usage: python sweep.py [--dry-run] [--grace-seconds 21600] [--ops-per-second 100]
+"""
+import argparse
+import os
+import sys
+
+from config import get_settings
+from database import SessionLocal
+from services.export_cache import ExportCache
+from services.resumable_upload import get_resumable_uploads
+from services.storage import get_storage
+from services.upload_sweeper import UploadSweeper
+
+settings = get_settings()
+
+
+def main():
+    """Main sweep function."""
+    parser = argparse.ArgumentParser(description="Remove orphaned uploads and stored objects")
+    parser.add_argument("--dry-run", action="store_true", help="Report without removing anything")
+    parser.add_argument("--grace-seconds", type=int, default=settings.sweeper_grace_seconds, help="Only remove files older than this")
+    parser.add_argument("--ops-per-second", type=float, default=settings.sweeper_ops_per_second, help="File checks/deletes per second (0 = unlimited)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("NED University Document Management System")
+    print("Orphaned File Sweep" + (" (dry run)" if args.dry_run else ""))
+    print("=" * 60)
+    print()
+
+    storage = get_storage()
+    export_cache = ExportCache(
+        cache_dir=settings.export_cache_dir or os.path.join(settings.upload_dir, ".exports"),
+        max_bytes=settings.export_cache_max_bytes,
+        max_age_seconds=settings.export_cache_max_age_seconds
+    )
+    sweeper = UploadSweeper(
+        session_factory=SessionLocal,
+        upload_dir=settings.upload_dir,
+        storage=storage,
+        grace_seconds=args.grace_seconds,
+        ops_per_second=args.ops_per_second,
+        export_cache=export_cache,
+        skip_dirs=[export_cache.cache_dir, getattr(storage, "root", "")],
+        resumable_uploads=get_resumable_uploads()
+    )
+
+    try:
+        report = sweeper.sweep(dry_run=args.dry_run)
+    except Exception as e:
+        print(f"❌ Sweep failed: {str(e)}")
+        sys.exit(1)
+
+    verb = "Would remove" if args.dry_run else "Removed"
+    print(f"✓ Scanned {report['scanned']} files in {report['elapsed_seconds']:.1f}s")
+    print(f"  {verb} {report['removed']} files, {report['reclaimed_bytes'] / 1024 / 1024:.1f} MB")
+    for kind, counts in sorted(report["kinds"].items()):
+        print(f"    {kind:12} {counts['files']:8} files {counts['bytes'] / 1024 / 1024:10.1f} MB")
+    if report["errors"]:
+        print(f"  Errors: {report['errors']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Compression of stored OCR text (students.extracted_text_compressed)
+
+The first byte of a stored value names its format. Texts are short (an ID
+card is a few hundred bytes), where plain zlib gains little: its header and
+checksum alone are 6 bytes, and the words every card repeats have not been
+seen yet. Raw deflate with a preset dictionary of that vocabulary roughly
+doubles the ratio. The dictionary is part of the format: never edit it,
+add a new format byte with a new dictionary instead.
+"""
+import zlib
+from typing import Optional
+
+TEXT_RAW = b"\x00"
+TEXT_DEFLATE_V1 = b"\x01"
+
+# Texts shorter than this are stored raw
+COMPRESS_MIN_BYTES = 32
+
+DICTIONARY_V1 = (
+    "Pakistan Karachi University Road "
+    "Valid Upto Date of Issue Date of Birth DOB Father's Name Batch Roll No Enrollment No Seat No "
+    "Signature Registrar Student Card Identity Card ID Card "
+    "Year of Study First Year Second Year Third Year Fourth Year Final Year 1st Year 2nd Year 3rd Year 4th Year "
+    "Program: BS Computer Science BS Software Engineering BE Electrical Engineering BE Mechanical Engineering "
+    "BE Civil Engineering BE Chemical Engineering BE Electronic Engineering BE Industrial Engineering "
+    "BE Textile Engineering B.Arch Architecture "
+    "Department: Computer Science Electrical Engineering Mechanical Engineering Civil Engineering "
+    "Chemical Engineering Electronic Engineering Industrial Engineering Textile Engineering Architecture "
+    "Department of Faculty of Email: @neduet.edu.pk @cloud.neduet.edu.pk @gmail.com Phone: +92 0300-"
+    "\nName: \nStudent ID: \nNED University of Engineering & Technology\n"
+).encode("utf-8")
+
+
+def compress_text(text: Optional[str]) -> Optional[bytes]:
+    """Encode OCR text for storage."""
+    if text is None:
+        return None
+    data = text.encode("utf-8")
+    if len(data) >= COMPRESS_MIN_BYTES:
+        compressor = zlib.compressobj(9, zlib.DEFLATED, -15, zdict=DICTIONARY_V1)
+        packed = compressor.compress(data) + compressor.flush()
+        if len(packed) < len(data):
+            return TEXT_DEFLATE_V1 + packed
+    return TEXT_RAW + data
+
+
+def decompress_text(data: Optional[bytes], plain: Optional[str] = None) -> Optional[str]:
+    """Decode a stored value; rows without one fall back to the legacy plain text."""
+    if data is None:
+        return plain
+    data = bytes(data)  # psycopg2 returns memoryview for bytea
+    if data[:1] == TEXT_DEFLATE_V1:
+        decompressor = zlib.decompressobj(-15, zdict=DICTIONARY_V1)
+        return (decompressor.decompress(data[1:]) + decompressor.flush()).decode("utf-8")
+    if data[:1] == TEXT_RAW:
+        return data[1:].decode("utf-8")
+    raise ValueError(f"Unknown text format {data[:1]!r}")
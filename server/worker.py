@@ -0,0 +1,194 @@
+"""
+OCR worker for NED University Document Management System
+Claims queued documents from the ocr_jobs table, runs OCR and writes the
+students. Run as many workers as needed; they coordinate through the database
+
+Usage: python worker.py [--once] [--poll-interval 2]
+"""
+import argparse
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import threading
+import uuid
+
+from config import get_settings
+from database import SessionLocal, engine, init_db
+from services.derivative_service import DerivativeService
+from services.document_encoder import DocumentEncoder
+from services.ingest_service import IngestService
+from services.job_queue import JobQueue
+from services.ocr_loader import OCRLoader
+from services.request_metrics import RequestMetrics
+from services.storage import get_storage
+
+settings = get_settings()
+
+# Slow-query log for the worker's statements
+RequestMetrics.install(engine)
+
+stop_requested = threading.Event()
+
+
+class Heartbeat:
+    """Background thread that keeps a claimed job's heartbeat fresh while OCR runs."""
+
+    def __init__(self, job_id: int, worker_id: str):
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.stage = None
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"heartbeat-{job_id}", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _beat(self) -> bool:
+        db = SessionLocal()
+        try:
+            if not JobQueue.heartbeat(db, self.job_id, self.worker_id, self.stage):
+                self.lost = True
+                print(f"Job {self.job_id} was reclaimed by another worker")
+                return False
+        except Exception as e:
+            print(f"Heartbeat for job {self.job_id} failed: {str(e)}")
+        finally:
+            db.close()
+        return True
+
+    def _run(self):
+        while not self._stop.wait(settings.worker_heartbeat_seconds):
+            if not self._beat():
+                return
+
+    def report(self, stage: str):
+        """Record a finished pipeline stage right away, for /api/jobs/{id}/events."""
+        self.stage = stage
+        if not self.lost:
+            self._beat()
+
+
+def skip_duplicate(db, job_id: int, file_key: str, worker_id: str, student, distance: int):
+    """Point a job at the stored near-duplicate of its document instead of running OCR."""
+    job = JobQueue.lock_owned(db, job_id, worker_id)
+    if job is None:
+        db.rollback()
+        return
+    IngestService.finish_duplicate(db, job, student)
+    print(f"Job {job_id}: near-duplicate of student {student.student_id} (distance {distance}), OCR skipped")
+    IngestService.release_files(db, [file_key])
+
+
+def process_job(job_id: int, file_key: str, worker_id: str, OCRService):
+    """Run OCR for one claimed job and write its student."""
+    storage = get_storage()
+    output_dir = tempfile.mkdtemp(prefix=f"ocr_job_{job_id}_")
+
+    with Heartbeat(job_id, worker_id) as heartbeat:
+        with storage.local_copy(file_key) as document_path:
+            db = SessionLocal()
+            try:
+                phash, duplicate = IngestService.check_duplicate(db, document_path)
+                if duplicate and settings.phash_duplicate_action == "skip":
+                    skip_duplicate(db, job_id, file_key, worker_id, *duplicate)
+                    shutil.rmtree(output_dir, ignore_errors=True)
+                    return
+            finally:
+                db.close()
+
+            heartbeat.report("fingerprinted")
+            ocr_result = OCRService.process_document(document_path, output_dir, progress=heartbeat.report)
+            encoded = DocumentEncoder.reencode(document_path, os.path.splitext(file_key)[1], output_dir)
+
+    db = SessionLocal()
+    try:
+        if not ocr_result['success']:
+            JobQueue.fail(db, job_id, worker_id, f"OCR processing failed: {ocr_result.get('error', 'Unknown error')}")
+            return
+
+        job = JobQueue.lock_owned(db, job_id, worker_id)
+        if job is None or heartbeat.lost:
+            # Another worker reclaimed the job; let it write the result
+            db.rollback()
+            return
+
+        original_key = file_key
+        if encoded:
+            # Store the losslessly re-encoded document in place of the upload
+            original_key = storage.put_file(*encoded, move=True)
+            job.file_key = original_key
+        student, message = IngestService.save_result(db, ocr_result, original_key, job=job, phash=phash)
+        if duplicate:
+            message += f", near-duplicate of student {duplicate[0].student_id} (distance {duplicate[1]})"
+        print(f"Job {job_id}: {message} ({student.student_id})")
+        photo_key = student.photo_path
+        if original_key != file_key:
+            IngestService.release_files(db, [file_key])
+    finally:
+        db.close()
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    DerivativeService.generate_all([original_key, photo_key])
+
+
+def run(worker_id: str, poll_interval: float, once: bool):
+    """Claim and process jobs until stopped (or until the queue is empty with --once)."""
+    OCRService = OCRLoader.get()
+    if OCRService is None:
+        raise SystemExit(f"OCR service is not available: {OCRLoader.error()}")
+    OCRLoader.warm_up()
+
+    print(f"Worker {worker_id} started")
+    while not stop_requested.is_set():
+        db = SessionLocal()
+        try:
+            job = JobQueue.claim(db, worker_id)
+            claimed = (job.id, job.file_key) if job else None
+        finally:
+            db.close()
+
+        if claimed is None:
+            if once:
+                break
+            stop_requested.wait(poll_interval)
+            continue
+
+        job_id, file_key = claimed
+        try:
+            process_job(job_id, file_key, worker_id, OCRService)
+        except Exception as e:
+            print(f"Job {job_id} failed: {str(e)}")
+            db = SessionLocal()
+            try:
+                JobQueue.fail(db, job_id, worker_id, str(e), retry=True)
+            finally:
+                db.close()
+
+    print(f"Worker {worker_id} stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process queued OCR jobs")
+    parser.add_argument("--once", action="store_true", help="Exit when the queue is empty")
+    parser.add_argument("--poll-interval", type=float, default=settings.worker_poll_seconds, help="Seconds between polls of an empty queue")
+    parser.add_argument("--worker-id", default=f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}")
+    args = parser.parse_args()
+
+    # Finish the current job, then exit
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop_requested.set())
+
+    init_db()
+    run(args.worker_id, args.poll_interval, args.once)
+
+
+if __name__ == "__main__":
+    main()